@@ -3,7 +3,7 @@ Router principal pour l'API v1
 """
 
 from fastapi import APIRouter
-from app.api.v1.endpoints import health, utilisateurs, aliments, exercices, journal, sessions, mesures, auth
+from app.api.v1.endpoints import health, utilisateurs, aliments, exercices, journal, sessions, mesures, auth, stats, export
 
 api_router = APIRouter()
 
@@ -20,3 +20,5 @@ api_router.include_router(sessions.router, prefix="/sessions", tags=["sessions"]
 api_router.include_router(mesures.router, prefix="/mesures", tags=["mesures"])
 
 
+api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
@@ -2,20 +2,24 @@
 Dépendances FastAPI — auth et rôles
 """
 
+import hmac
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from app.core.config import settings
 from app.core.security import verify_token
-from app.core.config import get_admin_email_set
-from app.core.user_profile import apply_admin_bootstrap, fetch_app_profile
+from app.core.user_profile import get_app_profile
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> dict:
     """Token JWT valide : identité Supabase Auth (sub, email)."""
-    payload = verify_token(credentials.credentials)
+    payload = await verify_token(credentials.credentials)
     user_id: str = payload.get("sub")
     if not user_id:
         raise HTTPException(
@@ -27,15 +31,12 @@ async def get_current_user(
 
 async def require_admin(user: dict = Depends(get_current_user)) -> dict:
     """Gestion des profils, utilisateurs, etc. — rôle application admin requis."""
-    prof = fetch_app_profile(user["id"], user.get("email", ""))
+    prof = await get_app_profile(user["id"], user.get("email", ""))
     if not prof:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Aucun profil métier lié à ce compte. Contactez un administrateur.",
         )
-    prof = apply_admin_bootstrap(
-        user.get("email", ""), prof, get_admin_email_set()
-    )
     if str(prof.get("app_role", "user")) != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -44,15 +45,30 @@ async def require_admin(user: dict = Depends(get_current_user)) -> dict:
     return {**user, "profile": prof}
 
 
+async def require_ops(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> dict:
+    """Métriques et statistiques internes : jeton ``METRICS_TOKEN`` (scraper) ou compte admin."""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentification requise",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(credentials.credentials.encode(), token.encode()):
+        return {"id": "metrics", "email": ""}
+    return await require_admin(await get_current_user(credentials))
+
+
 async def get_current_profile(user: dict = Depends(get_current_user)) -> dict:
     """Authenticated user enriched with id_utilisateur and app_role from DB."""
-    prof = fetch_app_profile(user["id"], user.get("email", ""))
+    prof = await get_app_profile(user["id"], user.get("email", ""))
     if not prof:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Aucun profil métier lié à ce compte.",
         )
-    prof = apply_admin_bootstrap(user.get("email", ""), prof, get_admin_email_set())
     id_utilisateur = str(prof.get("id_utilisateur") or "")
     if not id_utilisateur:
         raise HTTPException(
@@ -2,46 +2,117 @@
 Endpoints pour la gestion des aliments
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from typing import List, Optional
 from uuid import UUID
+from app.core import pg_repository
+from app.core.cache import MISSING
+from app.core.catalog import aliments_catalog
 from app.core.database import supabase_admin
+from app.core.http_cache import body_etag, catalog_cache_control, conditional
+from app.core.responses import JsonAdapter, cached_json
+from app.core.pg import pg_pool
 from app.schemas.aliment import AlimentCreate, AlimentUpdate, AlimentRead
+from app.schemas.suggestion import SuggestionRead
 from app.api.v1.deps import get_current_user
 
 router = APIRouter()
 
+ALIMENTS_JSON = JsonAdapter(List[AlimentRead])
+SUGGESTIONS_JSON = JsonAdapter(List[SuggestionRead])
+
 
 @router.get("", response_model=List[AlimentRead])
 async def get_aliments(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     search: Optional[str] = None,
+    search_mode: str = Query(
+        "ilike", pattern="^(ilike|trigram)$",
+        description="trigram : insensible aux accents, tolérant aux fautes, trié par similarité",
+    ),
     _u: dict = Depends(get_current_user),
 ):
     """Récupérer la liste des aliments (utilisateur authentifié)"""
     try:
-        query = supabase_admin.table("aliments").select("*")
-        
-        if search:
-            query = query.ilike("nom", f"%{search}%")
-        
-        result = query.range(skip, skip + limit - 1).order("nom").execute()
-        return result.data
+        trigram = bool(search) and search_mode == "trigram"
+        rows = None if trigram else aliments_catalog.list({}, search, skip, limit)
+        if rows is not None:
+            etag = aliments_catalog.etag(search, skip, limit)
+        else:
+            if trigram and pg_pool.enabled:
+                rows = await pg_repository.search_catalog("rechercher_aliments", {"terme": search}, skip, limit)
+            elif trigram:
+                result = await supabase_admin.rpc(
+                    "rechercher_aliments", {"terme": search, "p_limit": limit, "p_offset": skip}
+                ).execute()
+                rows = result.data
+            elif pg_pool.enabled:
+                rows = await pg_repository.list_catalog("aliments", {}, search, skip, limit)
+            else:
+                query = supabase_admin.table("aliments").select("*")
+
+                if search:
+                    query = query.ilike("nom", f"%{search}%")
+
+                result = await query.range(skip, skip + limit - 1).order("nom").execute()
+                rows = result.data
+            etag = None  # empreinte du JSON produit
+
+        return cached_json(request, response, ALIMENTS_JSON, rows, etag, catalog_cache_control())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
+
+
+@router.get("/suggest", response_model=List[SuggestionRead])
+async def suggest_aliments(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100, description="Début d'un mot du nom (accents ignorés)"),
+    limit: int = Query(10, ge=1, le=50),
+    _u: dict = Depends(get_current_user),
+):
+    """Autocomplétion : noms dont un mot commence par ``q``, les plus utilisés d'abord"""
+    try:
+        rows = aliments_catalog.suggest(q, limit)
+        if rows is not None:
+            etag = aliments_catalog.etag("suggest", q, limit)
+        else:
+            # Même correspondance que l'index (accents ignorés, début de mot) : fonction SQL
+            if pg_pool.enabled:
+                rows = await pg_repository.suggest_catalog("suggerer_aliments", q, limit)
+            else:
+                result = await supabase_admin.rpc("suggerer_aliments", {"prefixe": q, "p_limit": limit}).execute()
+                rows = result.data
+            etag = None  # empreinte du JSON produit
+
+        return cached_json(request, response, SUGGESTIONS_JSON, rows, etag, catalog_cache_control())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
 
 
 @router.get("/{aliment_id}", response_model=AlimentRead)
-async def get_aliment(aliment_id: UUID, _u: dict = Depends(get_current_user)):
+async def get_aliment(
+    aliment_id: UUID, request: Request, response: Response, _u: dict = Depends(get_current_user)
+):
     """Récupérer un aliment par son ID"""
     try:
-        result = supabase_admin.table("aliments").select("*").eq("id_aliment", str(aliment_id)).execute()
+        row = aliments_catalog.get(aliment_id)
+        etag = aliments_catalog.etag(str(aliment_id)) if row is not MISSING else None
+        if row is MISSING:
+            if pg_pool.enabled:
+                row = await pg_repository.get_row("aliments", "id_aliment", aliment_id)
+            else:
+                result = await supabase_admin.table("aliments").select("*").eq("id_aliment", str(aliment_id)).execute()
+                row = result.data[0] if result.data else None
         
-        if not result.data:
+        if not row:
             raise HTTPException(status_code=404, detail="Aliment non trouvé")
         
-        return result.data[0]
+        not_modified = conditional(request, response, etag or body_etag(row), catalog_cache_control())
+        return not_modified if not_modified is not None else row
     except HTTPException:
         raise
     except Exception as e:
@@ -53,11 +124,12 @@ async def create_aliment(aliment: AlimentCreate, _u: dict = Depends(get_current_
     """Créer un nouvel aliment"""
     try:
         data = aliment.model_dump()
-        result = supabase_admin.table("aliments").insert(data).execute()
+        result = await supabase_admin.table("aliments").insert(data).execute()
         
         if not result.data:
             raise HTTPException(status_code=400, detail="Erreur lors de la création")
         
+        aliments_catalog.invalidate()
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la création: {str(e)}")
@@ -74,11 +146,12 @@ async def update_aliment(
         if not data:
             raise HTTPException(status_code=400, detail="Aucune donnée à mettre à jour")
         
-        result = supabase_admin.table("aliments").update(data).eq("id_aliment", str(aliment_id)).execute()
+        result = await supabase_admin.table("aliments").update(data).eq("id_aliment", str(aliment_id)).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Aliment non trouvé")
         
+        aliments_catalog.invalidate()
         return result.data[0]
     except HTTPException:
         raise
@@ -90,11 +163,12 @@ async def update_aliment(
 async def delete_aliment(aliment_id: UUID, _u: dict = Depends(get_current_user)):
     """Supprimer un aliment"""
     try:
-        result = supabase_admin.table("aliments").delete().eq("id_aliment", str(aliment_id)).execute()
+        result = await supabase_admin.table("aliments").delete().eq("id_aliment", str(aliment_id)).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Aliment non trouvé")
         
+        aliments_catalog.invalidate()
         return None
     except HTTPException:
         raise
@@ -6,9 +6,14 @@ import logging
 from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from app.core.database import supabase, supabase_admin
 from app.core.config import get_admin_email_set
-from app.core.user_profile import apply_admin_bootstrap, fetch_app_profile
+from app.core.user_profile import (
+    apply_admin_bootstrap,
+    fetch_app_profile,
+    invalidate_profile,
+)
 from app.schemas.auth import (
     LoginRequest,
     ProfileMeUpdate,
@@ -40,7 +45,7 @@ async def register(data: RegisterRequest):
         payload["options"] = {"data": meta}
 
     try:
-        auth_response = supabase.auth.sign_up(payload)
+        auth_response = await run_in_threadpool(supabase.auth.sign_up, payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erreur Auth Supabase : {str(e)}")
 
@@ -62,9 +67,10 @@ async def register(data: RegisterRequest):
     if data.prenom is not None:
         utilisateur_data["prenom"] = data.prenom
     try:
-        supabase_admin.table("utilisateurs").upsert(
+        await supabase_admin.table("utilisateurs").upsert(
             utilisateur_data, on_conflict="email"
         ).execute()
+        invalidate_profile(auth_uid)
     except Exception as e:
         logger.warning(
             "Upsert utilisateurs après inscription ignoré ou en échec (trigger DB peut avoir déjà créé la ligne) : %s",
@@ -106,8 +112,9 @@ async def login(data: LoginRequest):
     Authentifie l'utilisateur et retourne un token JWT Supabase.
     """
     try:
-        auth_response = supabase.auth.sign_in_with_password(
-            {"email": data.email, "password": data.password}
+        auth_response = await run_in_threadpool(
+            supabase.auth.sign_in_with_password,
+            {"email": data.email, "password": data.password},
         )
     except Exception as e:
         raise HTTPException(
@@ -202,10 +209,10 @@ async def get_me(current_user: dict = Depends(get_current_user)):
     """
     user_id = current_user["id"]
     email = current_user.get("email", "")
-    prof = fetch_app_profile(user_id, email)
+    prof = await fetch_app_profile(user_id, email)
     if not prof:
         return _prof_to_userinfo(user_id, email, None)
-    prof = apply_admin_bootstrap(email, prof, get_admin_email_set())
+    prof = await apply_admin_bootstrap(email, prof, get_admin_email_set())
     return _prof_to_userinfo(user_id, email, prof)
 
 
@@ -219,13 +226,13 @@ async def patch_me(
     """
     user_id = current_user["id"]
     email = current_user.get("email", "")
-    prof = fetch_app_profile(user_id, email)
+    prof = await fetch_app_profile(user_id, email)
     if not prof:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Aucun profil métier lié à ce compte.",
         )
-    prof = apply_admin_bootstrap(email, prof, get_admin_email_set())
+    prof = await apply_admin_bootstrap(email, prof, get_admin_email_set())
     uid = str(prof.get("id_utilisateur", ""))
     if not uid:
         raise HTTPException(
@@ -239,7 +246,7 @@ async def patch_me(
             detail="Aucun champ à mettre à jour.",
         )
     try:
-        supabase_admin.table("utilisateurs").update(data).eq(
+        await supabase_admin.table("utilisateurs").update(data).eq(
             "id_utilisateur", uid
         ).execute()
     except Exception as e:
@@ -248,7 +255,8 @@ async def patch_me(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erreur lors de la mise à jour : {e!s}",
         ) from e
-    prof2 = fetch_app_profile(user_id, email)
+    invalidate_profile(user_id)
+    prof2 = await fetch_app_profile(user_id, email)
     if prof2:
-        prof2 = apply_admin_bootstrap(email, prof2, get_admin_email_set())
+        prof2 = await apply_admin_bootstrap(email, prof2, get_admin_email_set())
     return _prof_to_userinfo(user_id, email, prof2)
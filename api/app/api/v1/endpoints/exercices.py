@@ -2,55 +2,128 @@
 Endpoints pour la gestion des exercices
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from typing import List, Optional
 from uuid import UUID
+from app.core import pg_repository
+from app.core.cache import MISSING
+from app.core.catalog import exercices_catalog
 from app.core.database import supabase_admin
+from app.core.http_cache import body_etag, catalog_cache_control, conditional
+from app.core.responses import JsonAdapter, cached_json
+from app.core.pg import pg_pool
 from app.schemas.exercice import ExerciceCreate, ExerciceUpdate, ExerciceRead
+from app.schemas.suggestion import SuggestionRead
 from app.api.v1.deps import get_current_user
 
 router = APIRouter()
 
+EXERCICES_JSON = JsonAdapter(List[ExerciceRead])
+SUGGESTIONS_JSON = JsonAdapter(List[SuggestionRead])
+
 
 @router.get("", response_model=List[ExerciceRead])
 async def get_exercices(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     type: Optional[str] = None,
     groupe_musculaire: Optional[str] = None,
     niveau: Optional[str] = None,
     search: Optional[str] = None,
+    search_mode: str = Query(
+        "ilike", pattern="^(ilike|trigram)$",
+        description="trigram : insensible aux accents, tolérant aux fautes, trié par similarité",
+    ),
     _u: dict = Depends(get_current_user),
 ):
     """Récupérer la liste des exercices"""
     try:
-        query = supabase_admin.table("exercices").select("*")
-        
-        if type:
-            query = query.eq("type", type)
-        if groupe_musculaire:
-            query = query.eq("groupe_musculaire", groupe_musculaire)
-        if niveau:
-            query = query.eq("niveau", niveau)
-        if search:
-            query = query.ilike("nom", f"%{search}%")
-        
-        result = query.range(skip, skip + limit - 1).order("nom").execute()
-        return result.data
+        filters = {"type": type, "groupe_musculaire": groupe_musculaire, "niveau": niveau}
+        trigram = bool(search) and search_mode == "trigram"
+        rows = None if trigram else exercices_catalog.list(filters, search, skip, limit)
+        if rows is not None:
+            etag = exercices_catalog.etag(type, groupe_musculaire, niveau, search, skip, limit)
+        else:
+            rpc_args = {"terme": search, "p_type": type, "p_groupe_musculaire": groupe_musculaire, "p_niveau": niveau}
+            if trigram and pg_pool.enabled:
+                rows = await pg_repository.search_catalog("rechercher_exercices", rpc_args, skip, limit)
+            elif trigram:
+                result = await supabase_admin.rpc(
+                    "rechercher_exercices", {**rpc_args, "p_limit": limit, "p_offset": skip}
+                ).execute()
+                rows = result.data
+            elif pg_pool.enabled:
+                rows = await pg_repository.list_catalog("exercices", filters, search, skip, limit)
+            else:
+                query = supabase_admin.table("exercices").select("*")
+
+                if type:
+                    query = query.eq("type", type)
+                if groupe_musculaire:
+                    query = query.eq("groupe_musculaire", groupe_musculaire)
+                if niveau:
+                    query = query.eq("niveau", niveau)
+                if search:
+                    query = query.ilike("nom", f"%{search}%")
+
+                result = await query.range(skip, skip + limit - 1).order("nom").execute()
+                rows = result.data
+            etag = None  # empreinte du JSON produit
+
+        return cached_json(request, response, EXERCICES_JSON, rows, etag, catalog_cache_control())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
+
+
+@router.get("/suggest", response_model=List[SuggestionRead])
+async def suggest_exercices(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100, description="Début d'un mot du nom (accents ignorés)"),
+    limit: int = Query(10, ge=1, le=50),
+    _u: dict = Depends(get_current_user),
+):
+    """Autocomplétion : noms dont un mot commence par ``q``, les plus utilisés d'abord"""
+    try:
+        rows = exercices_catalog.suggest(q, limit)
+        if rows is not None:
+            etag = exercices_catalog.etag("suggest", q, limit)
+        else:
+            # Même correspondance que l'index (accents ignorés, début de mot) : fonction SQL
+            if pg_pool.enabled:
+                rows = await pg_repository.suggest_catalog("suggerer_exercices", q, limit)
+            else:
+                result = await supabase_admin.rpc("suggerer_exercices", {"prefixe": q, "p_limit": limit}).execute()
+                rows = result.data
+            etag = None  # empreinte du JSON produit
+
+        return cached_json(request, response, SUGGESTIONS_JSON, rows, etag, catalog_cache_control())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
 
 
 @router.get("/{exercice_id}", response_model=ExerciceRead)
-async def get_exercice(exercice_id: UUID, _u: dict = Depends(get_current_user)):
+async def get_exercice(
+    exercice_id: UUID, request: Request, response: Response, _u: dict = Depends(get_current_user)
+):
     """Récupérer un exercice par son ID"""
     try:
-        result = supabase_admin.table("exercices").select("*").eq("id_exercice", str(exercice_id)).execute()
+        row = exercices_catalog.get(exercice_id)
+        etag = exercices_catalog.etag(str(exercice_id)) if row is not MISSING else None
+        if row is MISSING:
+            if pg_pool.enabled:
+                row = await pg_repository.get_row("exercices", "id_exercice", exercice_id)
+            else:
+                result = await supabase_admin.table("exercices").select("*").eq("id_exercice", str(exercice_id)).execute()
+                row = result.data[0] if result.data else None
         
-        if not result.data:
+        if not row:
             raise HTTPException(status_code=404, detail="Exercice non trouvé")
         
-        return result.data[0]
+        not_modified = conditional(request, response, etag or body_etag(row), catalog_cache_control())
+        return not_modified if not_modified is not None else row
     except HTTPException:
         raise
     except Exception as e:
@@ -62,11 +135,12 @@ async def create_exercice(exercice: ExerciceCreate, _u: dict = Depends(get_curre
     """Créer un nouvel exercice"""
     try:
         data = exercice.model_dump()
-        result = supabase_admin.table("exercices").insert(data).execute()
+        result = await supabase_admin.table("exercices").insert(data).execute()
         
         if not result.data:
             raise HTTPException(status_code=400, detail="Erreur lors de la création")
         
+        exercices_catalog.invalidate()
         return result.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la création: {str(e)}")
@@ -83,11 +157,12 @@ async def update_exercice(
         if not data:
             raise HTTPException(status_code=400, detail="Aucune donnée à mettre à jour")
         
-        result = supabase_admin.table("exercices").update(data).eq("id_exercice", str(exercice_id)).execute()
+        result = await supabase_admin.table("exercices").update(data).eq("id_exercice", str(exercice_id)).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Exercice non trouvé")
         
+        exercices_catalog.invalidate()
         return result.data[0]
     except HTTPException:
         raise
@@ -99,11 +174,12 @@ async def update_exercice(
 async def delete_exercice(exercice_id: UUID, _u: dict = Depends(get_current_user)):
     """Supprimer un exercice"""
     try:
-        result = supabase_admin.table("exercices").delete().eq("id_exercice", str(exercice_id)).execute()
+        result = await supabase_admin.table("exercices").delete().eq("id_exercice", str(exercice_id)).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Exercice non trouvé")
         
+        exercices_catalog.invalidate()
         return None
     except HTTPException:
         raise
@@ -0,0 +1,169 @@
+"""
+Export complet de l'historique d'un utilisateur (journal, sessions, mesures, progressions)
+
+Les lignes sont lues par lots keyset (date, id) DESC et écrites dans la réponse au
+fil de la lecture : la mémoire du worker reste bornée à un lot, quelle que soit la
+profondeur d'historique. Compression gzip optionnelle, à la volée.
+
+Les sessions sont exportées avec leurs exercices (``session_exercices``, comme
+``GET /sessions``) ; en CSV, cette colonne contient le tableau JSON.
+"""
+
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.v1.deps import get_current_profile
+from app.core import pg_repository
+from app.core.database import supabase_admin
+from app.core.pagination import encode_cursor, keyset_page
+from app.core.pg import pg_pool
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# clé publique → (table, colonne date, colonne id) ; ordre de l'export
+EXPORT_TABLES = {
+    "journal": ("journal_alimentaire", "date_consommation", "id_journal"),
+    "sessions": ("sessions_sport", "date_session", "id_session"),
+    "mesures": ("mesures_biometriques", "date_mesure", "id_mesure"),
+    "progressions": ("progressions", "date_progression", "id_progression"),
+}
+EXPORT_BATCH_SIZE = 1000  # max-rows PostgREST par défaut
+
+# Projection PostgREST par table (sessions : mêmes jointures que GET /sessions)
+_SELECTS = {
+    "sessions": "*, session_exercices(id_exercice, nombre_series, nombre_repetitions, poids, duree, exercices(nom))",
+}
+
+_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+async def _batches(key: str, utilisateur_id: Optional[UUID]) -> AsyncIterator[list[dict]]:
+    """Lots successifs d'une table, du plus récent au plus ancien."""
+    table, date_col, id_col = EXPORT_TABLES[key]
+    cursor: Optional[str] = None
+    while True:
+        if pg_pool.enabled and key == "sessions":
+            rows = await pg_repository.list_sessions(utilisateur_id, None, None, 0, EXPORT_BATCH_SIZE, cursor)
+        elif pg_pool.enabled:
+            rows = await pg_repository.list_user_rows(
+                table, date_col, id_col, utilisateur_id, None, None, 0, EXPORT_BATCH_SIZE, cursor
+            )
+        else:
+            def build():
+                query = supabase_admin.table(table).select(_SELECTS.get(key, "*"))
+                if utilisateur_id:
+                    query = query.eq("id_utilisateur", str(utilisateur_id))
+                return query
+
+            rows = await keyset_page(build, date_col, id_col, cursor, 0, EXPORT_BATCH_SIZE)
+        if rows:
+            yield rows
+        if len(rows) < EXPORT_BATCH_SIZE:
+            return
+        cursor = encode_cursor(rows[-1][date_col], rows[-1][id_col])
+
+
+def _json_default(value):
+    # Lignes asyncpg : datetime / UUID / Decimal ; PostgREST renvoie déjà du JSON
+    return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+
+
+def _csv_row(row: dict) -> dict:
+    # Colonne imbriquée (session_exercices) : tableau JSON dans la cellule
+    return {
+        k: json.dumps(v, default=_json_default, ensure_ascii=False) if isinstance(v, (list, dict)) else v
+        for k, v in row.items()
+    }
+
+
+def _ndjson(key: str, rows: list[dict]) -> str:
+    return "".join(
+        json.dumps({"table": key, **row}, default=_json_default, ensure_ascii=False, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+async def _encode(keys: list[str], fmt: str, utilisateur_id: Optional[UUID]) -> AsyncIterator[str]:
+    for key in keys:
+        fieldnames: Optional[list[str]] = None
+        async for rows in _batches(key, utilisateur_id):
+            if fmt == "ndjson":
+                yield _ndjson(key, rows)
+                continue
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=fieldnames or list(rows[0]), extrasaction="ignore")
+            if fieldnames is None:
+                fieldnames = list(writer.fieldnames)
+                writer.writeheader()
+            writer.writerows(_csv_row(row) for row in rows)
+            yield buffer.getvalue()
+
+
+async def _stream(keys: list[str], fmt: str, utilisateur_id: Optional[UUID], gzip: bool) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31 : conteneur gzip
+    try:
+        async for chunk in _encode(keys, fmt, utilisateur_id):
+            data = chunk.encode()
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    except Exception:
+        # Statut 200 déjà envoyé : le client voit un flux tronqué
+        logger.exception("Export interrompu (%s)", ",".join(keys))
+        raise
+    if compressor is not None:
+        yield compressor.flush()
+
+
+@router.get("")
+async def export_history(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    tables: Optional[str] = Query(
+        None, description="Liste séparée par des virgules (NDJSON : toutes si absent ; CSV : une table, obligatoire)"
+    ),
+    gzip: bool = Query(False, description="Fichier .gz compressé à la volée"),
+    utilisateur_id: Optional[UUID] = Query(None, description="Admin : utilisateur exporté (tous si absent)"),
+    current: dict = Depends(get_current_profile),
+):
+    """Historique complet en NDJSON (une ligne JSON par enregistrement, champ ``table``) ou CSV (une table)"""
+    if tables is None:
+        if format == "csv":
+            raise HTTPException(
+                status_code=400,
+                detail=f"Export CSV : paramètre tables requis (une table parmi {', '.join(EXPORT_TABLES)})",
+            )
+        tables = ",".join(EXPORT_TABLES)
+    keys = [k.strip() for k in tables.split(",") if k.strip()]
+    unknown = [k for k in keys if k not in EXPORT_TABLES]
+    if not keys or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tables inconnues : {', '.join(unknown) or '(aucune)'} ; valeurs possibles : {', '.join(EXPORT_TABLES)}",
+        )
+    if format == "csv" and len(keys) > 1:
+        raise HTTPException(status_code=400, detail="Export CSV : une seule table par fichier")
+    if current["app_role"] != "admin":
+        utilisateur_id = UUID(current["id_utilisateur"])
+
+    filename = f"export-{'-'.join(keys)}-{datetime.now(timezone.utc):%Y%m%d}.{format}"
+    media_type = _MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        _stream(keys, format, utilisateur_id, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
@@ -2,13 +2,46 @@
 Endpoint de santé pour l'API
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.api.v1.deps import require_ops
+from app.core.catalog import aliments_catalog, exercices_catalog
+from app.core.compression import compression_stats
+from app.core.jwks import jwks_store
+from app.core.pg import pg_pool
+from app.core.security import token_cache
+from app.core.user_profile import profile_cache
+from app.api.v1.endpoints.stats import stats_cache
 
 router = APIRouter()
 
 @router.get("")
 async def health():
-    """Vérification de santé de l'API v1"""
+    """Vérification de santé de l'API v1 (publique, sans détail interne)"""
     return {"status": "ok", "version": "v1"}
 
 
+# Statistiques internes du worker : jeton METRICS_TOKEN ou compte admin
+@router.get("/db", dependencies=[Depends(require_ops)])
+async def health_db():
+    """Métriques du pool PostgreSQL direct (taille, attente d'acquisition, latence)."""
+    return {"pool": pg_pool.stats()}
+
+
+@router.get("/caches", dependencies=[Depends(require_ops)])
+async def health_caches():
+    """Taux de succès des caches mémoire du worker."""
+    return {
+        "profiles": profile_cache.stats(),
+        "tokens": token_cache.stats(),
+        "jwks": jwks_store.stats(),
+        "stats": stats_cache.stats(),
+        "catalog_aliments": aliments_catalog.stats(),
+        "catalog_exercices": exercices_catalog.stats(),
+    }
+
+
+@router.get("/compression", dependencies=[Depends(require_ops)])
+async def health_compression():
+    """Octets avant / après compression et temps CPU, par route et encodage (depuis le démarrage du worker)."""
+    return {"routes": compression_stats.stats()}
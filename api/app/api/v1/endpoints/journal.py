@@ -2,40 +2,103 @@
 Endpoints pour la gestion du journal alimentaire
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, Body, HTTPException, Query, Depends, Request, Response
 from typing import List, Optional
 from uuid import UUID
 from datetime import date
+from app.core import pg_repository
+from app.core.cache import MISSING
+from app.core.catalog import aliments_catalog
 from app.core.database import supabase_admin
-from app.schemas.journal import JournalAlimentaireCreate, JournalAlimentaireUpdate, JournalAlimentaireRead
+from app.core.responses import JsonAdapter, cached_json, json_response
+from app.core.pagination import keyset_page, set_next_cursor
+from app.core.pg import pg_pool
+from app.schemas.journal import (
+    JournalAlimentaireCreate,
+    JournalAlimentaireUpdate,
+    JournalAlimentaireRead,
+    JournalSummaryRead,
+)
 from app.api.v1.deps import get_current_profile
 
 router = APIRouter()
 
+JOURNAL_JSON = JsonAdapter(List[JournalAlimentaireRead])
+SUMMARY_JSON = JsonAdapter(List[JournalSummaryRead])
+
+BULK_MAX_ITEMS = 200  # un repas, voire une journée complète
+
 
 @router.get("", response_model=List[JournalAlimentaireRead])
 async def get_journal_entries(
+    request: Request,
+    response: Response,
     utilisateur_id: Optional[UUID] = None,
     date_debut: Optional[date] = None,
     date_fin: Optional[date] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="En-tête X-Next-Cursor de la page précédente (remplace skip)"),
     current: dict = Depends(get_current_profile),
 ):
     try:
         if current["app_role"] != "admin":
             utilisateur_id = UUID(current["id_utilisateur"])
 
-        query = supabase_admin.table("journal_alimentaire").select("*")
-        if utilisateur_id:
-            query = query.eq("id_utilisateur", str(utilisateur_id))
-        if date_debut:
-            query = query.gte("date_consommation", str(date_debut))
-        if date_fin:
-            query = query.lte("date_consommation", str(date_fin))
+        if pg_pool.enabled:
+            rows = await pg_repository.list_user_rows(
+                "journal_alimentaire", "date_consommation", "id_journal", utilisateur_id, date_debut, date_fin, skip, limit, cursor
+            )
+        else:
+            def build():
+                query = supabase_admin.table("journal_alimentaire").select("*")
+                if utilisateur_id:
+                    query = query.eq("id_utilisateur", str(utilisateur_id))
+                if date_debut:
+                    query = query.gte("date_consommation", str(date_debut))
+                if date_fin:
+                    query = query.lte("date_consommation", str(date_fin))
+                return query
+
+            rows = await keyset_page(
+                build, "date_consommation", "id_journal", cursor, skip, limit, with_nulls=not (date_debut or date_fin)
+            )
+
+        set_next_cursor(response, rows, "date_consommation", "id_journal", limit)
+        return cached_json(request, response, JOURNAL_JSON, rows)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
+
 
-        result = query.range(skip, skip + limit - 1).order("date_consommation", desc=True).execute()
-        return result.data
+@router.get("/summary", response_model=List[JournalSummaryRead])
+async def get_journal_summary(
+    request: Request,
+    response: Response,
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    utilisateur_id: Optional[UUID] = None,
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None,
+    current: dict = Depends(get_current_profile),
+):
+    """Calories et macronutriments par jour / semaine / mois, agrégés en base"""
+    try:
+        if current["app_role"] != "admin":
+            utilisateur_id = UUID(current["id_utilisateur"])
+
+        if pg_pool.enabled:
+            rows = await pg_repository.nutrition_summary(utilisateur_id, granularity, date_debut, date_fin)
+        else:
+            result = await supabase_admin.rpc("resume_nutrition", {
+                "p_utilisateur": str(utilisateur_id) if utilisateur_id else None,
+                "p_granularite": granularity,
+                "p_debut": str(date_debut) if date_debut else None,
+                "p_fin": str(date_fin) if date_fin else None,
+            }).execute()
+            rows = result.data
+
+        return cached_json(request, response, SUMMARY_JSON, rows)
     except HTTPException:
         raise
     except Exception as e:
@@ -45,10 +108,13 @@ async def get_journal_entries(
 @router.get("/{journal_id}", response_model=JournalAlimentaireRead)
 async def get_journal_entry(journal_id: UUID, current: dict = Depends(get_current_profile)):
     try:
-        result = supabase_admin.table("journal_alimentaire").select("*").eq("id_journal", str(journal_id)).execute()
-        if not result.data:
+        if pg_pool.enabled:
+            row = await pg_repository.get_row("journal_alimentaire", "id_journal", journal_id)
+        else:
+            result = await supabase_admin.table("journal_alimentaire").select("*").eq("id_journal", str(journal_id)).execute()
+            row = result.data[0] if result.data else None
+        if not row:
             raise HTTPException(status_code=404, detail="Entrée du journal non trouvée")
-        row = result.data[0]
         if current["app_role"] != "admin" and str(row["id_utilisateur"]) != current["id_utilisateur"]:
             raise HTTPException(status_code=403, detail="Accès refusé")
         return row
@@ -64,7 +130,7 @@ async def create_journal_entry(entry: JournalAlimentaireCreate, current: dict =
         data = entry.model_dump(mode="json")
         if current["app_role"] != "admin":
             data["id_utilisateur"] = current["id_utilisateur"]
-        result = supabase_admin.table("journal_alimentaire").insert(data).execute()
+        result = await supabase_admin.table("journal_alimentaire").insert(data).execute()
         if not result.data:
             raise HTTPException(status_code=400, detail="Erreur lors de la création")
         return result.data[0]
@@ -74,10 +140,72 @@ async def create_journal_entry(entry: JournalAlimentaireCreate, current: dict =
         raise HTTPException(status_code=500, detail=f"Erreur lors de la création: {str(e)}")
 
 
+async def _existing_ids(table: str, id_col: str, ids: set[str]) -> set[str]:
+    if pg_pool.enabled:
+        return await pg_repository.existing_ids(table, id_col, [UUID(i) for i in ids])
+    result = await supabase_admin.table(table).select(id_col).in_(id_col, sorted(ids)).execute()
+    return {str(r[id_col]) for r in result.data}
+
+
+async def _unknown_aliments(ids: set[str]) -> set[str]:
+    """Aliments absents de la base.
+
+    L'instantané du catalogue ne sert qu'à confirmer les présents : il est propre au
+    worker et peut ignorer un aliment créé depuis (autre worker, ETL). Les autres
+    identifiants sont vérifiés en une requête.
+    """
+    unconfirmed = {i for i in ids if aliments_catalog.get(i) in (None, MISSING)}
+    if not unconfirmed:
+        return set()
+    return unconfirmed - await _existing_ids("aliments", "id_aliment", unconfirmed)
+
+
+@router.post("/bulk", response_model=List[JournalAlimentaireRead], status_code=201)
+async def create_journal_entries(
+    entries: List[JournalAlimentaireCreate] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+    current: dict = Depends(get_current_profile),
+):
+    """Plusieurs entrées (ex. un repas) en une seule insertion : tout ou rien.
+
+    Les références inconnues sont signalées entrée par entrée (422, même format
+    que les erreurs de validation FastAPI) avant toute écriture.
+    """
+    try:
+        rows = [entry.model_dump(mode="json") for entry in entries]
+        if current["app_role"] != "admin":
+            for data in rows:
+                data["id_utilisateur"] = current["id_utilisateur"]
+
+        unknown_aliments = await _unknown_aliments({data["id_aliment"] for data in rows})
+        unknown_users: set[str] = set()
+        if current["app_role"] == "admin":
+            users = {data["id_utilisateur"] for data in rows}
+            unknown_users = users - await _existing_ids("utilisateurs", "id_utilisateur", users)
+
+        errors = []
+        for index, data in enumerate(rows):
+            if data["id_aliment"] in unknown_aliments:
+                errors.append({"loc": ["body", index, "id_aliment"], "msg": "Aliment inconnu", "type": "value_error"})
+            if data["id_utilisateur"] in unknown_users:
+                errors.append({"loc": ["body", index, "id_utilisateur"], "msg": "Utilisateur inconnu", "type": "value_error"})
+        if errors:
+            raise HTTPException(status_code=422, detail=errors)
+
+        # Un seul INSERT multi-lignes : PostgREST l'exécute dans une transaction
+        result = await supabase_admin.table("journal_alimentaire").insert(rows).execute()
+        if len(result.data) != len(rows):
+            raise HTTPException(status_code=400, detail="Erreur lors de la création")
+        return json_response(JOURNAL_JSON.dump(result.data), status_code=201)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la création: {str(e)}")
+
+
 @router.put("/{journal_id}", response_model=JournalAlimentaireRead)
 async def update_journal_entry(journal_id: UUID, entry: JournalAlimentaireUpdate, current: dict = Depends(get_current_profile)):
     try:
-        existing = supabase_admin.table("journal_alimentaire").select("id_utilisateur").eq("id_journal", str(journal_id)).execute()
+        existing = await supabase_admin.table("journal_alimentaire").select("id_utilisateur").eq("id_journal", str(journal_id)).execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Entrée du journal non trouvée")
         if current["app_role"] != "admin" and str(existing.data[0]["id_utilisateur"]) != current["id_utilisateur"]:
@@ -87,7 +215,7 @@ async def update_journal_entry(journal_id: UUID, entry: JournalAlimentaireUpdate
         if not data:
             raise HTTPException(status_code=400, detail="Aucune donnée à mettre à jour")
 
-        result = supabase_admin.table("journal_alimentaire").update(data).eq("id_journal", str(journal_id)).execute()
+        result = await supabase_admin.table("journal_alimentaire").update(data).eq("id_journal", str(journal_id)).execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Entrée du journal non trouvée")
         return result.data[0]
@@ -100,13 +228,13 @@ async def update_journal_entry(journal_id: UUID, entry: JournalAlimentaireUpdate
 @router.delete("/{journal_id}", status_code=204)
 async def delete_journal_entry(journal_id: UUID, current: dict = Depends(get_current_profile)):
     try:
-        existing = supabase_admin.table("journal_alimentaire").select("id_utilisateur").eq("id_journal", str(journal_id)).execute()
+        existing = await supabase_admin.table("journal_alimentaire").select("id_utilisateur").eq("id_journal", str(journal_id)).execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Entrée du journal non trouvée")
         if current["app_role"] != "admin" and str(existing.data[0]["id_utilisateur"]) != current["id_utilisateur"]:
             raise HTTPException(status_code=403, detail="Accès refusé")
 
-        supabase_admin.table("journal_alimentaire").delete().eq("id_journal", str(journal_id)).execute()
+        await supabase_admin.table("journal_alimentaire").delete().eq("id_journal", str(journal_id)).execute()
         return None
     except HTTPException:
         raise
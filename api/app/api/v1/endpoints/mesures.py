@@ -2,40 +2,161 @@
 Endpoints pour la gestion des mesures biométriques
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from typing import List, Optional
 from uuid import UUID
-from datetime import date
+from datetime import date, datetime
+import numpy as np
+from app.core import pg_repository
 from app.core.database import supabase_admin
-from app.schemas.mesure import MesureBiometriqueCreate, MesureBiometriqueUpdate, MesureBiometriqueRead
+from app.core.downsample import lttb
+from app.core.responses import JsonAdapter, cached_json
+from app.core.pagination import keyset_page, set_next_cursor
+from app.core.pg import pg_pool
+from app.schemas.mesure import MesureBiometriqueCreate, MesureBiometriqueUpdate, MesureBiometriqueRead, MesureSeriesRead, MesureSummaryRead
 from app.api.v1.deps import get_current_profile
 
 router = APIRouter()
 
+MESURES_JSON = JsonAdapter(List[MesureBiometriqueRead])
+SERIES_JSON = JsonAdapter(MesureSeriesRead)
+SUMMARY_JSON = JsonAdapter(List[MesureSummaryRead])
+SERIES_PAGE_SIZE = 1000  # max-rows PostgREST par défaut
+
 
 @router.get("", response_model=List[MesureBiometriqueRead])
 async def get_mesures(
+    request: Request,
+    response: Response,
     utilisateur_id: Optional[UUID] = None,
     date_debut: Optional[date] = None,
     date_fin: Optional[date] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="En-tête X-Next-Cursor de la page précédente (remplace skip)"),
     current: dict = Depends(get_current_profile),
 ):
     try:
         if current["app_role"] != "admin":
             utilisateur_id = UUID(current["id_utilisateur"])
 
-        query = supabase_admin.table("mesures_biometriques").select("*")
-        if utilisateur_id:
-            query = query.eq("id_utilisateur", str(utilisateur_id))
+        if pg_pool.enabled:
+            rows = await pg_repository.list_user_rows(
+                "mesures_biometriques", "date_mesure", "id_mesure", utilisateur_id, date_debut, date_fin, skip, limit, cursor
+            )
+        else:
+            def build():
+                query = supabase_admin.table("mesures_biometriques").select("*")
+                if utilisateur_id:
+                    query = query.eq("id_utilisateur", str(utilisateur_id))
+                if date_debut:
+                    query = query.gte("date_mesure", str(date_debut))
+                if date_fin:
+                    query = query.lte("date_mesure", str(date_fin))
+                return query
+
+            rows = await keyset_page(
+                build, "date_mesure", "id_mesure", cursor, skip, limit, with_nulls=not (date_debut or date_fin)
+            )
+
+        set_next_cursor(response, rows, "date_mesure", "id_mesure", limit)
+        return cached_json(request, response, MESURES_JSON, rows)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
+
+
+async def _series_rows(
+    metric: str, utilisateur_id: UUID, date_debut: Optional[date], date_fin: Optional[date]
+) -> list[dict]:
+    """Toutes les valeurs non nulles de la période, par date croissante : (date_mesure, valeur)."""
+    if pg_pool.enabled:
+        return await pg_repository.metric_series(metric, utilisateur_id, date_debut, date_fin)
+    rows: list[dict] = []
+    while True:
+        query = (
+            supabase_admin.table("mesures_biometriques")
+            .select(f"date_mesure,valeur:{metric}")
+            .eq("id_utilisateur", str(utilisateur_id))
+            .not_.is_(metric, "null")
+        )
         if date_debut:
             query = query.gte("date_mesure", str(date_debut))
         if date_fin:
             query = query.lte("date_mesure", str(date_fin))
+        result = await query.order("date_mesure").range(len(rows), len(rows) + SERIES_PAGE_SIZE - 1).execute()
+        rows.extend(result.data)
+        if len(result.data) < SERIES_PAGE_SIZE:
+            return rows
+
+
+@router.get("/series", response_model=MesureSeriesRead)
+async def get_mesures_series(
+    request: Request,
+    response: Response,
+    metric: str = Query(..., pattern="^(poids|frequence_cardiaque|sommeil|calories_brulees)$"),
+    points: int = Query(500, ge=3, le=5000, description="Nombre maximal de points renvoyés"),
+    utilisateur_id: Optional[UUID] = None,
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None,
+    current: dict = Depends(get_current_profile),
+):
+    """Série d'une métrique pour un graphique, sous-échantillonnée (LTTB) à ``points`` valeurs"""
+    try:
+        if current["app_role"] != "admin" or utilisateur_id is None:
+            utilisateur_id = UUID(current["id_utilisateur"])
+
+        rows = await _series_rows(metric, utilisateur_id, date_debut, date_fin)
+        dates = [
+            r["date_mesure"] if isinstance(r["date_mesure"], datetime) else datetime.fromisoformat(r["date_mesure"])
+            for r in rows
+        ]
+        x = np.fromiter((d.timestamp() for d in dates), dtype=np.float64, count=len(dates))
+        y = np.fromiter((r["valeur"] for r in rows), dtype=np.float64, count=len(rows))
+        keep = lttb(x, y, points)
+        series = {
+            "metric": metric,
+            "total": len(rows),
+            "points": [{"date": dates[i], "valeur": float(y[i])} for i in keep],
+        }
+
+        return cached_json(request, response, SERIES_JSON, series)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
 
-        result = query.range(skip, skip + limit - 1).order("date_mesure", desc=True).execute()
-        return result.data
+
+@router.get("/summary", response_model=List[MesureSummaryRead])
+async def get_mesures_summary(
+    request: Request,
+    response: Response,
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    utilisateur_id: Optional[UUID] = None,
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None,
+    current: dict = Depends(get_current_profile),
+):
+    """Moyennes et totaux des mesures par jour / semaine / mois, lus dans les cumuls journaliers"""
+    try:
+        if current["app_role"] != "admin":
+            utilisateur_id = UUID(current["id_utilisateur"])
+
+        if pg_pool.enabled:
+            rows = await pg_repository.rollup_summary(
+                "resume_biometrie", utilisateur_id, granularity, date_debut, date_fin
+            )
+        else:
+            result = await supabase_admin.rpc("resume_biometrie", {
+                "p_utilisateur": str(utilisateur_id) if utilisateur_id else None,
+                "p_granularite": granularity,
+                "p_debut": str(date_debut) if date_debut else None,
+                "p_fin": str(date_fin) if date_fin else None,
+            }).execute()
+            rows = result.data
+
+        return cached_json(request, response, SUMMARY_JSON, rows)
     except HTTPException:
         raise
     except Exception as e:
@@ -45,10 +166,13 @@ async def get_mesures(
 @router.get("/{mesure_id}", response_model=MesureBiometriqueRead)
 async def get_mesure(mesure_id: UUID, current: dict = Depends(get_current_profile)):
     try:
-        result = supabase_admin.table("mesures_biometriques").select("*").eq("id_mesure", str(mesure_id)).execute()
-        if not result.data:
+        if pg_pool.enabled:
+            row = await pg_repository.get_row("mesures_biometriques", "id_mesure", mesure_id)
+        else:
+            result = await supabase_admin.table("mesures_biometriques").select("*").eq("id_mesure", str(mesure_id)).execute()
+            row = result.data[0] if result.data else None
+        if not row:
             raise HTTPException(status_code=404, detail="Mesure biométrique non trouvée")
-        row = result.data[0]
         if current["app_role"] != "admin" and str(row["id_utilisateur"]) != current["id_utilisateur"]:
             raise HTTPException(status_code=403, detail="Accès refusé")
         return row
@@ -64,7 +188,7 @@ async def create_mesure(mesure: MesureBiometriqueCreate, current: dict = Depends
         data = mesure.model_dump(mode="json")
         if current["app_role"] != "admin":
             data["id_utilisateur"] = current["id_utilisateur"]
-        result = supabase_admin.table("mesures_biometriques").insert(data).execute()
+        result = await supabase_admin.table("mesures_biometriques").insert(data).execute()
         if not result.data:
             raise HTTPException(status_code=400, detail="Erreur lors de la création")
         return result.data[0]
@@ -77,7 +201,7 @@ async def create_mesure(mesure: MesureBiometriqueCreate, current: dict = Depends
 @router.put("/{mesure_id}", response_model=MesureBiometriqueRead)
 async def update_mesure(mesure_id: UUID, mesure: MesureBiometriqueUpdate, current: dict = Depends(get_current_profile)):
     try:
-        existing = supabase_admin.table("mesures_biometriques").select("id_utilisateur").eq("id_mesure", str(mesure_id)).execute()
+        existing = await supabase_admin.table("mesures_biometriques").select("id_utilisateur").eq("id_mesure", str(mesure_id)).execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Mesure biométrique non trouvée")
         if current["app_role"] != "admin" and str(existing.data[0]["id_utilisateur"]) != current["id_utilisateur"]:
@@ -87,7 +211,7 @@ async def update_mesure(mesure_id: UUID, mesure: MesureBiometriqueUpdate, curren
         if not data:
             raise HTTPException(status_code=400, detail="Aucune donnée à mettre à jour")
 
-        result = supabase_admin.table("mesures_biometriques").update(data).eq("id_mesure", str(mesure_id)).execute()
+        result = await supabase_admin.table("mesures_biometriques").update(data).eq("id_mesure", str(mesure_id)).execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Mesure biométrique non trouvée")
         return result.data[0]
@@ -100,13 +224,13 @@ async def update_mesure(mesure_id: UUID, mesure: MesureBiometriqueUpdate, curren
 @router.delete("/{mesure_id}", status_code=204)
 async def delete_mesure(mesure_id: UUID, current: dict = Depends(get_current_profile)):
     try:
-        existing = supabase_admin.table("mesures_biometriques").select("id_utilisateur").eq("id_mesure", str(mesure_id)).execute()
+        existing = await supabase_admin.table("mesures_biometriques").select("id_utilisateur").eq("id_mesure", str(mesure_id)).execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Mesure biométrique non trouvée")
         if current["app_role"] != "admin" and str(existing.data[0]["id_utilisateur"]) != current["id_utilisateur"]:
             raise HTTPException(status_code=403, detail="Accès refusé")
 
-        supabase_admin.table("mesures_biometriques").delete().eq("id_mesure", str(mesure_id)).execute()
+        await supabase_admin.table("mesures_biometriques").delete().eq("id_mesure", str(mesure_id)).execute()
         return None
     except HTTPException:
         raise
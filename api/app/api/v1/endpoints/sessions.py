@@ -2,42 +2,96 @@
 Endpoints pour la gestion des sessions sport
 """
 
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from typing import List, Optional
 from uuid import UUID
 from datetime import date
+from app.core import pg_repository
 from app.core.database import supabase_admin
-from app.schemas.session import SessionSportCreate, SessionSportUpdate, SessionSportRead
+from app.core.responses import JsonAdapter, cached_json
+from app.core.pagination import keyset_page, set_next_cursor
+from app.core.pg import pg_pool
+from app.schemas.session import SessionSportCreate, SessionSportUpdate, SessionSportRead, SessionSummaryRead
 from app.api.v1.deps import get_current_profile
 
 router = APIRouter()
 
+SESSIONS_JSON = JsonAdapter(List[SessionSportRead])
+SUMMARY_JSON = JsonAdapter(List[SessionSummaryRead])
+
 
 @router.get("", response_model=List[SessionSportRead])
 async def get_sessions(
+    request: Request,
+    response: Response,
     utilisateur_id: Optional[UUID] = None,
     date_debut: Optional[date] = None,
     date_fin: Optional[date] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="En-tête X-Next-Cursor de la page précédente (remplace skip)"),
     current: dict = Depends(get_current_profile),
 ):
     try:
         if current["app_role"] != "admin":
             utilisateur_id = UUID(current["id_utilisateur"])
 
-        query = supabase_admin.table("sessions_sport").select(
-            "*, session_exercices(id_exercice, nombre_series, nombre_repetitions, poids, duree, exercices(nom))"
-        )
-        if utilisateur_id:
-            query = query.eq("id_utilisateur", str(utilisateur_id))
-        if date_debut:
-            query = query.gte("date_session", str(date_debut))
-        if date_fin:
-            query = query.lte("date_session", str(date_fin))
-
-        result = query.range(skip, skip + limit - 1).order("date_session", desc=True).execute()
-        return result.data
+        if pg_pool.enabled:
+            rows = await pg_repository.list_sessions(utilisateur_id, date_debut, date_fin, skip, limit, cursor)
+        else:
+            def build():
+                query = supabase_admin.table("sessions_sport").select(
+                    "*, session_exercices(id_exercice, nombre_series, nombre_repetitions, poids, duree, exercices(nom))"
+                )
+                if utilisateur_id:
+                    query = query.eq("id_utilisateur", str(utilisateur_id))
+                if date_debut:
+                    query = query.gte("date_session", str(date_debut))
+                if date_fin:
+                    query = query.lte("date_session", str(date_fin))
+                return query
+
+            rows = await keyset_page(
+                build, "date_session", "id_session", cursor, skip, limit, with_nulls=not (date_debut or date_fin)
+            )
+
+        set_next_cursor(response, rows, "date_session", "id_session", limit)
+        return cached_json(request, response, SESSIONS_JSON, rows)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
+
+
+@router.get("/summary", response_model=List[SessionSummaryRead])
+async def get_sessions_summary(
+    request: Request,
+    response: Response,
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    utilisateur_id: Optional[UUID] = None,
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None,
+    current: dict = Depends(get_current_profile),
+):
+    """Nombre de sessions et durée totale par jour / semaine / mois, lus dans les cumuls journaliers"""
+    try:
+        if current["app_role"] != "admin":
+            utilisateur_id = UUID(current["id_utilisateur"])
+
+        if pg_pool.enabled:
+            rows = await pg_repository.rollup_summary(
+                "resume_entrainement", utilisateur_id, granularity, date_debut, date_fin
+            )
+        else:
+            result = await supabase_admin.rpc("resume_entrainement", {
+                "p_utilisateur": str(utilisateur_id) if utilisateur_id else None,
+                "p_granularite": granularity,
+                "p_debut": str(date_debut) if date_debut else None,
+                "p_fin": str(date_fin) if date_fin else None,
+            }).execute()
+            rows = result.data
+
+        return cached_json(request, response, SUMMARY_JSON, rows)
     except HTTPException:
         raise
     except Exception as e:
@@ -47,12 +101,15 @@ async def get_sessions(
 @router.get("/{session_id}", response_model=SessionSportRead)
 async def get_session(session_id: UUID, current: dict = Depends(get_current_profile)):
     try:
-        result = supabase_admin.table("sessions_sport").select(
-            "*, session_exercices(id_exercice, nombre_series, nombre_repetitions, poids, duree, exercices(nom))"
-        ).eq("id_session", str(session_id)).execute()
-        if not result.data:
+        if pg_pool.enabled:
+            row = await pg_repository.get_session(session_id)
+        else:
+            result = await supabase_admin.table("sessions_sport").select(
+                "*, session_exercices(id_exercice, nombre_series, nombre_repetitions, poids, duree, exercices(nom))"
+            ).eq("id_session", str(session_id)).execute()
+            row = result.data[0] if result.data else None
+        if not row:
             raise HTTPException(status_code=404, detail="Session non trouvée")
-        row = result.data[0]
         if current["app_role"] != "admin" and str(row["id_utilisateur"]) != current["id_utilisateur"]:
             raise HTTPException(status_code=403, detail="Accès refusé")
         return row
@@ -65,25 +122,18 @@ async def get_session(session_id: UUID, current: dict = Depends(get_current_prof
 @router.post("", response_model=SessionSportRead, status_code=201)
 async def create_session(session: SessionSportCreate, current: dict = Depends(get_current_profile)):
     try:
-        exercices = session.exercices if hasattr(session, "exercices") else []
         session_data = session.model_dump(mode="json", exclude={"exercices"})
         if current["app_role"] != "admin":
             session_data["id_utilisateur"] = current["id_utilisateur"]
+        exercices = [exercice.model_dump(mode="json") for exercice in session.exercices]
 
-        result = supabase_admin.table("sessions_sport").insert(session_data).execute()
+        # Session + exercices en une transaction (fonction SQL creer_session_complete,
+        # qui retourne un tableau d'un élément : APIResponse.data est une liste)
+        result = await supabase_admin.rpc(
+            "creer_session_complete", {"p_session": session_data, "p_exercices": exercices}
+        ).execute()
         if not result.data:
             raise HTTPException(status_code=400, detail="Erreur lors de la création de la session")
-
-        session_id = result.data[0]["id_session"]
-        if exercices:
-            for exercice in exercices:
-                exercice_data = exercice.model_dump(mode="json")
-                exercice_data["id_session"] = session_id
-                supabase_admin.table("session_exercices").insert(exercice_data).execute()
-
-        result = supabase_admin.table("sessions_sport").select(
-            "*, session_exercices(id_exercice, nombre_series, nombre_repetitions, poids, duree, exercices(nom))"
-        ).eq("id_session", session_id).execute()
         return result.data[0]
     except HTTPException:
         raise
@@ -94,7 +144,7 @@ async def create_session(session: SessionSportCreate, current: dict = Depends(ge
 @router.put("/{session_id}", response_model=SessionSportRead)
 async def update_session(session_id: UUID, session: SessionSportUpdate, current: dict = Depends(get_current_profile)):
     try:
-        existing = supabase_admin.table("sessions_sport").select("id_utilisateur").eq("id_session", str(session_id)).execute()
+        existing = await supabase_admin.table("sessions_sport").select("id_utilisateur").eq("id_session", str(session_id)).execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Session non trouvée")
         if current["app_role"] != "admin" and str(existing.data[0]["id_utilisateur"]) != current["id_utilisateur"]:
@@ -104,7 +154,7 @@ async def update_session(session_id: UUID, session: SessionSportUpdate, current:
         if not data:
             raise HTTPException(status_code=400, detail="Aucune donnée à mettre à jour")
 
-        result = supabase_admin.table("sessions_sport").update(data).eq("id_session", str(session_id)).execute()
+        result = await supabase_admin.table("sessions_sport").update(data).eq("id_session", str(session_id)).execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="Session non trouvée")
         return result.data[0]
@@ -117,13 +167,13 @@ async def update_session(session_id: UUID, session: SessionSportUpdate, current:
 @router.delete("/{session_id}", status_code=204)
 async def delete_session(session_id: UUID, current: dict = Depends(get_current_profile)):
     try:
-        existing = supabase_admin.table("sessions_sport").select("id_utilisateur").eq("id_session", str(session_id)).execute()
+        existing = await supabase_admin.table("sessions_sport").select("id_utilisateur").eq("id_session", str(session_id)).execute()
         if not existing.data:
             raise HTTPException(status_code=404, detail="Session non trouvée")
         if current["app_role"] != "admin" and str(existing.data[0]["id_utilisateur"]) != current["id_utilisateur"]:
             raise HTTPException(status_code=403, detail="Accès refusé")
 
-        supabase_admin.table("sessions_sport").delete().eq("id_session", str(session_id)).execute()
+        await supabase_admin.table("sessions_sport").delete().eq("id_session", str(session_id)).execute()
         return None
     except HTTPException:
         raise
@@ -0,0 +1,90 @@
+"""
+Statistiques agrégées de la plateforme (page analytics du dashboard admin)
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+from postgrest.types import CountMethod
+
+from app.api.v1.deps import require_admin
+from app.core import pg_repository
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.core.database import supabase_admin
+from app.core.pg import pg_pool
+from app.schemas.stats import StatsRead
+
+router = APIRouter()
+
+# (clé de réponse, table)
+STATS_TABLES = (
+    ("utilisateurs", "utilisateurs"),
+    ("aliments", "aliments"),
+    ("exercices", "exercices"),
+    ("mesures", "mesures_biometriques"),
+    ("journal", "journal_alimentaire"),
+    ("sessions", "sessions_sport"),
+)
+# Activité récente : somme des cumuls journaliers (fonction SQL activite_recente)
+ACTIVITE_KEYS = ("mesures", "journal", "sessions")
+TYPES_ABONNEMENT = ("freemium", "premium", "premium+", "B2B")
+
+# Une seule entrée : le tableau de bord complet
+stats_cache = TTLCache(maxsize=1, ttl=settings.STATS_CACHE_TTL)
+
+
+async def _count(table: str, eq: tuple[str, str] | None = None) -> int:
+    """Nombre de lignes via l'en-tête Content-Range de PostgREST (une seule ligne transférée)."""
+    query = supabase_admin.table(table).select("*", count=CountMethod(settings.STATS_COUNT_METHOD))
+    if eq:
+        query = query.eq(*eq)
+    result = await query.limit(1).execute()
+    return int(result.count or 0)
+
+
+async def _activite(depuis: date) -> dict[str, int]:
+    result = await supabase_admin.rpc("activite_recente", {"p_depuis": depuis.isoformat()}).execute()
+    row = result.data[0] if result.data else {}
+    return {f"7j:{key}": int(row.get(key) or 0) for key in ACTIVITE_KEYS}
+
+
+async def _postgrest_stats(depuis: date) -> dict[str, int]:
+    """Toutes les requêtes de comptage en parallèle."""
+    jobs = {key: _count(table) for key, table in STATS_TABLES}
+    for t in TYPES_ABONNEMENT:
+        jobs[f"abo:{t}"] = _count("utilisateurs", eq=("type_abonnement", t))
+    *values, activite = await asyncio.gather(*jobs.values(), _activite(depuis))
+    return {**dict(zip(jobs.keys(), values)), **activite}
+
+
+def _to_read(raw: dict[str, int], count_method: str, generated_at: datetime) -> dict:
+    return {
+        "counts": {key: raw[key] for key, _ in STATS_TABLES},
+        "abonnements": {t: raw[f"abo:{t}"] for t in TYPES_ABONNEMENT},
+        "activite_7j": {key: raw[f"7j:{key}"] for key in ACTIVITE_KEYS},
+        "count_method": count_method,
+        "generated_at": generated_at,
+    }
+
+
+@router.get("", response_model=StatsRead)
+async def get_stats(_admin: dict = Depends(require_admin)):
+    """Compteurs par table, répartition des abonnements et activité des 7 derniers jours (admin)."""
+    cached = stats_cache.get("stats")
+    if cached is not MISSING:
+        return cached
+    try:
+        now = datetime.now(timezone.utc)
+        depuis = (now - timedelta(days=6)).date()  # 7 jours UTC, aujourd'hui compris
+        if pg_pool.enabled:
+            raw = await pg_repository.platform_stats(STATS_TABLES, TYPES_ABONNEMENT, ACTIVITE_KEYS, depuis)
+            stats = _to_read(raw, "exact", now)
+        else:
+            raw = await _postgrest_stats(depuis)
+            stats = _to_read(raw, settings.STATS_COUNT_METHOD, now)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
+    stats_cache.set("stats", stats)
+    return stats
@@ -6,11 +6,15 @@ from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List, Optional
 from uuid import UUID
 from app.core.database import supabase_admin
+from app.core.responses import JsonAdapter, json_response
 from app.schemas.utilisateur import UtilisateurCreate, UtilisateurUpdate, UtilisateurRead
 from app.api.v1.deps import require_admin
+from app.core.user_profile import invalidate_missing_profiles, invalidate_utilisateur
 
 router = APIRouter()
 
+UTILISATEURS_JSON = JsonAdapter(List[UtilisateurRead])
+
 
 def _is_email_unique_violation(exc: BaseException) -> bool:
     """Détecte une erreur Postgres 23505 sur la colonne email (e-mail déjà utilisé)."""
@@ -32,8 +36,8 @@ async def get_utilisateurs(
         if type_abonnement:
             query = query.eq("type_abonnement", type_abonnement)
         
-        result = query.range(skip, skip + limit - 1).execute()
-        return result.data
+        result = await query.range(skip, skip + limit - 1).execute()
+        return json_response(UTILISATEURS_JSON.dump(result.data))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération: {str(e)}")
 
@@ -45,7 +49,7 @@ async def get_utilisateur(
 ):
     """Récupérer un utilisateur par son ID (admin)"""
     try:
-        result = supabase_admin.table("utilisateurs").select("*").eq("id_utilisateur", str(utilisateur_id)).execute()
+        result = await supabase_admin.table("utilisateurs").select("*").eq("id_utilisateur", str(utilisateur_id)).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -65,11 +69,12 @@ async def create_utilisateur(
     """Créer un nouvel utilisateur (admin)"""
     try:
         data = utilisateur.model_dump()
-        result = supabase_admin.table("utilisateurs").insert(data).execute()
+        result = await supabase_admin.table("utilisateurs").insert(data).execute()
         
         if not result.data:
             raise HTTPException(status_code=400, detail="Erreur lors de la création")
         
+        invalidate_missing_profiles()
         return result.data[0]
     except HTTPException:
         raise
@@ -95,11 +100,12 @@ async def update_utilisateur(
         if not data:
             raise HTTPException(status_code=400, detail="Aucune donnée à mettre à jour")
         
-        result = supabase_admin.table("utilisateurs").update(data).eq("id_utilisateur", str(utilisateur_id)).execute()
+        result = await supabase_admin.table("utilisateurs").update(data).eq("id_utilisateur", str(utilisateur_id)).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
         
+        invalidate_utilisateur(str(utilisateur_id))
         return result.data[0]
     except HTTPException:
         raise
@@ -114,11 +120,12 @@ async def delete_utilisateur(
 ):
     """Supprimer un utilisateur (admin)"""
     try:
-        result = supabase_admin.table("utilisateurs").delete().eq("id_utilisateur", str(utilisateur_id)).execute()
+        result = await supabase_admin.table("utilisateurs").delete().eq("id_utilisateur", str(utilisateur_id)).execute()
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
         
+        invalidate_utilisateur(str(utilisateur_id))
         return None
     except HTTPException:
         raise
@@ -0,0 +1,258 @@
+"""
+Instantané mémoire des catalogues (aliments, exercices), par worker.
+
+Ces tables ne changent presque qu'au passage hebdomadaire de l'ETL : chaque worker
+en garde une copie complète, chargée au démarrage (lifespan) et rechargée quand la
+version (max(updated_at), nombre de lignes) change en base. Les routes POST / PUT /
+DELETE des routers invalident l'instantané local immédiatement ; les autres workers
+le voient au prochain contrôle de version. Tant qu'un instantané n'est pas chargé,
+les routers lisent la base comme avant.
+
+Chaque instantané porte aussi l'index de préfixes de l'autocomplétion
+(``/suggest``), reconstruit à chaque chargement et quand la popularité est rafraîchie.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+from app.core import database
+from app.core.cache import MISSING
+from app.core.config import settings
+from app.core.http_cache import version_etag
+from app.core.pg import pg_pool
+from app.core.suggest import PrefixIndex
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = 1000  # max-rows PostgREST par défaut
+
+
+class CatalogCache:
+    """Copie complète d'une table catalogue, triée par nom, indexée par id."""
+
+    def __init__(self, table: str, id_col: str, popularity_fn: str) -> None:
+        self.table = table
+        self.id_col = id_col
+        self.popularity_fn = popularity_fn
+        self.suggest_index: Optional[PrefixIndex] = None
+        self._popularity: dict[str, int] = {}
+        self._popularity_at: Optional[float] = None
+        self._rows: Optional[list[dict[str, Any]]] = None
+        self._by_id: dict[str, dict[str, Any]] = {}
+        self._version: Optional[tuple[Any, int]] = None
+        self._loaded_at: Optional[float] = None
+        self._generation = 0
+        self._reload: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._rows is not None
+
+    # --- lecture base ---------------------------------------------------------
+
+    async def _fetch_version(self) -> tuple[Any, int]:
+        """(max(updated_at), nombre de lignes) : détecte ajouts, mises à jour et suppressions."""
+        if pg_pool.enabled:
+            row = await pg_pool.fetchrow(f"SELECT max(updated_at) AS m, count(*) AS n FROM {self.table}")
+            return (str(row["m"]) if row["m"] else None, row["n"])
+        result = await (
+            database.supabase_admin.table(self.table)
+            .select("updated_at", count="exact")
+            .order("updated_at", desc=True)
+            .limit(1)
+            .execute()
+        )
+        latest = result.data[0]["updated_at"] if result.data else None
+        return (str(latest) if latest else None, int(result.count or 0))
+
+    async def _fetch_rows(self) -> list[dict[str, Any]]:
+        if pg_pool.enabled:
+            return await pg_pool.fetch(f"SELECT * FROM {self.table} ORDER BY nom")
+        rows: list[dict[str, Any]] = []
+        while True:
+            result = await (
+                database.supabase_admin.table(self.table)
+                .select("*")
+                .order("nom")
+                .range(len(rows), len(rows) + _PAGE_SIZE - 1)
+                .execute()
+            )
+            rows.extend(result.data)
+            if len(result.data) < _PAGE_SIZE:
+                return rows
+
+    async def _fetch_popularity(self) -> dict[str, int]:
+        """Nombre d'utilisations par id (fonctions SQL ``popularite_*``)."""
+        if pg_pool.enabled:
+            rows = await pg_pool.fetch(f"SELECT id, n FROM {self.popularity_fn}()")
+        else:
+            rows = (await database.supabase_admin.rpc(self.popularity_fn, {}).execute()).data
+        return {str(r["id"]): int(r["n"]) for r in rows}
+
+    # --- chargement -----------------------------------------------------------
+
+    async def load(self) -> None:
+        """Charge l'instantané ; ignoré si une invalidation survient pendant la lecture."""
+        generation = self._generation
+        version = await self._fetch_version()
+        rows = await self._fetch_rows()
+        if generation != self._generation:
+            return
+        self._rows = rows
+        self._by_id = {str(r[self.id_col]): r for r in rows}
+        self._version = version
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+        await self.refresh_popularity()
+
+    async def refresh_popularity(self) -> None:
+        """Recharge la popularité et reconstruit l'index d'autocomplétion."""
+        try:
+            self._popularity = await self._fetch_popularity()
+            self._popularity_at = time.monotonic()
+        except Exception as e:
+            # L'autocomplétion reste disponible, classée par nom
+            logger.warning("Popularité %s indisponible : %s", self.popularity_fn, e)
+        if self._rows is not None:
+            self.suggest_index = PrefixIndex(self._rows, self.id_col, self._popularity)
+
+    def popularity_stale(self) -> bool:
+        return self._popularity_at is None or (
+            time.monotonic() - self._popularity_at > settings.SUGGEST_POPULARITY_TTL
+        )
+
+    async def refresh_if_changed(self) -> bool:
+        """Recharge si la version en base diffère de celle de l'instantané."""
+        if self.loaded and await self._fetch_version() == self._version:
+            return False
+        await self.load()
+        return True
+
+    def invalidate(self) -> None:
+        """Écriture locale : l'instantané est abandonné et rechargé en tâche de fond."""
+        self._generation += 1
+        self._rows = None
+        self._by_id = {}
+        self._version = None
+        self.suggest_index = None
+        if self._reload is None or self._reload.done():
+            try:
+                self._reload = asyncio.get_running_loop().create_task(self._background_load())
+            except RuntimeError:
+                pass  # hors boucle (scripts, tests) : rechargé au prochain contrôle
+
+    async def _background_load(self) -> None:
+        try:
+            await self.load()
+        except Exception as e:
+            logger.warning("Rechargement du catalogue %s en échec : %s", self.table, e)
+
+    # --- requêtes servies depuis la mémoire -------------------------------------
+
+    def list(
+        self,
+        filters: dict[str, Optional[str]],
+        search: Optional[str],
+        skip: int,
+        limit: int,
+    ) -> Optional[list[dict[str, Any]]]:
+        """Même résultat que list_catalog (égalité + ILIKE sur le nom) ; ``None`` si non chargé."""
+        rows = self._rows
+        if rows is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        active = [(col, value) for col, value in filters.items() if value]
+        needle = search.lower() if search else None
+        if active or needle:
+            rows = [
+                r for r in rows
+                if all(r.get(col) == value for col, value in active)
+                and (needle is None or needle in (r.get("nom") or "").lower())
+            ]
+        return rows[skip:skip + limit]
+
+    def get(self, row_id: Any) -> Any:
+        """Ligne par id, ``None`` si absente, ``MISSING`` si l'instantané n'est pas chargé."""
+        if self._rows is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return self._by_id.get(str(row_id))
+
+    def suggest(self, prefix: str, k: int) -> Optional[list[dict[str, Any]]]:
+        """Autocomplétion depuis l'index de préfixes ; ``None`` si non chargé."""
+        index = self.suggest_index
+        if index is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return index.search(prefix, k)
+
+    def etag(self, *params: Any) -> str:
+        """ETag d'une réponse servie par l'instantané : version en base + paramètres."""
+        return version_etag(self.table, self._version, params)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "loaded": self.loaded,
+            "rows": len(self._rows) if self._rows is not None else 0,
+            "age_s": round(time.monotonic() - self._loaded_at, 1) if self.loaded else None,
+            "version": self._version[0] if self._version else None,
+            "suggest_entries": len(self.suggest_index) if self.suggest_index is not None else 0,
+            "loads": self.loads,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+aliments_catalog = CatalogCache("aliments", "id_aliment", "popularite_aliments")
+exercices_catalog = CatalogCache("exercices", "id_exercice", "popularite_exercices")
+CATALOGS = (aliments_catalog, exercices_catalog)
+
+_refresher: Optional[asyncio.Task] = None
+
+
+async def _refresh_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.CATALOG_REFRESH_SEC)
+        for catalog in CATALOGS:
+            try:
+                if await catalog.refresh_if_changed():
+                    logger.info("Catalogue %s rechargé (%s lignes)", catalog.table, catalog.stats()["rows"])
+                elif catalog.popularity_stale():
+                    await catalog.refresh_popularity()
+            except Exception as e:
+                logger.warning("Contrôle de version du catalogue %s en échec : %s", catalog.table, e)
+
+
+async def start_catalogs() -> None:
+    """Premier chargement (les routers lisent la base en cas d'échec) + contrôle périodique."""
+    global _refresher
+    for catalog in CATALOGS:
+        try:
+            await catalog.load()
+        except Exception as e:
+            logger.warning("Catalogue %s non chargé au démarrage : %s", catalog.table, e)
+    if _refresher is None or _refresher.done():
+        _refresher = asyncio.create_task(_refresh_loop())
+
+
+async def stop_catalogs() -> None:
+    global _refresher
+    if _refresher is not None:
+        _refresher.cancel()
+        try:
+            await _refresher
+        except asyncio.CancelledError:
+            pass
+        _refresher = None
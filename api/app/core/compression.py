@@ -0,0 +1,257 @@
+"""
+Compression des réponses HTTP (gzip / brotli) négociée par ``Accept-Encoding``.
+
+Middleware ASGI pur (pas de ``BaseHTTPMiddleware``, qui mettrait les réponses en
+flux en mémoire) :
+  - seuil ``COMPRESSION_MIN_SIZE`` : les petites réponses partent telles quelles ;
+  - réponses en flux (``GET /export``) : les premiers morceaux sont retenus jusqu'au
+    seuil, puis chaque morceau est compressé et vidé (``flush``) aussitôt, sans
+    mettre le flux en tampon ;
+  - déjà encodées (``Content-Encoding``), non compressibles (``application/gzip``…),
+    304 / 204 : transmises sans modification ;
+  - l'ETag d'une réponse compressée devient faible (``W/``), comme le fait nginx ;
+    ``If-None-Match`` est comparé en mode faible (voir ``app.core.http_cache``).
+
+Brotli n'est proposé que si le paquet ``brotli`` est installé. Les octets économisés
+et le temps CPU de compression sont comptés par route (``GET /api/v1/health/compression``).
+"""
+
+from __future__ import annotations
+
+import time
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optionnel : gzip seul
+    brotli = None
+
+_COMPRESSIBLE_PREFIXES = ("text/", "application/json", "application/x-ndjson", "application/javascript",
+                          "application/xml", "image/svg+xml")
+UNROUTED = "(non routé)"
+
+
+def available_encodings(preferred: list[str]) -> tuple[str, ...]:
+    """Encodages configurés réellement utilisables, dans l'ordre de préférence du serveur."""
+    return tuple(e for e in preferred if e == "gzip" or (e == "br" and brotli is not None))
+
+
+def negotiate(accept_encoding: str, available: tuple[str, ...]) -> Optional[str]:
+    """Encodage retenu pour ``Accept-Encoding`` (valeurs q, ``*``), ou None (identité)."""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(_COMPRESSIBLE_PREFIXES) or content_type.split(";")[0].endswith("+json")
+
+
+class _Counter:
+    __slots__ = ("responses", "bytes_in", "bytes_out", "cpu_seconds")
+
+    def __init__(self) -> None:
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+
+class CompressionStats:
+    """Octets avant / après et temps CPU de compression, par route (chemin déclaré) et encodage."""
+
+    def __init__(self) -> None:
+        self._counters: dict[tuple[str, str], _Counter] = {}
+
+    def observe(self, route: str, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        """Une réponse compressée (appelé au dernier morceau)."""
+        counter = self._counters.get((route, encoding))
+        if counter is None:
+            counter = self._counters[(route, encoding)] = _Counter()
+        counter.responses += 1
+        counter.bytes_in += bytes_in
+        counter.bytes_out += bytes_out
+        counter.cpu_seconds += cpu_seconds
+
+    def stats(self) -> list[dict]:
+        out = []
+        for (route, encoding), c in sorted(self._counters.items()):
+            out.append({
+                "route": route,
+                "encoding": encoding,
+                "responses": c.responses,
+                "bytes_in": c.bytes_in,
+                "bytes_out": c.bytes_out,
+                "saved_ratio": round(1 - c.bytes_out / c.bytes_in, 3) if c.bytes_in else 0.0,
+                "cpu_ms": round(c.cpu_seconds * 1000, 3),
+            })
+        return out
+
+
+compression_stats = CompressionStats()
+
+
+class _Encoder:
+    """Compresseur incrémental ; ``compress`` rend des octets décodables immédiatement (flush)."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # wbits=31 : conteneur gzip
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        encodings: tuple[str, ...] = ("br", "gzip"),
+        stats: CompressionStats = compression_stats,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = available_encodings(list(encodings))
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self, scope, send, encoding).run(receive)
+
+
+class _Responder:
+    """État d'une réponse : retient le début tant que la décision n'est pas prise."""
+
+    def __init__(self, middleware: CompressionMiddleware, scope: Scope, send: Send, encoding: str) -> None:
+        self.mw = middleware
+        self.scope = scope
+        self.send = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.pending: list[bytes] = []
+        self.pending_size = 0
+        self.passthrough = False
+        self.encoder: Optional[_Encoder] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu = 0.0
+
+    async def run(self, receive: Receive) -> None:
+        await self.mw.app(self.scope, receive, self.wrapped_send)
+
+    def _route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or UNROUTED
+
+    async def wrapped_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            status = message["status"]
+            self.start = message
+            if (
+                status < 200 or status in (204, 304)
+                or "content-encoding" in headers
+                or not _compressible(headers.get("content-type", ""))
+            ):
+                self.passthrough = True
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.encoder is not None:
+            await self._send_compressed(body, more)
+            return
+
+        self.pending.append(body)
+        self.pending_size += len(body)
+        if self.pending_size < self.mw.minimum_size:
+            if more:
+                return
+            # Sous le seuil : réponse d'origine
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": b"".join(self.pending), "more_body": False})
+            return
+
+        self.encoder = _Encoder(self.encoding, self.mw.gzip_level, self.mw.brotli_quality)
+        headers = MutableHeaders(raw=list(self.start["headers"]))
+        self.start["headers"] = headers.raw
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        data = b"".join(self.pending)
+        self.pending = []
+        if not more:
+            compressed = self._timed(self.encoder.finish, data)
+            headers["Content-Length"] = str(len(compressed))
+            await self.send(self.start)
+            await self._emit(compressed, False, len(data))
+            return
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        await self.send(self.start)
+        await self._emit(self._timed(self.encoder.compress, data), True, len(data))
+
+    async def _send_compressed(self, body: bytes, more: bool) -> None:
+        fn = self.encoder.compress if more else self.encoder.finish
+        await self._emit(self._timed(fn, body), more, len(body))
+
+    def _timed(self, fn, data: bytes) -> bytes:
+        t0 = time.thread_time()
+        out = fn(data)
+        self.cpu += time.thread_time() - t0
+        return out
+
+    async def _emit(self, data: bytes, more: bool, raw_size: int) -> None:
+        self.bytes_in += raw_size
+        self.bytes_out += len(data)
+        if not more:
+            self.mw.stats.observe(self._route(), self.encoding, self.bytes_in, self.bytes_out, self.cpu)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more})
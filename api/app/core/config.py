@@ -22,12 +22,49 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
-    
+    # Lectures (listes / détails) en SQL direct via un pool asyncpg au lieu de PostgREST
+    DIRECT_DB_READS: bool = False
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_ACQUIRE_TIMEOUT: float = 5.0  # secondes
+    DB_COMMAND_TIMEOUT: float = 10.0  # secondes
+
     # JWT
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION: int = 3600  # 1 heure
+    # Cache des tokens vérifiés (par worker) ; 0 désactive le cache
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_MAX_TTL: float = 300.0  # secondes, jamais au-delà de l'exp du token
     
+    # Cache des profils utilisateurs (par worker)
+    PROFILE_CACHE_TTL: float = 60.0  # secondes
+    PROFILE_CACHE_NEGATIVE_TTL: float = 10.0  # secondes (compte sans profil)
+    PROFILE_CACHE_SIZE: int = 10000
+
+    # Catalogues aliments / exercices en mémoire (par worker)
+    CATALOG_CACHE: bool = True
+    CATALOG_REFRESH_SEC: float = 60.0  # contrôle de version (max(updated_at), nombre de lignes)
+    CATALOG_MAX_AGE: int = 60  # Cache-Control max-age des réponses catalogue (secondes)
+    SUGGEST_POPULARITY_TTL: float = 600.0  # recalcul de la popularité pour /suggest (secondes)
+
+    # Statistiques du tableau de bord (/api/v1/stats)
+    STATS_CACHE_TTL: float = 30.0  # secondes
+    STATS_COUNT_METHOD: str = "estimated"  # exact | planned | estimated (PostgREST)
+
+    # Compression des réponses (gzip / brotli si le paquet brotli est installé)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # octets ; en dessous, réponse non compressée
+    COMPRESSION_ENCODINGS: List[str] = ["br", "gzip"]  # ordre de préférence du serveur
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11 ; 4 ≈ coût CPU de gzip 6, meilleur ratio
+
+    # Métriques Prometheus (GET /metrics) : durées par route, appels PostgREST par table
+    METRICS_ENABLED: bool = True
+    # Jeton Bearer du scraper pour /metrics et /api/v1/health/{db,caches,compression} ;
+    # vide : réservés aux comptes admin
+    METRICS_TOKEN: str = ""
+
     # Admins (emails) : promotion automatique app_role=admin à la connexion /me
     ADMIN_EMAILS: str = ""
 
@@ -1,24 +1,54 @@
 """
 Gestion de la connexion à Supabase
+
+- ``supabase`` : client Supabase synchrone, utilisé uniquement pour Supabase Auth
+  (inscription / connexion).
+- ``supabase_admin`` : client PostgREST asynchrone (clé service_role), créé une seule
+  fois et partagé par tous les routers. Les ``await ....execute()`` libèrent la boucle
+  d'événements pendant l'aller-retour HTTP au lieu de bloquer tout le worker uvicorn.
 """
 
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 from supabase import create_client, Client
 from app.core.config import settings
+from app.core.metrics import instrument_httpx
 
 # Clients Supabase (initialisés au démarrage)
 supabase: Client = None
-supabase_admin: Client = None
+supabase_admin: AsyncPostgrestClient = None
+
+
+def _create_admin_client() -> AsyncPostgrestClient:
+    """Client PostgREST async authentifié avec la clé service_role."""
+    headers = {
+        **DEFAULT_POSTGREST_CLIENT_HEADERS,
+        "apikey": settings.SUPABASE_SERVICE_KEY,
+        "Authorization": f"Bearer {settings.SUPABASE_SERVICE_KEY}",
+    }
+    client = AsyncPostgrestClient(
+        f"{settings.SUPABASE_URL.rstrip('/')}/rest/v1", headers=headers
+    )
+    if settings.METRICS_ENABLED:
+        instrument_httpx(client.session)
+    return client
+
 
 def init_supabase():
     """Initialise les clients Supabase"""
     global supabase, supabase_admin
     try:
         supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-        supabase_admin = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+        supabase_admin = _create_admin_client()
     except Exception as e:
         print(f"⚠️  Erreur lors de l'initialisation Supabase: {e}")
         print("   L'API fonctionnera mais les endpoints nécessitant Supabase échoueront")
 
+
+async def close_supabase():
+    """Ferme les connexions HTTP du client PostgREST (arrêt de l'application)."""
+    if supabase_admin is not None:
+        await supabase_admin.aclose()
+
 # Initialiser au chargement du module
 init_supabase()
-
@@ -0,0 +1,40 @@
+"""
+Sous-échantillonnage de séries temporelles pour les graphiques (GET /mesures/series).
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013) : le premier et le dernier point
+sont conservés, l'intérieur est découpé en ``n - 2`` seaux et, dans chaque seau, on
+garde le point qui forme le plus grand triangle avec le point retenu précédemment et
+la moyenne du seau suivant. Les pics et creux restent visibles, contrairement à une
+moyenne par seau. Boucle Python sur les seaux uniquement (``n`` ≤ quelques milliers),
+calculs vectorisés NumPy à l'intérieur de chaque seau.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Indices (croissants) des ``n`` points retenus ; ``x`` doit être trié."""
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    # n - 1 bornes → n - 2 seaux non vides sur [1, size - 1)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.intp)
+    selected = np.empty(n, dtype=np.intp)
+    selected[0], selected[-1] = 0, size - 1
+
+    a = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < n - 1:
+            nxt = slice(edges[i + 1], edges[i + 2])
+            cx, cy = x[nxt].mean(), y[nxt].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
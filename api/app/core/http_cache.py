@@ -0,0 +1,70 @@
+"""
+Réponses conditionnelles HTTP : ETag fort + If-None-Match → 304 Not Modified.
+
+Les tableaux de bord interrogent les listes en boucle ; quand rien n'a changé, une
+réponse 304 sans corps remplace le JSON complet. L'ETag vient soit de la version
+d'un instantané (catalogues : aucun calcul sur les lignes), soit d'une empreinte
+du résultat.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional
+
+import orjson
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+# Données personnelles : toujours revalider (304 si inchangées)
+USER_DATA_CACHE_CONTROL = "private, no-cache"
+
+
+def catalog_cache_control() -> str:
+    """Catalogues : réutilisables CATALOG_MAX_AGE secondes sans requête, puis revalidés."""
+    return f"private, max-age={settings.CATALOG_MAX_AGE}, must-revalidate"
+
+
+def _digest(raw: bytes) -> str:
+    return '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+
+
+def version_etag(*parts: Any) -> str:
+    """ETag à partir d'une version connue (ex. version d'instantané + paramètres de la requête)."""
+    return _digest(repr(parts).encode())
+
+
+def body_etag(data: Any) -> str:
+    """ETag à partir du contenu (ordre des clés normalisé)."""
+    return _digest(orjson.dumps(data, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS))
+
+
+def bytes_etag(raw: bytes) -> str:
+    """ETag d'une réponse déjà sérialisée (voir app.core.responses)."""
+    return _digest(raw)
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparaison faible (RFC 9110 §13.1.2) : le préfixe W/ est ignoré
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def conditional(
+    request: Request,
+    response: Response,
+    etag: str,
+    cache_control: str = USER_DATA_CACHE_CONTROL,
+) -> Optional[Response]:
+    """Pose ETag / Cache-Control ; retourne une réponse 304 si le client a déjà cette version."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if _matches(request.headers.get("if-none-match"), etag):
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        return Response(status_code=304, headers=headers)
+    return None
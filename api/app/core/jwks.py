@@ -0,0 +1,150 @@
+"""
+Jeu de clés JWKS Supabase (JWT ES256), maintenu hors du chemin des requêtes.
+
+Chargé au démarrage (lifespan) puis rafraîchi par une tâche asyncio avant
+expiration. Les requêtes lisent toujours le dernier jeu valide : un rafraîchissement
+lent ou en échec ne les bloque pas. Un ``kid`` inconnu (rotation des clés)
+déclenche un rechargement immédiat, partagé entre les requêtes concurrentes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+JWKS_TTL_SEC = 300
+JWKS_REFRESH_SEC = 240  # avant expiration du TTL
+JWKS_RETRY_SEC = 15  # après un échec de rafraîchissement
+JWKS_MIN_REFETCH_SEC = 10  # kid inconnu : pas plus d'un rechargement par intervalle
+JWKS_TIMEOUT_SEC = 8
+
+
+class JwksUnavailable(Exception):
+    """Aucun jeu de clés disponible (jamais chargé et serveur Auth injoignable)."""
+
+
+class JwksStore:
+    """Dernier jeu JWKS valide + rechargement unique partagé (single-flight)."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self._keys: dict[str, dict[str, Any]] = {}
+        self._fetched_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._refresher: Optional[asyncio.Task] = None
+        self.fetches = 0
+        self.failures = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._fetched_at is not None
+
+    def age(self) -> Optional[float]:
+        return None if self._fetched_at is None else time.monotonic() - self._fetched_at
+
+    def set_keys(self, data: dict[str, Any]) -> None:
+        self._keys = {k["kid"]: k for k in data.get("keys", []) if k.get("kid")}
+        self._fetched_at = time.monotonic()
+
+    async def _fetch(self) -> dict[str, Any]:
+        async with httpx.AsyncClient(timeout=JWKS_TIMEOUT_SEC) as client:
+            resp = await client.get(self.url)
+            resp.raise_for_status()
+            return resp.json()
+
+    async def _refresh_once(self) -> None:
+        self.fetches += 1
+        try:
+            data = await self._fetch()
+        except (httpx.HTTPError, ValueError) as e:
+            self.failures += 1
+            raise JwksUnavailable(str(e)) from e
+        self.set_keys(data)
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._refresh_once())
+            self._inflight.add_done_callback(_log_refresh_failure)
+        return self._inflight
+
+    async def refresh(self) -> None:
+        """Recharge le jeu de clés ; les appels concurrents attendent le même chargement."""
+        self._start_refresh()
+        # shield : l'annulation d'une requête n'interrompt pas le chargement partagé
+        await asyncio.shield(self._inflight)
+
+    async def get_key(self, kid: str) -> Optional[dict[str, Any]]:
+        """Clé publique pour ``kid`` ; ``None`` si elle n'existe pas après rechargement."""
+        key = self._keys.get(kid)
+        if key is not None:
+            if self.age() > JWKS_TTL_SEC:
+                # Stale-while-revalidate : la requête courante utilise le jeu actuel
+                self._start_refresh()
+            return key
+        age = self.age()
+        if age is None or age > JWKS_MIN_REFETCH_SEC:
+            try:
+                await self.refresh()
+            except JwksUnavailable:
+                if not self.loaded:
+                    raise
+        return self._keys.get(kid)
+
+    async def _refresh_loop(self) -> None:
+        delay = JWKS_REFRESH_SEC if self.loaded else JWKS_RETRY_SEC
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+                delay = JWKS_REFRESH_SEC
+            except JwksUnavailable:
+                delay = JWKS_RETRY_SEC
+
+    async def start(self) -> None:
+        """Premier chargement (non bloquant en cas d'échec) puis tâche de rafraîchissement."""
+        try:
+            await self.refresh()
+        except JwksUnavailable:
+            logger.warning("JWKS non chargé au démarrage ; nouvel essai en tâche de fond")
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        for task in (self._refresher, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, JwksUnavailable):
+                    pass
+        self._refresher = None
+        self._inflight = None
+
+    def stats(self) -> dict[str, Any]:
+        age = self.age()
+        return {
+            "loaded": self.loaded,
+            "keys": len(self._keys),
+            "age_s": round(age, 1) if age is not None else None,
+            "fetches": self.fetches,
+            "failures": self.failures,
+        }
+
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    """Journalise l'échec une seule fois, que le chargement ait été attendu ou non."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Chargement JWKS en échec (clés précédentes conservées) : %s", task.exception())
+
+
+jwks_store = JwksStore(
+    f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+)
@@ -0,0 +1,214 @@
+"""
+Métriques du worker au format texte Prometheus (``GET /metrics``).
+
+Compteurs en mémoire, sans dépendance : une observation = une recherche de
+dictionnaire, un ``bisect`` sur les bornes et trois incréments (pas de verrou, un
+worker uvicorn = une boucle d'événements). Les cumuls par borne ne sont calculés
+qu'au moment du rendu.
+
+- ``http_request_duration_seconds{route,method,status}`` : durée des requêtes, par
+  chemin déclaré (``/api/v1/aliments/{aliment_id}``, pas l'URL réelle) ;
+- ``http_requests_in_flight{method}`` : requêtes en cours ;
+- ``postgrest_request_duration_seconds{table,operation}`` : allers-retours PostgREST
+  (``supabase_admin.table(...).execute()`` et ``.rpc()``), mesurés par des hooks
+  httpx sur la session du client ;
+- compteurs de compression (``app.core.compression``).
+
+Chaque worker expose ses propres valeurs ; Prometheus agrège.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import Iterator
+
+import httpx
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.compression import UNROUTED, compression_stats
+
+# secondes ; couvre les 304 servis depuis la mémoire comme les exports longs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Series:
+    __slots__ = ("buckets", "total", "count")
+
+    def __init__(self, size: int) -> None:
+        self.buckets = [0] * size  # non cumulés ; dernier = +Inf
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Histogramme étiqueté ; ``observe`` prend les valeurs d'étiquettes dans l'ordre de ``labelnames``."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...], buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.bounds = buckets
+        self._series: dict[tuple[str, ...], _Series] = {}
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _Series(len(self.bounds) + 1)
+        series.buckets[bisect_left(self.bounds, value)] += 1
+        series.total += value
+        series.count += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.bounds + (float("inf"),), series.buckets):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _fmt(bound)
+                bucket_labels = _labels(self.labelnames, labels, 'le="%s"' % le)
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(series.total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {series.count}"
+
+
+class Gauge:
+    """Valeur instantanée étiquetée."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, labels: tuple[str, ...], amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple[str, ...], amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_fmt(value)}"
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Durée des requêtes HTTP jusqu'au dernier octet envoyé",
+    ("route", "method", "status"),
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requêtes HTTP en cours de traitement", ("method",))
+postgrest_duration = Histogram(
+    "postgrest_request_duration_seconds",
+    "Durée des appels PostgREST (execute) par table et opération",
+    ("table", "operation"),
+)
+
+
+def _render_compression() -> Iterator[str]:
+    rows = compression_stats.stats()
+    for metric, key, kind, help in (
+        ("http_compressed_responses_total", "responses", "counter", "Réponses compressées"),
+        ("http_compression_bytes_in_total", "bytes_in", "counter", "Octets avant compression"),
+        ("http_compression_bytes_out_total", "bytes_out", "counter", "Octets après compression"),
+        ("http_compression_cpu_seconds_total", "cpu_ms", "counter", "Temps CPU de compression"),
+    ):
+        yield f"# HELP {metric} {help}"
+        yield f"# TYPE {metric} {kind}"
+        for row in rows:
+            value = row[key] / 1000 if key == "cpu_ms" else row[key]
+            yield f"{metric}{_labels(('route', 'encoding'), (row['route'], row['encoding']))} {_fmt(value)}"
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in (http_request_duration, http_in_flight, postgrest_duration):
+        lines.extend(metric.render())
+    lines.extend(_render_compression())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Durée et requêtes en cours, par route déclarée ; ASGI pur (les flux ne sont pas mis en tampon)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        in_flight = (method,)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc(in_flight)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec(in_flight)
+            route = getattr(scope.get("route"), "path", None) or UNROUTED
+            http_request_duration.observe((route, method, str(status)), time.perf_counter() - start)
+
+
+# --- PostgREST (hooks httpx) ---
+
+_OPERATIONS = {"GET": "select", "HEAD": "count", "PATCH": "update", "DELETE": "delete"}
+
+
+def _postgrest_labels(request: httpx.Request) -> tuple[str, str]:
+    # URL : {SUPABASE_URL}/rest/v1/<table> ou /rest/v1/rpc/<fonction>
+    path = request.url.path.rsplit("/rest/v1/", 1)[-1].strip("/")
+    if path.startswith("rpc/"):
+        return path[4:], "rpc"
+    if request.method == "POST":
+        prefer = request.headers.get("prefer", "")
+        return path, "upsert" if "resolution=" in prefer else "insert"
+    return path, _OPERATIONS.get(request.method, request.method.lower())
+
+
+async def _on_request(request: httpx.Request) -> None:
+    request.extensions["metrics_start"] = time.perf_counter()
+
+
+async def _on_response(response: httpx.Response) -> None:
+    start = response.request.extensions.get("metrics_start")
+    if start is None:
+        return
+    await response.aread()  # corps compris : même périmètre que execute()
+    postgrest_duration.observe(_postgrest_labels(response.request), time.perf_counter() - start)
+
+
+def instrument_httpx(client: httpx.AsyncClient) -> None:
+    """Ajoute le chronométrage PostgREST aux hooks d'une session httpx."""
+    hooks = client.event_hooks
+    hooks["request"] = [*hooks.get("request", []), _on_request]
+    hooks["response"] = [*hooks.get("response", []), _on_response]
+    client.event_hooks = hooks
@@ -0,0 +1,99 @@
+"""
+Pagination par curseur (keyset) pour les listes triées par date décroissante.
+
+Le curseur est opaque pour les clients : base64url du couple (date, id) de la
+dernière ligne renvoyée. La page suivante demande les lignes strictement
+« après » ce couple dans l'ordre (date DESC NULLS LAST, id DESC), ce que les index
+composites (id_utilisateur, date DESC NULLS LAST, id DESC) servent sans parcourir
+les pages précédentes. La pagination par ``skip`` reste disponible pour les anciens
+clients.
+
+Les dates sont nullables (colonne omise par le client) : les lignes sans date
+viennent en dernier, triées par id, et une date NULL est encodée ``null`` dans le
+curseur.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(date_value: Any, row_id: Any) -> str:
+    if isinstance(date_value, datetime):
+        date_value = date_value.isoformat()
+    raw = json.dumps([None if date_value is None else str(date_value), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Optional[str], str]:
+    """(date ISO ou None, id) ; 400 si le curseur n'a pas été produit par l'API."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date_value, row_id = json.loads(raw)
+        if date_value is not None:
+            datetime.fromisoformat(date_value)
+            date_value = str(date_value)
+        UUID(row_id)
+        return date_value, str(row_id)
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+async def keyset_page(
+    build: Callable[[], Any],
+    date_col: str,
+    id_col: str,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    with_nulls: bool = True,
+) -> list[dict[str, Any]]:
+    """
+    Page PostgREST triée par (date NULLS LAST, id) DESC.
+
+    ``build`` retourne la requête filtrée (select + filtres), reconstruite pour chaque
+    appel. Avec un curseur daté, le filtre ``date < d OR (date = d AND id < i)`` borne
+    l'index (id_utilisateur, date DESC NULLS LAST, id DESC) ; les lignes sans date ne
+    sont demandées (``date=is.null``, tri par id) que si la page est incomplète.
+    ``with_nulls=False`` quand un filtre de dates exclut déjà les lignes sans date.
+    """
+    if not cursor:
+        query = build().order(f"{date_col}.desc.nullslast,{id_col}", desc=True)
+        return (await query.range(skip, skip + limit - 1).execute()).data
+
+    date_value, row_id = decode_cursor(cursor)
+    rows: list[dict[str, Any]] = []
+    if date_value is not None:
+        query = build()
+        # postgrest-py 0.13 n'expose pas or_() : paramètre ``or`` ajouté directement
+        query.params = query.params.add(
+            "or", f'({date_col}.lt."{date_value}",and({date_col}.eq."{date_value}",{id_col}.lt.{row_id}))'
+        )
+        # Un seul paramètre ``order=date.desc.nullslast,id.desc`` (PostgREST n'en lit qu'un)
+        query = query.order(f"{date_col}.desc.nullslast,{id_col}", desc=True)
+        rows = (await query.limit(limit).execute()).data
+        if len(rows) == limit or not with_nulls:
+            return rows
+        nulls = build().is_(date_col, "null")
+    else:
+        # Après une ligne sans date : reste des lignes sans date
+        nulls = build().is_(date_col, "null").lt(id_col, row_id)
+    return rows + (await nulls.order(id_col, desc=True).limit(limit - len(rows)).execute()).data
+
+
+def set_next_cursor(
+    response: Response, rows: list[dict[str, Any]], date_col: str, id_col: str, limit: int
+) -> None:
+    """Ajoute l'en-tête ``X-Next-Cursor`` si la page est pleine (il peut rester des lignes)."""
+    if len(rows) == limit and rows:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last[date_col], last[id_col])
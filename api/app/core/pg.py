@@ -0,0 +1,138 @@
+"""
+Accès PostgreSQL direct (asyncpg) pour les lectures fréquentes.
+
+Optionnel : activé par ``DIRECT_DB_READS=true``. Le pool est ouvert dans le lifespan
+FastAPI à partir de ``DATABASE_URL`` ; tant qu'il n'est pas ouvert (désactivé, ou
+échec de connexion au démarrage), les routers continuent de passer par PostgREST.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Timing:
+    """Compteur de durées (nombre, total, max) — suffisant pour un export de métriques."""
+
+    __slots__ = ("count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def as_dict(self) -> dict[str, float]:
+        avg = self.total_ms / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "avg_ms": round(avg, 3),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+async def _init_connection(conn) -> None:
+    """numeric → float et json/jsonb → objets Python, comme les réponses PostgREST."""
+    await conn.set_type_codec(
+        "numeric", encoder=str, decoder=float, schema="pg_catalog", format="text"
+    )
+    for typename in ("json", "jsonb"):
+        await conn.set_type_codec(
+            typename, encoder=json.dumps, decoder=json.loads, schema="pg_catalog"
+        )
+
+
+class PgPool:
+    """Pool asyncpg partagé + métriques (taille, attente d'acquisition, latence)."""
+
+    def __init__(self) -> None:
+        self._pool = None
+        self.acquire_wait = _Timing()
+        self.query_latency = _Timing()
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._pool is not None
+
+    async def open(self) -> None:
+        if self._pool is not None:
+            return
+        try:
+            import asyncpg
+        except ImportError:
+            logger.warning("DIRECT_DB_READS activé mais asyncpg n'est pas installé : lectures via PostgREST")
+            return
+        try:
+            self._pool = await asyncpg.create_pool(
+                settings.DATABASE_URL,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                command_timeout=settings.DB_COMMAND_TIMEOUT,
+                init=_init_connection,
+            )
+            logger.info(
+                "Pool PostgreSQL ouvert (min=%d, max=%d)",
+                settings.DB_POOL_MIN_SIZE,
+                settings.DB_POOL_MAX_SIZE,
+            )
+        except Exception as e:
+            logger.warning("Connexion PostgreSQL directe impossible, lectures via PostgREST : %s", e)
+            self._pool = None
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[Any]:
+        t0 = time.perf_counter()
+        async with self._pool.acquire(timeout=settings.DB_ACQUIRE_TIMEOUT) as conn:
+            self.acquire_wait.observe((time.perf_counter() - t0) * 1000)
+            yield conn
+
+    async def fetch(self, sql: str, *args: Any) -> list[dict[str, Any]]:
+        async with self._connection() as conn:
+            t0 = time.perf_counter()
+            try:
+                rows = await conn.fetch(sql, *args)
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.query_latency.observe((time.perf_counter() - t0) * 1000)
+        return [dict(r) for r in rows]
+
+    async def fetchrow(self, sql: str, *args: Any) -> Optional[dict[str, Any]]:
+        rows = await self.fetch(sql, *args)
+        return rows[0] if rows else None
+
+    def stats(self) -> dict[str, Any]:
+        pool = self._pool
+        return {
+            "enabled": pool is not None,
+            "size": pool.get_size() if pool else 0,
+            "idle": pool.get_idle_size() if pool else 0,
+            "min_size": settings.DB_POOL_MIN_SIZE,
+            "max_size": settings.DB_POOL_MAX_SIZE,
+            "acquire_wait": self.acquire_wait.as_dict(),
+            "query_latency": self.query_latency.as_dict(),
+            "errors": self.errors,
+        }
+
+
+pg_pool = PgPool()
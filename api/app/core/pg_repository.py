@@ -0,0 +1,260 @@
+"""
+Lectures SQL directes (pool asyncpg) équivalentes aux SELECT PostgREST des routers.
+
+Utilisées par les endpoints liste / détail de journal, mesures, sessions, aliments et
+exercices lorsque ``pg_pool.enabled``. Les noms de tables et de colonnes sont des
+constantes des routers, jamais des valeurs issues de la requête HTTP.
+"""
+
+from datetime import date, datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from app.core.pagination import decode_cursor
+from app.core.pg import pg_pool
+
+# Même projection que le select PostgREST
+# "*, session_exercices(id_exercice, ..., exercices(nom))"
+_SESSIONS_SELECT = """
+SELECT s.*,
+       COALESCE((
+           SELECT json_agg(json_build_object(
+               'id_exercice', se.id_exercice,
+               'nombre_series', se.nombre_series,
+               'nombre_repetitions', se.nombre_repetitions,
+               'poids', se.poids,
+               'duree', se.duree,
+               'exercices', json_build_object('nom', e.nom)
+           ))
+           FROM session_exercices se
+           LEFT JOIN exercices e ON e.id_exercice = se.id_exercice
+           WHERE se.id_session = s.id_session
+       ), '[]'::json) AS session_exercices
+FROM sessions_sport s
+"""
+
+
+class _Where:
+    """Accumule des conditions SQL avec paramètres positionnels ($1, $2, …)."""
+
+    def __init__(self) -> None:
+        self.clauses: list[str] = []
+        self.args: list[Any] = []
+
+    def add(self, clause: str, value: Any) -> None:
+        self.args.append(value)
+        self.clauses.append(clause.format(f"${len(self.args)}"))
+
+    def param(self, value: Any) -> str:
+        self.args.append(value)
+        return f"${len(self.args)}"
+
+    def sql(self) -> str:
+        return f" WHERE {' AND '.join(self.clauses)}" if self.clauses else ""
+
+
+def _user_where(
+    date_col: str,
+    utilisateur_id: Optional[UUID],
+    date_debut: Optional[date],
+    date_fin: Optional[date],
+) -> _Where:
+    where = _Where()
+    if utilisateur_id:
+        where.add("id_utilisateur = {}", utilisateur_id)
+    if date_debut:
+        where.add(f"{date_col} >= {{}}::date", date_debut)
+    if date_fin:
+        where.add(f"{date_col} <= {{}}::date", date_fin)
+    return where
+
+
+async def _user_page(
+    select: str,
+    date_col: str,
+    id_col: str,
+    utilisateur_id: Optional[UUID],
+    date_debut: Optional[date],
+    date_fin: Optional[date],
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+) -> list[dict[str, Any]]:
+    """
+    Page triée par (date NULLS LAST, id) DESC ; OFFSET seulement sans curseur.
+
+    Avec un curseur daté, la comparaison de lignes ``(date, id) < (d, i)`` est une
+    borne de l'index (id_utilisateur, date DESC NULLS LAST, id DESC) : pas de parcours
+    des pages précédentes. Les lignes sans date (fin du tri) ne sont lues, par une
+    seconde requête, que si cette page est incomplète.
+    """
+    where = _user_where(date_col, utilisateur_id, date_debut, date_fin)
+    if not cursor:
+        sql = (
+            f"{select}{where.sql()} ORDER BY {date_col} DESC NULLS LAST, {id_col} DESC"
+            f" LIMIT {where.param(limit)} OFFSET {where.param(skip)}"
+        )
+        return await pg_pool.fetch(sql, *where.args)
+
+    date_value, row_id = decode_cursor(cursor)
+    rows: list[dict[str, Any]] = []
+    if date_value is not None:
+        dated = _user_where(date_col, utilisateur_id, date_debut, date_fin)
+        d, i = dated.param(datetime.fromisoformat(date_value)), dated.param(UUID(row_id))
+        dated.clauses.append(f"({date_col}, {id_col}) < ({d}, {i})")
+        sql = f"{select}{dated.sql()} ORDER BY {date_col} DESC NULLS LAST, {id_col} DESC LIMIT {dated.param(limit)}"
+        rows = list(await pg_pool.fetch(sql, *dated.args))
+        # Filtre de dates : aucune ligne sans date ne peut suivre
+        if len(rows) == limit or date_debut or date_fin:
+            return rows
+        where.clauses.append(f"{date_col} IS NULL")
+    else:
+        # Après une ligne sans date : reste des lignes sans date
+        where.clauses.append(f"{date_col} IS NULL AND {id_col} < {where.param(UUID(row_id))}")
+    sql = f"{select}{where.sql()} ORDER BY {id_col} DESC LIMIT {where.param(limit - len(rows))}"
+    return rows + list(await pg_pool.fetch(sql, *where.args))
+
+
+async def list_user_rows(
+    table: str,
+    date_col: str,
+    id_col: str,
+    utilisateur_id: Optional[UUID],
+    date_debut: Optional[date],
+    date_fin: Optional[date],
+    skip: int,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """Lignes d'une table rattachée à un utilisateur, triées par date décroissante."""
+    return await _user_page(
+        f"SELECT * FROM {table}", date_col, id_col, utilisateur_id, date_debut, date_fin, skip, limit, cursor
+    )
+
+
+async def metric_series(
+    metric: str,
+    utilisateur_id: UUID,
+    date_debut: Optional[date],
+    date_fin: Optional[date],
+) -> list[dict[str, Any]]:
+    """(date_mesure, valeur) d'une métrique, triées par date croissante (valeurs NULL exclues)."""
+    where = _user_where("date_mesure", utilisateur_id, date_debut, date_fin)
+    where.clauses.append(f"{metric} IS NOT NULL")
+    return await pg_pool.fetch(
+        f"SELECT date_mesure, {metric} AS valeur FROM mesures_biometriques{where.sql()} ORDER BY date_mesure",
+        *where.args,
+    )
+
+
+async def get_row(table: str, id_col: str, row_id: UUID) -> Optional[dict[str, Any]]:
+    return await pg_pool.fetchrow(f"SELECT * FROM {table} WHERE {id_col} = $1", row_id)
+
+
+async def existing_ids(table: str, id_col: str, ids: list[UUID]) -> set[str]:
+    """Sous-ensemble de ``ids`` présent dans ``table`` (une requête)."""
+    rows = await pg_pool.fetch(f"SELECT {id_col} FROM {table} WHERE {id_col} = ANY($1::uuid[])", ids)
+    return {str(r[id_col]) for r in rows}
+
+
+async def list_sessions(
+    utilisateur_id: Optional[UUID],
+    date_debut: Optional[date],
+    date_fin: Optional[date],
+    skip: int,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    return await _user_page(
+        _SESSIONS_SELECT, "s.date_session", "s.id_session", utilisateur_id, date_debut, date_fin, skip, limit, cursor
+    )
+
+
+async def get_session(session_id: UUID) -> Optional[dict[str, Any]]:
+    return await pg_pool.fetchrow(f"{_SESSIONS_SELECT} WHERE s.id_session = $1", session_id)
+
+
+async def list_catalog(
+    table: str,
+    filters: dict[str, Optional[str]],
+    search: Optional[str],
+    skip: int,
+    limit: int,
+) -> list[dict[str, Any]]:
+    """Catalogue (aliments / exercices) : filtres d'égalité + recherche ILIKE sur le nom."""
+    where = _Where()
+    for col, value in filters.items():
+        if value:
+            where.add(f"{col} = {{}}", value)
+    if search:
+        where.add("nom ILIKE {}", f"%{search}%")
+    sql = (
+        f"SELECT * FROM {table}{where.sql()} ORDER BY nom"
+        f" LIMIT {where.param(limit)} OFFSET {where.param(skip)}"
+    )
+    return await pg_pool.fetch(sql, *where.args)
+
+
+async def suggest_catalog(function: str, prefix: str, limit: int) -> list[dict[str, Any]]:
+    """Autocomplétion sans instantané (fonctions SQL ``suggerer_*``) : un mot commence par ``prefix``."""
+    return await pg_pool.fetch(f"SELECT * FROM {function}($1, $2)", prefix, limit)
+
+
+async def nutrition_summary(
+    utilisateur_id: Optional[UUID],
+    granularity: str,
+    date_debut: Optional[date],
+    date_fin: Optional[date],
+) -> list[dict[str, Any]]:
+    """Bilan nutritionnel par période (fonction SQL ``resume_nutrition``)."""
+    return await pg_pool.fetch(
+        "SELECT * FROM resume_nutrition($1, $2, $3, $4)", utilisateur_id, granularity, date_debut, date_fin
+    )
+
+
+async def rollup_summary(
+    function: str,
+    utilisateur_id: Optional[UUID],
+    granularity: str,
+    date_debut: Optional[date],
+    date_fin: Optional[date],
+) -> list[dict[str, Any]]:
+    """Bilan par période lu dans les cumuls journaliers (``resume_entrainement``, ``resume_biometrie``)."""
+    return await pg_pool.fetch(
+        f"SELECT * FROM {function}($1, $2, $3, $4)", utilisateur_id, granularity, date_debut, date_fin
+    )
+
+
+async def platform_stats(
+    tables: tuple[tuple[str, str], ...],
+    types_abonnement: tuple[str, ...],
+    activite: tuple[str, ...],
+    depuis: date,
+) -> dict[str, int]:
+    """Compteurs du tableau de bord en un seul aller-retour (sous-requêtes count(*)).
+
+    ``tables`` : (clé, table) ; les abonnements sont comptés sous ``abo:<type>`` et
+    l'activité depuis ``depuis`` (cumuls journaliers, colonnes ``activite``) sous ``7j:<clé>``.
+    """
+    where = _Where()
+    parts = [f"(SELECT count(*) FROM {table}) AS \"{key}\"" for key, table in tables]
+    parts += [
+        f"(SELECT count(*) FROM utilisateurs WHERE type_abonnement = {where.param(t)}) AS \"abo:{t}\""
+        for t in types_abonnement
+    ]
+    parts += [f"a.{key} AS \"7j:{key}\"" for key in activite]
+    sql = f"SELECT {', '.join(parts)} FROM activite_recente({where.param(depuis)}) a"
+    return dict(await pg_pool.fetchrow(sql, *where.args))
+
+
+async def search_catalog(
+    function: str,
+    args: dict[str, Optional[str]],
+    skip: int,
+    limit: int,
+) -> list[dict[str, Any]]:
+    """Recherche classée par similarité via les fonctions SQL ``rechercher_*`` (index trigrammes)."""
+    where = _Where()
+    named = [f"{name} => {where.param(value)}" for name, value in args.items()]
+    named += [f"p_limit => {where.param(limit)}", f"p_offset => {where.param(skip)}"]
+    return await pg_pool.fetch(f"SELECT * FROM {function}({', '.join(named)})", *where.args)
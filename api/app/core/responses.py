@@ -0,0 +1,61 @@
+"""
+Sérialisation JSON rapide des réponses de l'API.
+
+Avec ``response_model``, FastAPI valide le résultat, le reconvertit en objets Python
+(``jsonable_encoder``) puis appelle ``json.dumps`` ; l'ETag de contenu refaisait
+ensuite le même travail. Les listes passent ici par un ``TypeAdapter`` construit une
+fois par schéma : validation et écriture JSON en une passe dans pydantic-core,
+puis ETag calculé sur les octets produits. ``response_model`` reste déclaré sur les
+routes pour la documentation OpenAPI. Les autres réponses utilisent ``ORJSONResponse``
+(classe par défaut de l'application).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.http_cache import USER_DATA_CACHE_CONTROL, bytes_etag, conditional
+
+
+class JsonAdapter:
+    """``TypeAdapter`` pré-construit : lignes → JSON validé selon le schéma (champs en trop ignorés)."""
+
+    def __init__(self, type_: Any) -> None:
+        self._adapter = TypeAdapter(type_)
+
+    def dump(self, data: Any) -> bytes:
+        return self._adapter.dump_json(self._adapter.validate_python(data))
+
+
+def json_response(body: bytes, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """Réponse JSON déjà sérialisée ; reprend les en-têtes posés sur ``response`` (ETag, curseur…)."""
+    headers = {}
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def cached_json(
+    request: Request,
+    response: Response,
+    adapter: JsonAdapter,
+    data: Any,
+    etag: Optional[str] = None,
+    cache_control: str = USER_DATA_CACHE_CONTROL,
+) -> Response:
+    """Réponse conditionnelle : 304 si ``If-None-Match`` correspond, sinon le JSON sérialisé.
+
+    ``etag`` connu d'avance (version d'un instantané) : un 304 ne sérialise rien.
+    Sinon l'ETag est l'empreinte des octets produits.
+    """
+    body = None
+    if etag is None:
+        body = adapter.dump(data)
+        etag = bytes_etag(body)
+    not_modified = conditional(request, response, etag, cache_control)
+    if not_modified is not None:
+        return not_modified
+    return json_response(body if body is not None else adapter.dump(data), response)
@@ -5,93 +5,81 @@ Utilitaires de sécurité : vérification JWT Supabase
 
 from __future__ import annotations
 
-import json
+import hashlib
 import time
-import urllib.error
-import urllib.request
-from typing import Any, Optional
 
 from fastapi import HTTPException, status
 from jose import JWTError, jwk, jwt
 
+from app.core.cache import MISSING, TTLCache
 from app.core.config import settings
+from app.core.jwks import JwksUnavailable, jwks_store
 
-# Cache JWKS (rotation rare ; invalidé si kid introuvable)
-_jwks_cache: Optional[tuple[float, dict[str, Any]]] = None
-JWKS_TTL_SEC = 300
+# Claims des tokens déjà vérifiés, par empreinte SHA-256 du token
+token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_MAX_TTL
+)
 
 
-def _invalidate_jwks_cache() -> None:
-    global _jwks_cache
-    _jwks_cache = None
-
-
-def _jwks_url() -> str:
-    return f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
-
-
-def _fetch_jwks() -> dict[str, Any]:
-    global _jwks_cache
-    now = time.time()
-    if _jwks_cache is not None and now - _jwks_cache[0] < JWKS_TTL_SEC:
-        return _jwks_cache[1]
+async def _decode_es256(token: str) -> dict:
+    header = jwt.get_unverified_header(token)
+    kid = header.get("kid")
+    if not kid:
+        raise JWTError("JWT ES256 sans kid")
     try:
-        req = urllib.request.Request(_jwks_url(), method="GET")
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            data = json.loads(resp.read().decode())
-    except (urllib.error.URLError, TimeoutError, json.JSONDecodeError) as e:
+        raw = await jwks_store.get_key(kid)
+    except JwksUnavailable as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Impossible de charger les clés JWT Supabase (JWKS) : {e}",
         ) from e
-    _jwks_cache = (now, data)
-    return data
-
-
-def _decode_es256(token: str) -> dict:
-    header = jwt.get_unverified_header(token)
-    kid = header.get("kid")
-    if not kid:
-        raise JWTError("JWT ES256 sans kid")
-
-    def _try_with(jwks_data: dict[str, Any]) -> Optional[dict]:
-        raw = next((k for k in jwks_data.get("keys", []) if k.get("kid") == kid), None)
-        if not raw:
-            return None
-        pub = jwk.construct(raw)
-        return jwt.decode(
-            token,
-            pub,
-            algorithms=["ES256"],
-            options={"verify_aud": False},
-        )
-
-    jwks_data = _fetch_jwks()
-    payload = _try_with(jwks_data)
-    if payload is None:
-        _invalidate_jwks_cache()
-        payload = _try_with(_fetch_jwks())
-    if payload is None:
+    if raw is None:
         raise JWTError(f"Aucune clé JWKS pour kid={kid}")
-    return payload
+    return jwt.decode(
+        token,
+        jwk.construct(raw),
+        algorithms=["ES256"],
+        options={"verify_aud": False},
+    )
 
 
-def verify_token(token: str) -> dict:
+async def _decode_token(token: str) -> dict:
+    """Vérification complète (en-tête + signature), sans cache."""
+    header = jwt.get_unverified_header(token)
+    alg = header.get("alg") or "HS256"
+    if alg == "ES256":
+        return await _decode_es256(token)
+    return jwt.decode(
+        token,
+        settings.JWT_SECRET,
+        algorithms=[settings.JWT_ALGORITHM],
+        options={"verify_aud": False},
+    )
+
+
+def _cache_ttl(payload: dict) -> float:
+    """Durée de cache : jusqu'à l'exp du token, plafonnée à TOKEN_CACHE_MAX_TTL."""
+    exp = payload.get("exp")
+    if exp is None:
+        return settings.TOKEN_CACHE_MAX_TTL
+    return min(float(exp) - time.time(), settings.TOKEN_CACHE_MAX_TTL)
+
+
+async def verify_token(token: str) -> dict:
     """Vérifie et décode un token JWT Supabase (ES256 via JWKS ou HS256 via JWT_SECRET)."""
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not MISSING:
+        return dict(cached)
     try:
-        header = jwt.get_unverified_header(token)
-        alg = header.get("alg") or "HS256"
-        if alg == "ES256":
-            return _decode_es256(token)
-        return jwt.decode(
-            token,
-            settings.JWT_SECRET,
-            algorithms=[settings.JWT_ALGORITHM],
-            options={"verify_aud": False},
-        )
+        payload = await _decode_token(token)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token invalide ou expiré",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    ttl = _cache_ttl(payload)
+    if ttl > 0 and token_cache.maxsize > 0:
+        token_cache.set(key, dict(payload), ttl=ttl)
+    return payload
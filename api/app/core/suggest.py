@@ -0,0 +1,58 @@
+"""
+Index de préfixes pour l'autocomplétion (aliments, exercices).
+
+Tableau trié de clés normalisées (minuscules, sans accents) : le nom complet et
+chaque mot à partir du deuxième, pour que « blanc » propose « Poulet blanc ». Une
+recherche = un ``bisect`` puis le parcours des clés qui commencent par le préfixe ;
+les ``k`` meilleurs résultats sont choisis par popularité (nombre d'utilisations
+dans le journal / les sessions), puis par nom.
+"""
+
+from __future__ import annotations
+
+import heapq
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Iterable
+
+
+def normalize(text: str) -> str:
+    """Minuscules sans accents (« Haltères » → « halteres »)."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class PrefixIndex:
+    """Index immuable : reconstruit en bloc à chaque rechargement du catalogue."""
+
+    def __init__(self, rows: Iterable[dict[str, Any]], id_col: str, popularity: dict[str, int]) -> None:
+        self._entries: dict[str, tuple[int, str]] = {}
+        pairs: list[tuple[str, str]] = []
+        for row in rows:
+            row_id = str(row[id_col])
+            nom = row.get("nom") or ""
+            self._entries[row_id] = (popularity.get(row_id, 0), nom)
+            words = normalize(nom).split()
+            pairs.extend((" ".join(words[i:]), row_id) for i in range(len(words)))
+        pairs.sort()
+        self._keys = [k for k, _ in pairs]
+        self._ids = [i for _, i in pairs]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(self, prefix: str, k: int) -> list[dict[str, Any]]:
+        """Top ``k`` des noms dont un mot commence par ``prefix`` (popularité, puis nom)."""
+        needle = normalize(prefix).strip()
+        if not needle:
+            return []
+        start = bisect_left(self._keys, needle)
+        matched: set[str] = set()
+        for pos in range(start, len(self._keys)):
+            if not self._keys[pos].startswith(needle):
+                break
+            matched.add(self._ids[pos])
+        best = heapq.nsmallest(
+            k, matched, key=lambda i: (-self._entries[i][0], self._entries[i][1])
+        )
+        return [{"id": i, "nom": self._entries[i][1], "popularite": self._entries[i][0]} for i in best]
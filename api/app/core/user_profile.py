@@ -5,10 +5,17 @@ Profil application (rôle, abonnement) lié à la table utilisateurs.
 import logging
 from typing import Any, Optional
 
+from app.core.cache import MISSING, TTLCache
+from app.core.config import get_admin_email_set, settings
 from app.core.database import supabase_admin
 
 logger = logging.getLogger(__name__)
 
+# Profils résolus (après bootstrap admin) par sub Supabase Auth ; None = aucun profil.
+profile_cache = TTLCache(
+    maxsize=settings.PROFILE_CACHE_SIZE, ttl=settings.PROFILE_CACHE_TTL
+)
+
 _COLS_FULL = (
     "id_utilisateur,email,app_role,type_abonnement,auth_id,"
     "nom,prenom,age,sexe,poids,taille,objectifs"
@@ -16,9 +23,9 @@ _COLS_FULL = (
 _COLS_MIN = "id_utilisateur,email,app_role,type_abonnement,auth_id"
 
 
-def _fetch_row(cols: str, field: str, value: str) -> Optional[dict[str, Any]]:
+async def _fetch_row(cols: str, field: str, value: str) -> Optional[dict[str, Any]]:
     try:
-        r = (
+        r = await (
             supabase_admin.table("utilisateurs")
             .select(cols)
             .eq(field, value)
@@ -33,27 +40,27 @@ def _fetch_row(cols: str, field: str, value: str) -> Optional[dict[str, Any]]:
     return None
 
 
-def fetch_app_profile(auth_id: str, email: str) -> Optional[dict[str, Any]]:
+async def fetch_app_profile(auth_id: str, email: str) -> Optional[dict[str, Any]]:
     """
     Récupère la ligne utilisateurs liée à auth (auth_id) ou, à défaut, à l'email
     (liaison rétroactive de comptes créés avant auth_id).
     """
-    row = _fetch_row(_COLS_FULL, "auth_id", auth_id)
+    row = await _fetch_row(_COLS_FULL, "auth_id", auth_id)
     if row is None:
-        row = _fetch_row(_COLS_MIN, "auth_id", auth_id)
+        row = await _fetch_row(_COLS_MIN, "auth_id", auth_id)
     if row:
         return row
 
     if not email:
         return None
-    row = _fetch_row(_COLS_FULL, "email", email)
+    row = await _fetch_row(_COLS_FULL, "email", email)
     if row is None:
-        row = _fetch_row(_COLS_MIN, "email", email)
+        row = await _fetch_row(_COLS_MIN, "email", email)
     if not row:
         return None
     if not row.get("auth_id"):
         try:
-            supabase_admin.table("utilisateurs").update({"auth_id": auth_id}).eq(
+            await supabase_admin.table("utilisateurs").update({"auth_id": auth_id}).eq(
                 "id_utilisateur", str(row["id_utilisateur"])
             ).execute()
         except Exception:
@@ -62,7 +69,7 @@ def fetch_app_profile(auth_id: str, email: str) -> Optional[dict[str, Any]]:
     return row
 
 
-def apply_admin_bootstrap(
+async def apply_admin_bootstrap(
     email: str, row: dict, admin_emails: list[str]
 ) -> dict[str, Any]:
     """Si l'email est listé en ADMIN, assure app_role=admin côté base."""
@@ -73,10 +80,44 @@ def apply_admin_bootstrap(
     if str(row.get("app_role", "user")) == "admin":
         return row
     try:
-        supabase_admin.table("utilisateurs").update({"app_role": "admin"}).eq(
+        await supabase_admin.table("utilisateurs").update({"app_role": "admin"}).eq(
             "id_utilisateur", str(row["id_utilisateur"])
         ).execute()
         row["app_role"] = "admin"
     except Exception:
         pass
     return row
+
+
+async def get_app_profile(auth_id: str, email: str) -> Optional[dict[str, Any]]:
+    """
+    fetch_app_profile + apply_admin_bootstrap, mis en cache par auth_id (sub).
+    L'absence de profil est aussi mise en cache, avec une durée plus courte, pour
+    qu'un compte tout juste relié (trigger, création admin) soit vu rapidement.
+    """
+    cached = profile_cache.get(auth_id)
+    if cached is not MISSING:
+        return dict(cached) if cached is not None else None
+    prof = await fetch_app_profile(auth_id, email)
+    if not prof:
+        profile_cache.set(auth_id, None, ttl=settings.PROFILE_CACHE_NEGATIVE_TTL)
+        return None
+    prof = await apply_admin_bootstrap(email, prof, get_admin_email_set())
+    profile_cache.set(auth_id, dict(prof))
+    return prof
+
+
+def invalidate_profile(auth_id: str) -> None:
+    profile_cache.pop(auth_id)
+
+
+def invalidate_utilisateur(id_utilisateur: str) -> None:
+    """Après modification / suppression d'une ligne utilisateurs par un admin."""
+    profile_cache.discard_where(
+        lambda p: p is not None and str(p.get("id_utilisateur")) == id_utilisateur
+    )
+
+
+def invalidate_missing_profiles() -> None:
+    """Après création d'un utilisateur : un compte sans profil peut désormais en avoir un."""
+    profile_cache.discard_where(lambda p: p is None)
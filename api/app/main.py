@@ -3,17 +3,46 @@ Application FastAPI principale pour le projet MSPR
 Domaine : Santé connectée et coaching personnalisé
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
+from app.core.catalog import start_catalogs, stop_catalogs
+from app.core.compression import CompressionMiddleware
+from app.core.database import close_supabase
+from app.core.jwks import jwks_store
+from app.core import metrics
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.pg import pg_pool
 from app.api.v1.api import api_router
+from app.api.v1.deps import require_ops
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Démarrage / arrêt : JWKS, pool PostgreSQL optionnel, catalogues, libération des connexions."""
+    await jwks_store.start()
+    if settings.DIRECT_DB_READS:
+        await pg_pool.open()
+    if settings.CATALOG_CACHE:
+        await start_catalogs()
+    yield
+    await stop_catalogs()
+    await jwks_store.stop()
+    await pg_pool.close()
+    await close_supabase()
+
 
 app = FastAPI(
     title="MSPR API - Santé Connectée",
     description="API pour la gestion de la santé connectée et du coaching personnalisé",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configuration CORS
@@ -23,8 +52,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Compression gzip / brotli (négociée par Accept-Encoding, seuil COMPRESSION_MIN_SIZE)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        encodings=tuple(settings.COMPRESSION_ENCODINGS),
+    )
+
+# Durée par route et requêtes en cours (le plus à l'extérieur : compression comprise)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 # Inclusion des routes API
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -43,3 +87,9 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_ops)])
+async def prometheus_metrics():
+    """Métriques du worker au format texte Prometheus (jeton METRICS_TOKEN ou compte admin)."""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -4,7 +4,7 @@ Schémas Pydantic pour le journal alimentaire
 
 from pydantic import BaseModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 
 
@@ -35,3 +35,14 @@ class JournalAlimentaireRead(JournalAlimentaireBase):
 
     class Config:
         from_attributes = True
+
+
+class JournalSummaryRead(BaseModel):
+    """Apports nutritionnels d'une période (jour, semaine ou mois), quantités en grammes"""
+    periode: date
+    calories: float
+    proteines: float
+    glucides: float
+    lipides: float
+    fibres: float
+    nb_entrees: int
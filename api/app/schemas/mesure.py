@@ -3,8 +3,8 @@ Schémas Pydantic pour les mesures biométriques
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 from uuid import UUID
 
 
@@ -39,3 +39,26 @@ class MesureBiometriqueRead(MesureBiometriqueBase):
 
     class Config:
         from_attributes = True
+
+
+class SeriesPoint(BaseModel):
+    """Point d'une série temporelle"""
+    date: datetime
+    valeur: float
+
+
+class MesureSeriesRead(BaseModel):
+    """Série d'une métrique, sous-échantillonnée à ``points`` valeurs au plus"""
+    metric: str
+    total: int  # nombre de mesures brutes sur la période
+    points: List[SeriesPoint]
+
+
+class MesureSummaryRead(BaseModel):
+    """Mesures d'une période (jour, semaine ou mois) ; moyennes nulles sans valeur saisie"""
+    periode: date
+    nb_mesures: int
+    poids_moyen: Optional[float] = None
+    frequence_cardiaque_moyenne: Optional[float] = None
+    sommeil_moyen: Optional[float] = None
+    calories_brulees: float
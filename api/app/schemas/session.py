@@ -4,7 +4,7 @@ Schémas Pydantic pour les sessions sport
 
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 
 
@@ -59,3 +59,10 @@ class SessionSportRead(SessionSportBase):
 
     class Config:
         from_attributes = True
+
+
+class SessionSummaryRead(BaseModel):
+    """Entraînement d'une période (jour, semaine ou mois)"""
+    periode: date
+    nb_sessions: int
+    duree_totale: int  # en minutes
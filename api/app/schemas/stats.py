@@ -0,0 +1,27 @@
+"""
+Schémas Pydantic pour les statistiques agrégées (tableau de bord analytics)
+"""
+
+from datetime import datetime
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class StatsCounts(BaseModel):
+    """Nombre de lignes par ressource"""
+    utilisateurs: int
+    aliments: int
+    exercices: int
+    mesures: int
+    journal: int
+    sessions: int
+
+
+class StatsRead(BaseModel):
+    """Compteurs et agrégats de la plateforme, en une seule réponse"""
+    counts: StatsCounts
+    abonnements: Dict[str, int]
+    activite_7j: Dict[str, int]
+    count_method: str
+    generated_at: datetime
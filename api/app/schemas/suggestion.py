@@ -0,0 +1,14 @@
+"""
+Schéma Pydantic pour l'autocomplétion des catalogues (aliments, exercices)
+"""
+
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class SuggestionRead(BaseModel):
+    """Proposition d'autocomplétion, classée par popularité"""
+    id: UUID
+    nom: str
+    popularite: int = 0
@@ -0,0 +1,125 @@
+"""
+Benchmark : débit de chargement ETL (lignes/s) selon le nombre de lots en vol.
+
+Un faux PostgREST local (``http.server`` multi-thread) répond à chaque POST après
+``--delay-ms`` + ``--row-us`` par ligne reçue (décodage JSON compris), ce qui
+imite la latence réseau et le coût d'écriture côté base. ``SupabaseLoader`` y
+envoie un DataFrame synthétique d'aliments :
+  - ``insert`` : ``load_dataframe`` ;
+  - ``upsert`` : ``upsert_dataframe``.
+Les lots sont dimensionnés en octets (``etl/batching.py``) : la colonne « lots »
+donne les tailles min-max retenues.
+``--concurrency 1`` correspond au mode séquentiel historique.
+
+Usage :
+    python benchmarks/bench_etl_load.py
+    python benchmarks/bench_etl_load.py --rows 20000 --delay-ms 40 --concurrency 1 2 4 8
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "etl"))
+
+
+def _start_fake_postgrest(delay_s: float, row_s: float) -> ThreadingHTTPServer:
+    stats = {"requests": 0, "rows": 0, "in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            rows = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"[]")
+            with lock:
+                stats["requests"] += 1
+                stats["rows"] += len(rows)
+                stats["in_flight"] += 1
+                stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            time.sleep(delay_s + row_s * len(rows))
+            with lock:
+                stats["in_flight"] -= 1
+            body = b"[]"
+            self.send_response(201)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 256
+
+    server = Server(("127.0.0.1", 0), Handler)
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _dataframe(rows: int):
+    import pandas as pd
+
+    return pd.DataFrame({
+        "nom": [f"Aliment {i}" for i in range(rows)],
+        "calories": [52.0 + i % 300 for i in range(rows)],
+        "proteines": 0.3,
+        "glucides": 14.0,
+        "lipides": 0.2,
+        "fibres": 2.4,
+        "unite": "100g",
+        "source": "bench",
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="latence fixe par requête")
+    parser.add_argument("--row-us", type=float, default=20.0, help="coût serveur par ligne (µs)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    server = _start_fake_postgrest(args.delay_ms / 1000, args.row_us / 1e6)
+    os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["SUPABASE_SERVICE_KEY"] = "bench.bench.bench"
+    logging.disable(logging.INFO)  # une ligne de log par lot sinon
+
+    from load import SupabaseLoader
+
+    df = _dataframe(args.rows)
+    print(f"{'mode':<7} {'en vol':>6} {'durée s':>8} {'lignes/s':>10} {'requêtes':>9} {'max serveur':>11} {'lots':>10}")
+    for mode in ("insert", "upsert"):
+        baseline = None
+        for concurrency in args.concurrency:
+            loader = SupabaseLoader(concurrency=concurrency)
+            server.stats.update(requests=0, rows=0, max_in_flight=0)
+            t0 = time.perf_counter()
+            ok = (
+                loader.load_dataframe(df, "aliments") if mode == "insert"
+                else loader.upsert_dataframe(df, "aliments", on_conflict="nom")
+            )
+            elapsed = time.perf_counter() - t0
+            assert ok and server.stats["rows"] == args.rows, server.stats
+            rate = args.rows / elapsed
+            baseline = baseline or rate
+            sizes = loader.batch_log[-1]
+            print(
+                f"{mode:<7} {concurrency:>6} {elapsed:>8.2f} {rate:>10.0f} "
+                f"{server.stats['requests']:>9} {server.stats['max_in_flight']:>11} "
+                f"{sizes['min_rows']:>5}-{sizes['max_rows']:<4}   ×{rate / baseline:.1f}"
+            )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Taille des lots d'écriture PostgREST, choisie en octets et ajustée en cours de route.
+
+Une ligne ``utilisateurs`` (tableau ``objectifs``) ou ``exercices`` (``instructions``
+en texte long) pèse jusqu'à dix fois une ligne ``aliments`` : un nombre de lignes
+fixe par lot donne des requêtes de tailles très différentes. Ici :
+
+  - la taille moyenne d'une ligne est estimée sur un échantillon (JSON sérialisé) ;
+  - un lot contient ``budget / taille moyenne`` lignes, borné à [min_rows, max_rows] ;
+  - le budget suit un AIMD, comme une fenêtre de congestion TCP : +``step`` octets
+    après un lot réussi sous la latence cible, ×0,5 après un lot lent ou en erreur.
+
+Un ``AdaptiveBatcher`` par (table, opération) garde son budget d'un appel à l'autre
+pendant une exécution du pipeline. Variables : ``ETL_BATCH_TARGET_BYTES``,
+``ETL_BATCH_TARGET_SECONDS``, ``ETL_BATCH_MAX_ROWS``.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List
+
+_SAMPLE = 100
+
+
+def estimate_row_bytes(records: List[Dict[str, Any]]) -> float:
+    """Taille JSON moyenne d'une ligne, sur un échantillon réparti dans les données."""
+    if not records:
+        return 1.0
+    step = max(1, len(records) // _SAMPLE)
+    sample = records[::step][:_SAMPLE]
+    total = sum(len(json.dumps(r, default=str, ensure_ascii=False).encode("utf-8")) + 1 for r in sample)
+    return max(1.0, total / len(sample))
+
+
+class AdaptiveBatcher:
+    """Budget d'octets par lot piloté en AIMD par la latence et les erreurs observées."""
+
+    def __init__(
+        self,
+        target_bytes: int | None = None,
+        target_seconds: float | None = None,
+        max_rows: int | None = None,
+        min_rows: int = 1,
+    ):
+        self.target_bytes = target_bytes or int(os.getenv("ETL_BATCH_TARGET_BYTES", str(128 * 1024)))
+        self.target_seconds = target_seconds or float(os.getenv("ETL_BATCH_TARGET_SECONDS", "2.0"))
+        self.max_rows = max_rows or int(os.getenv("ETL_BATCH_MAX_ROWS", "5000"))
+        self.min_rows = min_rows
+        self.budget = float(self.target_bytes)
+        self._min_budget = 1024.0
+        self._max_budget = 4.0 * self.target_bytes
+        self._step = self.target_bytes / 8  # croissance additive : +1/8 de la cible par lot réussi
+        self.increases = 0
+        self.decreases = 0
+        self._lock = threading.Lock()  # lots terminés par plusieurs threads (envoi concurrent)
+
+    def rows_for(self, row_bytes: float) -> int:
+        return max(self.min_rows, min(self.max_rows, int(self.budget / row_bytes)))
+
+    def observe(self, seconds: float, ok: bool) -> None:
+        """Résultat d'un lot : augmentation additive, ou diminution multiplicative si lent / en erreur."""
+        with self._lock:
+            if ok and seconds <= self.target_seconds:
+                self.budget = min(self._max_budget, self.budget + self._step)
+                self.increases += 1
+            else:
+                self.budget = max(self._min_budget, self.budget / 2)
+                self.decreases += 1
+
+    def batches(self, records: List[Dict[str, Any]], row_bytes: float,
+                sizes: List[int]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Découpe ``records`` au fil de l'envoi : chaque lot est dimensionné avec le
+        budget du moment. Les tailles retenues sont ajoutées à ``sizes``.
+        """
+        i = 0
+        while i < len(records):
+            n = self.rows_for(row_bytes)
+            sizes.append(min(n, len(records) - i))
+            yield records[i:i + n]
+            i += n
+
+    def summary(self, sizes: List[int], row_bytes: float) -> Dict[str, Any]:
+        """Tailles de lots d'un appel, pour le rapport d'exécution (ajustements cumulés sur la table)."""
+        return {
+            "batches": len(sizes),
+            "avg_row_bytes": round(row_bytes),
+            "first_rows": sizes[0] if sizes else 0,
+            "min_rows": min(sizes, default=0),
+            "max_rows": max(sizes, default=0),
+            "last_rows": sizes[-1] if sizes else 0,
+            "budget_bytes": int(self.budget),
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
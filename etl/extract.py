@@ -74,15 +74,15 @@ def extract_from_api(api_url: str, params: Optional[dict] = None) -> pd.DataFram
         raise
 
 
-def extract_exercises_from_exercisedb(limit: int = 100) -> pd.DataFrame:
+def fetch_exercises_from_exercisedb(limit: int = 100) -> List[dict]:
     """
-    Extract exercises from ExerciseDB API (https://rapidapi.com/justin-WFnsXH_t6/api/exercisedb)
+    Fetch raw exercises from ExerciseDB API (https://rapidapi.com/justin-WFnsXH_t6/api/exercisedb)
     
     Args:
         limit: Maximum number of exercises to extract
         
     Returns:
-        DataFrame with exercises data
+        List of exercise records, as returned by the API
     """
     try:
         import requests
@@ -108,9 +108,8 @@ def extract_exercises_from_exercisedb(limit: int = 100) -> pd.DataFrame:
             if limit and len(exercises) > limit:
                 exercises = exercises[:limit]
             
-            df = pd.DataFrame(exercises)
-            logger.info(f"Extracted {len(df)} exercises from ExerciseDB (public source)")
-            return df
+            logger.info(f"Extracted {len(exercises)} exercises from ExerciseDB (public source)")
+            return exercises
             
         except Exception as e:
             logger.warning(f"Public source failed, trying RapidAPI: {str(e)}")
@@ -119,9 +118,8 @@ def extract_exercises_from_exercisedb(limit: int = 100) -> pd.DataFrame:
                 response = requests.get(base_url, headers=headers, params={"limit": limit}, timeout=30)
                 response.raise_for_status()
                 exercises = response.json()
-                df = pd.DataFrame(exercises)
-                logger.info(f"Extracted {len(df)} exercises from ExerciseDB (RapidAPI)")
-                return df
+                logger.info(f"Extracted {len(exercises)} exercises from ExerciseDB (RapidAPI)")
+                return exercises
             else:
                 raise ValueError("No API key provided and public source unavailable")
                 
@@ -129,3 +127,15 @@ def extract_exercises_from_exercisedb(limit: int = 100) -> pd.DataFrame:
         logger.error(f"Error extracting exercises from ExerciseDB: {str(e)}")
         raise
 
+
+def extract_exercises_from_exercisedb(limit: int = 100) -> pd.DataFrame:
+    """
+    Extract exercises from ExerciseDB API as a DataFrame
+    
+    Args:
+        limit: Maximum number of exercises to extract
+        
+    Returns:
+        DataFrame with exercises data
+    """
+    return pd.DataFrame(fetch_exercises_from_exercisedb(limit))
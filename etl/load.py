@@ -3,28 +3,122 @@ ETL - Load Module
 Load data into Supabase
 """
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from supabase import create_client, Client
 import pandas as pd
 import logging
-from typing import List, Dict, Any
+import threading
+import time
+from typing import List, Dict, Any, Iterable, Optional, Callable, TypeVar
+
+from batching import AdaptiveBatcher, estimate_row_bytes
+from source_state import RowSnapshot
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class SupabaseLoader:
     """Loader for Supabase database"""
     
-    def __init__(self):
-        supabase_url = os.getenv("SUPABASE_URL")
-        # Utiliser la clé de service pour avoir les permissions d'écriture
-        supabase_key = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY")
+    # Lots envoyés simultanément (1 = séquentiel, comportement historique)
+    concurrency: int = 1
+    
+    def __init__(self, concurrency: Optional[int] = None, client: Optional[Client] = None):
+        if client is None:
+            supabase_url = os.getenv("SUPABASE_URL")
+            # Utiliser la clé de service pour avoir les permissions d'écriture
+            supabase_key = os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_KEY")
+            
+            if not supabase_url or not supabase_key:
+                raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_KEY (or SUPABASE_KEY) must be set")
+            
+            client = create_client(supabase_url, supabase_key)
+        self.client: Client = client
+        if concurrency is None:
+            concurrency = int(os.getenv("ETL_LOAD_CONCURRENCY", "1"))
+        self.concurrency = max(1, concurrency)
+        # Taille des lots : un budget d'octets par (table, opération), ajusté au fil des lots
+        self._batchers: Dict[tuple, AdaptiveBatcher] = {}
+        self._batchers_lock = threading.Lock()
+        self.batch_log: List[Dict[str, Any]] = []
+        # Client PostgREST (et son pool de connexions httpx) créé une fois, partagé par les threads d'envoi
+        self.client.postgrest
+        logger.info("Supabase client initialized (using service key for write operations)")
+    
+    def _batcher(self, table_name: str, operation: str) -> AdaptiveBatcher:
+        with self._batchers_lock:
+            return self._batchers.setdefault((table_name, operation), AdaptiveBatcher())
+    
+    def _log_batches(self, table_name: str, operation: str, sizes: List[int], row_bytes: float,
+                     source: Optional[str] = None) -> None:
+        """Record the batch sizes chosen for one call (execution report)"""
+        if not sizes:
+            return
+        entry = {"table": table_name, "operation": operation}
+        if source:
+            entry["source"] = source
+        entry.update(self._batcher(table_name, operation).summary(sizes, row_bytes))
+        with self._batchers_lock:
+            self.batch_log.append(entry)
+        logger.info(
+            f"{table_name} {operation}: {entry['batches']} batches of {entry['min_rows']}-{entry['max_rows']} rows "
+            f"(~{entry['avg_row_bytes']} bytes/row, budget now {entry['budget_bytes']} bytes)"
+        )
+    
+    def _run_batches(self, batches: Iterable[List[Dict[str, Any]]], send: Callable[[int, List[Dict[str, Any]]], T],
+                     table_name: str) -> List[T]:
+        """
+        Send batches, at most ``self.concurrency`` in flight (backpressure)
+        
+        Args:
+            batches: Batches of records, in source order (may be a generator:
+                each batch is only built when a slot is free)
+            send: Function (batch index, batch) performing one request
+            table_name: Target table (logs)
+            
+        Returns:
+            Results of ``send``, in batch order
+        """
+        if self.concurrency <= 1:
+            return [send(n, batch) for n, batch in enumerate(batches)]
         
-        if not supabase_url or not supabase_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_KEY (or SUPABASE_KEY) must be set")
+        results: Dict[int, T] = {}
+        in_flight: Dict[Any, int] = {}
+        confirmed = 0  # lots 1..confirmed terminés, sans trou
         
-        self.client: Client = create_client(supabase_url, supabase_key)
-        logger.info("Supabase client initialized (using service key for write operations)")
+        def collect(done):
+            nonlocal confirmed
+            for future in done:
+                n = in_flight.pop(future)
+                try:
+                    results[n] = future.result()
+                except Exception:
+                    logger.error(f"Batch {n + 1} failed in {table_name}; batches 1..{confirmed} confirmed")
+                    raise
+            while confirmed in results:
+                confirmed += 1
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"load-{table_name}") as pool:
+            batches = iter(batches)
+            n = 0
+            while True:
+                # Pas plus de `concurrency` lots en vol : attendre qu'un lot se termine
+                # avant de découper le suivant (taille calculée avec le budget à jour)
+                if len(in_flight) >= self.concurrency:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                in_flight[pool.submit(send, n, batch)] = n
+                n += 1
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        return [results[n] for n in sorted(results)]
     
     def load_dataframe(self, df: pd.DataFrame, table_name: str, if_exists: str = "append") -> bool:
         """
@@ -47,12 +141,26 @@ class SupabaseLoader:
                 # Note: Supabase doesn't have a direct replace, so we might need to delete first
                 pass
             
-            # Insert records in batches
-            batch_size = 1000
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i + batch_size]
-                self.client.table(table_name).insert(batch).execute()
-                logger.info(f"Inserted batch {i//batch_size + 1} into {table_name}")
+            # Insert records in batches sized by payload bytes
+            batcher = self._batcher(table_name, "insert")
+            row_bytes = estimate_row_bytes(records)
+            sizes: List[int] = []
+            
+            def send(n: int, batch: List[Dict[str, Any]]) -> None:
+                start = time.perf_counter()
+                try:
+                    self.client.table(table_name).insert(batch).execute()
+                except Exception:
+                    # Pas de nouvel essai : un insert n'est pas idempotent
+                    batcher.observe(time.perf_counter() - start, ok=False)
+                    raise
+                batcher.observe(time.perf_counter() - start, ok=True)
+                logger.info(f"Inserted batch {n + 1} into {table_name} ({len(batch)} records)")
+            
+            try:
+                self._run_batches(batcher.batches(records, row_bytes, sizes), send, table_name)
+            finally:
+                self._log_batches(table_name, "insert", sizes, row_bytes)
             
             logger.info(f"Successfully loaded {len(records)} records into {table_name}")
             return True
@@ -77,27 +185,7 @@ class SupabaseLoader:
             # Convertir le DataFrame en liste de dictionnaires
             # Remplacer NaN par None pour éviter les erreurs JSON
             records = df.where(pd.notna(df), None).to_dict('records')
-            
-            # Upsert records in batches
-            batch_size = 100  # Réduire la taille des batches pour Supabase
-            total_batches = (len(records) + batch_size - 1) // batch_size
-            
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i + batch_size]
-                try:
-                    # Supabase upsert utilise la clé primaire ou une colonne unique
-                    # On utilise insert avec ignore_duplicates ou on fait un upsert manuel
-                    response = self.client.table(table_name).upsert(batch, on_conflict=on_conflict).execute()
-                    logger.info(f"Upserted batch {i//batch_size + 1}/{total_batches} into {table_name} ({len(batch)} records)")
-                except Exception as batch_error:
-                    logger.warning(f"Error in batch {i//batch_size + 1}: {str(batch_error)}")
-                    # Essayer d'insérer un par un en cas d'erreur
-                    for record in batch:
-                        try:
-                            self.client.table(table_name).upsert([record], on_conflict=on_conflict).execute()
-                        except Exception as record_error:
-                            logger.warning(f"Skipped record in {table_name}: {record_error}")
-            
+            self._upsert_records(records, table_name, on_conflict)
             logger.info(f"Successfully upserted {len(records)} records into {table_name}")
             return True
             
@@ -105,6 +193,93 @@ class SupabaseLoader:
             logger.error(f"Error upserting data into {table_name}: {str(e)}")
             return False
     
+    def upsert_changed(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        on_conflict: str,
+        snapshot: RowSnapshot,
+        delete_missing: bool = False,
+    ) -> Optional[Dict[str, int]]:
+        """
+        Upsert only the rows that are new or modified since the last run
+        
+        Args:
+            df: DataFrame to upsert (transformed rows)
+            table_name: Name of the target table
+            on_conflict: Natural key column (unique constraint used by the upsert)
+            snapshot: Row fingerprints of the previous run for this source
+            delete_missing: Also delete rows whose key vanished from the source
+            
+        Returns:
+            Counters (inserted, updated, unchanged, deleted, failed, sent), None on error
+        """
+        try:
+            records = df.where(pd.notna(df), None).to_dict('records')
+            to_send, current, vanished, counts = snapshot.diff(records, on_conflict)
+            logger.info(
+                f"{table_name}: {len(to_send)}/{len(current)} rows to send "
+                f"({counts['inserted']} new, {counts['updated']} modified)"
+            )
+            failed = self._upsert_records(to_send, table_name, on_conflict, source=snapshot.name)
+            # Lignes en échec : retirées de l'instantané pour être renvoyées au prochain passage
+            for record in failed:
+                current.pop(str(record[on_conflict]), None)
+            
+            counts["deleted"] = 0
+            if delete_missing and vanished:
+                for i in range(0, len(vanished), 100):
+                    batch = vanished[i:i + 100]
+                    self.client.table(table_name).delete().in_(on_conflict, batch).execute()
+                    counts["deleted"] += len(batch)
+                logger.info(f"Deleted {counts['deleted']} vanished records from {table_name}")
+            elif vanished:
+                # Clés disparues conservées : toujours suivies dans l'instantané
+                current.update({k: snapshot.rows[k] for k in vanished})
+            
+            snapshot.save(current)
+            counts["failed"] = len(failed)
+            counts["sent"] = len(to_send) + counts["deleted"]
+            return counts
+            
+        except Exception as e:
+            logger.error(f"Error upserting changed rows into {table_name}: {str(e)}")
+            return None
+    
+    def _upsert_records(self, records: List[Dict[str, Any]], table_name: str, on_conflict: str,
+                        source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Upsert records in batches sized by payload bytes; returns the records that could not be written."""
+        batcher = self._batcher(table_name, "upsert")
+        row_bytes = estimate_row_bytes(records)
+        sizes: List[int] = []
+        
+        def send(n: int, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            failed = []
+            start = time.perf_counter()
+            try:
+                # Supabase upsert utilise la clé primaire ou une colonne unique
+                self.client.table(table_name).upsert(batch, on_conflict=on_conflict).execute()
+                batcher.observe(time.perf_counter() - start, ok=True)
+                logger.info(f"Upserted batch {n + 1} into {table_name} ({len(batch)} records)")
+            except Exception as batch_error:
+                # Lot refusé (taille, timeout) : lots suivants plus petits
+                batcher.observe(time.perf_counter() - start, ok=False)
+                logger.warning(f"Error in batch {n + 1}: {str(batch_error)}")
+                # Essayer d'insérer un par un en cas d'erreur
+                for record in batch:
+                    try:
+                        self.client.table(table_name).upsert([record], on_conflict=on_conflict).execute()
+                    except Exception as record_error:
+                        failed.append(record)
+                        logger.warning(f"Skipped record in {table_name}: {record_error}")
+            return failed
+        
+        try:
+            results = self._run_batches(batcher.batches(records, row_bytes, sizes), send, table_name)
+        finally:
+            self._log_batches(table_name, "upsert", sizes, row_bytes, source)
+        return [record for failed in results for record in failed]
+    
     def delete_records(self, table_name: str, filters: Dict[str, Any]) -> bool:
         """
         Delete records from Supabase table
@@ -4,6 +4,7 @@ ETL Scheduler — pipeline d'ingestion et de transformation automatisé.
 Modes d'exécution :
   python scheduler.py        → démarre le scheduler (exécution immédiate + cron)
   python scheduler.py run    → exécution unique (debug / CI)
+  python scheduler.py run --force → idem, sources inchangées comprises
 
 Logs :
   - stdout (console Docker)
@@ -11,14 +12,18 @@ Logs :
 
 Rapports d'exécution :
   - etl/logs/reports/report_YYYY-MM-DD_HH-MM-SS.json
-    Contient : timestamp, durée, statut de chaque source, nombre de lignes,
-    liste d'erreurs, résultat global (success / partial / failure).
+    Contient : timestamp, durée, statut de chaque source (loaded / failed /
+    skipped (unchanged)), nombre de lignes, liste d'erreurs, résultat global
+    (success / partial / failure).
+
+Sources inchangées : voir source_state.py (empreinte de contenu par source).
 """
 
 import json
 import logging
 import os
 import sys
+import threading
 import time
 import traceback
 from datetime import datetime, timezone
@@ -31,8 +36,10 @@ from apscheduler.triggers.cron import CronTrigger
 from dotenv import load_dotenv
 
 from download_data import DATA_DIR, DATASETS, download_datasets
-from extract import extract_exercises_from_exercisedb, extract_from_csv
+from extract import extract_from_csv, fetch_exercises_from_exercisedb
 from load import SupabaseLoader
+from source_state import RowSnapshot, SourceStateStore, hash_file, hash_records
+from stages import Stage, run_stages
 from transform import (
     clean_data,
     restore_list_columns,
@@ -90,19 +97,43 @@ class ExecutionReport:
     def __init__(self):
         self.started_at = datetime.now(timezone.utc)
         self.sources: list[dict] = []
+        self.stages: list[dict] = []  # mesures de run_stages (voir stages.py)
+        self.batching: list[dict] = []  # tailles de lots retenues par le loader (voir batching.py)
         self._errors: list[str] = []
-
-    def record_source(self, name: str, rows: int, ok: bool, error: str | None = None):
-        entry = {"source": name, "rows_loaded": rows, "success": ok}
+        self._lock = threading.Lock()  # étapes exécutées en parallèle
+
+    def record_source(self, name: str, rows: int, ok: bool, error: str | None = None,
+                      changes: dict | None = None):
+        entry = {"source": name, "rows_loaded": rows, "success": ok, "status": "loaded" if ok else "failed"}
+        if changes is not None:
+            # Upsert différentiel : lignes réellement envoyées (nouvelles, modifiées, supprimées)
+            entry["rows_sent"] = changes["sent"]
+            entry["changes"] = changes
         if error:
             entry["error"] = error
-            self._errors.append(f"[{name}] {error}")
-        self.sources.append(entry)
-        if ok:
+        with self._lock:
+            if error:
+                self._errors.append(f"[{name}] {error}")
+            self.sources.append(entry)
+        if ok and changes is not None:
+            logger.info("  ✅ %s — %d ligne(s), %d envoyée(s)", name, rows, changes["sent"])
+        elif ok:
             logger.info("  ✅ %s — %d ligne(s) chargée(s)", name, rows)
         else:
             logger.error("  ❌ %s — %s", name, error or "erreur inconnue")
 
+    def record_skipped(self, name: str, source_rows: int):
+        """Source identique au dernier chargement réussi : rien n'est relu ni envoyé."""
+        with self._lock:
+            self.sources.append({
+                "source": name,
+                "rows_loaded": 0,
+                "rows_source": source_rows,
+                "success": True,
+                "status": "skipped (unchanged)",
+            })
+        logger.info("  ⏭️  %s — inchangée depuis le dernier chargement (%d ligne(s)), ignorée", name, source_rows)
+
     def save(self):
         finished_at = datetime.now(timezone.utc)
         duration_s = round((finished_at - self.started_at).total_seconds(), 2)
@@ -116,6 +147,11 @@ class ExecutionReport:
             "finished_at": finished_at.isoformat(),
             "duration_seconds": duration_s,
             "status": status,
+            "rows_sent": sum(s.get("rows_sent", s["rows_loaded"]) for s in self.sources),
+            # Somme des durées d'étapes : comparée à duration_seconds, gain du parallélisme
+            "stages_seconds_total": round(sum(st.get("duration_seconds", 0) for st in self.stages), 2),
+            "stages": self.stages,
+            "batching": self.batching,
             "sources": self.sources,
             "errors": self._errors,
         }
@@ -136,14 +172,42 @@ class ExecutionReport:
 # Pipeline principal
 # ---------------------------------------------------------------------------
 
-def run_etl_pipeline():
+def _skip_if_unchanged(state: SourceStateStore, report: ExecutionReport, source: str,
+                       content_hash: str, entries: tuple[str, ...]) -> bool:
+    """True (et entrées « skipped » au rapport) si la source n'a pas changé."""
+    if not state.is_unchanged(source, content_hash):
+        return False
+    for name in entries:
+        report.record_skipped(name, state.get(source)["rows"])
+    return True
+
+
+def _upsert_changed(loader: SupabaseLoader, report: ExecutionReport, name: str, df: pd.DataFrame,
+                    table: str, on_conflict: str, force: bool) -> bool:
+    """Upsert des seules lignes nouvelles / modifiées depuis le dernier passage de la source ``name``."""
+    delete_missing = os.getenv("ETL_DELETE_MISSING", "").lower() in ("1", "true", "yes")
+    changes = loader.upsert_changed(df, table, on_conflict, RowSnapshot(name, force=force), delete_missing)
+    ok = changes is not None and changes["failed"] == 0
+    report.record_source(name, len(df), ok, None if ok else "Échec de l'upsert (voir logs)", changes)
+    return ok
+
+
+def run_etl_pipeline(force: bool | None = None):
     """
     Pipeline ETL principal — 4 sources :
       1. ExerciseDB API (GitHub mirror public)  → exercices
       2. Daily Food & Nutrition (Kaggle)         → aliments
       3. Gym Members Exercise (Kaggle)           → utilisateurs + mesures_biometriques
       4. Diet Recommendations (Kaggle)           → utilisateurs
+
+    Une source dont le contenu n'a pas changé depuis son dernier chargement réussi
+    est sautée ; ``force`` (défaut : variable ETL_FORCE) recharge tout.
+
+    Les sources sont des étapes indépendantes exécutées en parallèle (stages.py,
+    ETL_MAX_WORKERS) ; seules les mesures attendent les utilisateurs gym.
     """
+    if force is None:
+        force = os.getenv("ETL_FORCE", "").lower() in ("1", "true", "yes")
     logger.info("=" * 60)
     logger.info("Démarrage du pipeline ETL — %s", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     logger.info("=" * 60)
@@ -169,112 +233,167 @@ def run_etl_pipeline():
             )
 
     loader = SupabaseLoader()
+    state = SourceStateStore(force=force)
+    gym: dict = {}  # partagé entre 3a (utilisateurs) et 3b (mesures)
 
     # ------------------------------------------------------------------
     # 1. EXERCICES — ExerciseDB API
     # ------------------------------------------------------------------
-    logger.info("\n[1/4] Extraction des exercices (ExerciseDB API)…")
-    try:
-        df_ex = extract_exercises_from_exercisedb(limit=200)
-        df_ex = transform_exercises_from_exercisedb(df_ex)
-        df_ex = clean_data(df_ex)
-
-        if validate_data(df_ex, ["nom"]):
-            ok = loader.upsert_dataframe(df_ex, "exercices", on_conflict="nom")
-            report.record_source("exercices", len(df_ex), bool(ok))
-        else:
-            report.record_source("exercices", 0, False, "Validation échouée (colonne 'nom' manquante)")
-    except Exception as exc:
-        report.record_source("exercices", 0, False, traceback.format_exc(limit=3))
-        logger.debug("Traceback complet :", exc_info=True)
+    def stage_exercices():
+        logger.info("[1/4] Extraction des exercices (ExerciseDB API)…")
+        try:
+            exercises = fetch_exercises_from_exercisedb(limit=200)
+            ex_hash = hash_records(exercises)
+            if _skip_if_unchanged(state, report, "exercices", ex_hash, ("exercices",)):
+                return True
+            df_ex = transform_exercises_from_exercisedb(pd.DataFrame(exercises))
+            df_ex = clean_data(df_ex)
+
+            if validate_data(df_ex, ["nom"]):
+                if _upsert_changed(loader, report, "exercices", df_ex, "exercices", "nom", force):
+                    state.record("exercices", ex_hash, len(exercises))
+                    return True
+            else:
+                report.record_source("exercices", 0, False, "Validation échouée (colonne 'nom' manquante)")
+        except Exception:
+            report.record_source("exercices", 0, False, traceback.format_exc(limit=3))
+            logger.debug("Traceback complet :", exc_info=True)
+        return False
 
     # ------------------------------------------------------------------
     # 2. ALIMENTS — Daily Food & Nutrition Dataset (Kaggle)
     # ------------------------------------------------------------------
-    logger.info("\n[2/4] Extraction aliments (Daily Food & Nutrition Dataset)…")
-    nutrition_path = os.path.join(DATA_DIR, "daily_food_nutrition_dataset.csv")
-    try:
-        df_nutrition = extract_from_csv(nutrition_path)
-        df_aliments = transform_nutrition_dataset(df_nutrition)
-        df_aliments = clean_data(df_aliments)
-
-        if validate_data(df_aliments, ["nom", "calories"]):
-            ok = loader.upsert_dataframe(df_aliments, "aliments", on_conflict="nom")
-            report.record_source("aliments", len(df_aliments), bool(ok))
-        else:
-            report.record_source("aliments", 0, False, "Validation échouée (colonnes 'nom'/'calories')")
-    except Exception as exc:
-        report.record_source("aliments", 0, False, traceback.format_exc(limit=3))
-        logger.debug("Traceback complet :", exc_info=True)
+    def stage_aliments():
+        logger.info("[2/4] Extraction aliments (Daily Food & Nutrition Dataset)…")
+        nutrition_path = os.path.join(DATA_DIR, "daily_food_nutrition_dataset.csv")
+        try:
+            nutrition_hash = hash_file(nutrition_path)
+            if _skip_if_unchanged(state, report, "aliments", nutrition_hash, ("aliments",)):
+                return True
+            df_nutrition = extract_from_csv(nutrition_path)
+            df_aliments = transform_nutrition_dataset(df_nutrition)
+            df_aliments = clean_data(df_aliments)
+
+            if validate_data(df_aliments, ["nom", "calories"]):
+                if _upsert_changed(loader, report, "aliments", df_aliments, "aliments", "nom", force):
+                    state.record("aliments", nutrition_hash, len(df_nutrition))
+                    return True
+            else:
+                report.record_source("aliments", 0, False, "Validation échouée (colonnes 'nom'/'calories')")
+        except Exception:
+            report.record_source("aliments", 0, False, traceback.format_exc(limit=3))
+            logger.debug("Traceback complet :", exc_info=True)
+        return False
 
     # ------------------------------------------------------------------
-    # 3. UTILISATEURS + MESURES — Gym Members Exercise Dataset (Kaggle)
+    # 3a. UTILISATEURS — Gym Members Exercise Dataset (Kaggle)
     # ------------------------------------------------------------------
-    logger.info("\n[3/4] Extraction utilisateurs (Gym Members Exercise Dataset)…")
-    gym_path = os.path.join(DATA_DIR, "gym_members_exercise_tracking.csv")
-    try:
-        df_gym = extract_from_csv(gym_path)
-
-        # 3a. Utilisateurs
-        df_gym_users = transform_gym_members_to_utilisateurs(df_gym)
-        df_gym_users = clean_data(df_gym_users)
-        df_gym_users = restore_list_columns(df_gym_users, ["objectifs"])
-
-        if validate_data(df_gym_users, ["email"]):
-            ok = loader.upsert_dataframe(df_gym_users, "utilisateurs", on_conflict="email")
-            report.record_source("utilisateurs_gym", len(df_gym_users), bool(ok))
-        else:
-            report.record_source("utilisateurs_gym", 0, False, "Validation échouée (colonne 'email')")
-
-        # 3b. Mesures biométriques — récupérer les UUIDs insérés
-        logger.info("Récupération des UUIDs pour les mesures biométriques…")
-        gym_emails = list(df_gym_users["email"].dropna().unique())
-        email_to_id: dict[str, str] = {}
-
-        # Requête par batch de 100 (limite Supabase par défaut)
-        for i in range(0, len(gym_emails), 100):
-            batch = gym_emails[i : i + 100]
-            res = (
-                loader.client.table("utilisateurs")
-                .select("id_utilisateur,email")
-                .in_("email", batch)
-                .execute()
-            )
-            for row in res.data:
-                email_to_id[row["email"]] = row["id_utilisateur"]
-
-        logger.info("  %d/%d utilisateurs retrouvés pour les mesures", len(email_to_id), len(gym_emails))
-
-        df_mesures = transform_gym_members_to_mesures(df_gym, email_to_id)
-        if len(df_mesures) > 0:
-            ok = loader.load_dataframe(df_mesures, "mesures_biometriques")
-            report.record_source("mesures_biometriques", len(df_mesures), bool(ok))
-        else:
-            report.record_source("mesures_biometriques", 0, False, "Aucune mesure à charger")
+    def stage_gym_utilisateurs():
+        logger.info("[3/4] Extraction utilisateurs (Gym Members Exercise Dataset)…")
+        gym_path = os.path.join(DATA_DIR, "gym_members_exercise_tracking.csv")
+        try:
+            gym["hash"] = hash_file(gym_path)
+            if _skip_if_unchanged(state, report, "gym_members", gym["hash"],
+                                  ("utilisateurs_gym", "mesures_biometriques")):
+                gym["skipped"] = True
+                return True
+            gym["df"] = extract_from_csv(gym_path)
+
+            df_gym_users = transform_gym_members_to_utilisateurs(gym["df"])
+            df_gym_users = clean_data(df_gym_users)
+            gym["users"] = restore_list_columns(df_gym_users, ["objectifs"])
+
+            if validate_data(gym["users"], ["email"]):
+                gym["users_ok"] = _upsert_changed(loader, report, "utilisateurs_gym", gym["users"],
+                                                  "utilisateurs", "email", force)
+            else:
+                gym["users_ok"] = False
+                report.record_source("utilisateurs_gym", 0, False, "Validation échouée (colonne 'email')")
+            # Les mesures sont tentées même si l'upsert a échoué (utilisateurs déjà en base)
+            return True
+        except Exception:
+            report.record_source("gym_members", 0, False, traceback.format_exc(limit=3))
+            logger.debug("Traceback complet :", exc_info=True)
+            return False
 
-    except Exception as exc:
-        report.record_source("gym_members", 0, False, traceback.format_exc(limit=3))
-        logger.debug("Traceback complet :", exc_info=True)
+    # ------------------------------------------------------------------
+    # 3b. MESURES — dépend des UUIDs des utilisateurs insérés en 3a
+    # ------------------------------------------------------------------
+    def stage_gym_mesures():
+        if gym.get("skipped"):
+            return True
+        try:
+            logger.info("Récupération des UUIDs pour les mesures biométriques…")
+            gym_emails = list(gym["users"]["email"].dropna().unique())
+            email_to_id: dict[str, str] = {}
+
+            # Requête par batch de 100 (limite Supabase par défaut)
+            for i in range(0, len(gym_emails), 100):
+                batch = gym_emails[i : i + 100]
+                res = (
+                    loader.client.table("utilisateurs")
+                    .select("id_utilisateur,email")
+                    .in_("email", batch)
+                    .execute()
+                )
+                for row in res.data:
+                    email_to_id[row["email"]] = row["id_utilisateur"]
+
+            logger.info("  %d/%d utilisateurs retrouvés pour les mesures", len(email_to_id), len(gym_emails))
+
+            df_mesures = transform_gym_members_to_mesures(gym["df"], email_to_id)
+            if len(df_mesures) > 0:
+                mesures_ok = bool(loader.load_dataframe(df_mesures, "mesures_biometriques"))
+                report.record_source("mesures_biometriques", len(df_mesures), mesures_ok)
+            else:
+                mesures_ok = False
+                report.record_source("mesures_biometriques", 0, False, "Aucune mesure à charger")
+
+            # Mesures insérées (pas d'upsert) : l'état n'est mémorisé qu'une fois tout chargé
+            if gym["users_ok"] and mesures_ok:
+                state.record("gym_members", gym["hash"], len(gym["df"]))
+            return mesures_ok
+        except Exception:
+            report.record_source("gym_members", 0, False, traceback.format_exc(limit=3))
+            logger.debug("Traceback complet :", exc_info=True)
+            return False
 
     # ------------------------------------------------------------------
     # 4. UTILISATEURS — Diet Recommendations Dataset (Kaggle)
     # ------------------------------------------------------------------
-    logger.info("\n[4/4] Extraction utilisateurs (Diet Recommendations Dataset)…")
-    diet_path = os.path.join(DATA_DIR, "diet_recommendations_dataset.csv")
-    try:
-        df_diet = extract_from_csv(diet_path)
-        df_diet_users = transform_diet_reco_to_utilisateurs(df_diet)
-        df_diet_users = clean_data(df_diet_users)
-        df_diet_users = restore_list_columns(df_diet_users, ["objectifs"])
-
-        if validate_data(df_diet_users, ["email"]):
-            ok = loader.upsert_dataframe(df_diet_users, "utilisateurs", on_conflict="email")
-            report.record_source("utilisateurs_diet", len(df_diet_users), bool(ok))
-        else:
-            report.record_source("utilisateurs_diet", 0, False, "Validation échouée (colonne 'email')")
-    except Exception as exc:
-        report.record_source("utilisateurs_diet", 0, False, traceback.format_exc(limit=3))
-        logger.debug("Traceback complet :", exc_info=True)
+    def stage_diet():
+        logger.info("[4/4] Extraction utilisateurs (Diet Recommendations Dataset)…")
+        diet_path = os.path.join(DATA_DIR, "diet_recommendations_dataset.csv")
+        try:
+            diet_hash = hash_file(diet_path)
+            if _skip_if_unchanged(state, report, "utilisateurs_diet", diet_hash, ("utilisateurs_diet",)):
+                return True
+            df_diet = extract_from_csv(diet_path)
+            df_diet_users = transform_diet_reco_to_utilisateurs(df_diet)
+            df_diet_users = clean_data(df_diet_users)
+            df_diet_users = restore_list_columns(df_diet_users, ["objectifs"])
+
+            if validate_data(df_diet_users, ["email"]):
+                if _upsert_changed(loader, report, "utilisateurs_diet", df_diet_users,
+                                   "utilisateurs", "email", force):
+                    state.record("utilisateurs_diet", diet_hash, len(df_diet))
+                    return True
+            else:
+                report.record_source("utilisateurs_diet", 0, False, "Validation échouée (colonne 'email')")
+        except Exception:
+            report.record_source("utilisateurs_diet", 0, False, traceback.format_exc(limit=3))
+            logger.debug("Traceback complet :", exc_info=True)
+        return False
+
+    # Seule dépendance réelle : 3b a besoin des utilisateurs chargés par 3a
+    report.stages = run_stages([
+        Stage("exercices", stage_exercices),
+        Stage("aliments", stage_aliments),
+        Stage("gym_utilisateurs", stage_gym_utilisateurs),
+        Stage("gym_mesures", stage_gym_mesures, depends_on=("gym_utilisateurs",)),
+        Stage("diet_utilisateurs", stage_diet),
+    ])
+    report.batching = loader.batch_log
 
     # ------------------------------------------------------------------
     # Clôture
@@ -353,7 +472,7 @@ if __name__ == "__main__":
     # 'python scheduler.py run' → exécution unique (debug / CI)
     if len(sys.argv) > 1 and sys.argv[1] == "run":
         logger.info("Mode exécution unique (argument 'run')…")
-        run_etl_pipeline()
+        run_etl_pipeline(force=True if "--force" in sys.argv[2:] else None)
     else:
         # Mode scheduler continu
         main()
@@ -0,0 +1,157 @@
+"""
+État des sources du pipeline ETL : empreinte de contenu et nombre de lignes.
+
+À chaque passage du cron, une source dont l'empreinte n'a pas changé depuis le
+dernier chargement réussi est sautée (ni transformation, ni upsert). L'empreinte
+combine le contenu de la source (octets du CSV, JSON ExerciseDB normalisé) et le
+code de transformation (``transform.py``) : modifier une règle de transformation
+force un rechargement.
+
+Fichier JSON ``data/.source_state.json`` (volume persistant du conteneur ETL),
+remplaçable par ``ETL_STATE_FILE``. ``ETL_FORCE=1`` ou ``scheduler.py run --force``
+ignore l'état et recharge tout.
+
+Quand une source a changé, ``RowSnapshot`` garde l'empreinte de chaque ligne
+transformée (clé naturelle → hash) : seules les lignes nouvelles ou modifiées
+sont renvoyées (``SupabaseLoader.upsert_changed``).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from download_data import DATA_DIR
+
+STATE_FILE = Path(os.getenv("ETL_STATE_FILE", os.path.join(DATA_DIR, ".source_state.json")))
+_TRANSFORM_FILE = Path(__file__).parent / "transform.py"
+_CHUNK = 1 << 20
+
+
+def _code_digest() -> str:
+    return hashlib.sha256(_TRANSFORM_FILE.read_bytes()).hexdigest() if _TRANSFORM_FILE.exists() else ""
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 du fichier, lu par blocs de 1 Mio."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_records(records) -> str:
+    """SHA-256 d'une réponse JSON (clés triées : l'ordre des clés n'est pas un changement)."""
+    raw = json.dumps(records, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SourceStateStore:
+    """Empreintes des derniers chargements réussis, par source."""
+
+    def __init__(self, path: Path = STATE_FILE, force: bool = False):
+        self.path = Path(path)
+        self.force = force
+        self._code = _code_digest()
+        self._state: dict[str, dict] = {}
+        self._lock = threading.Lock()  # étapes du pipeline en parallèle
+        if self.path.exists():
+            try:
+                self._state = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._state = {}  # état illisible : tout recharger
+
+    def get(self, source: str) -> dict | None:
+        return self._state.get(source)
+
+    def is_unchanged(self, source: str, content_hash: str) -> bool:
+        entry = self._state.get(source)
+        return (
+            not self.force
+            and entry is not None
+            and entry.get("hash") == content_hash
+            and entry.get("transform") == self._code
+        )
+
+    def record(self, source: str, content_hash: str, rows: int) -> None:
+        """Source chargée avec succès : mémorise son empreinte et l'écrit sur disque."""
+        with self._lock:
+            self._state[source] = {
+                "hash": content_hash,
+                "rows": rows,
+                "transform": self._code,
+                "loaded_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self.save()
+
+    def save(self) -> None:
+        # Écriture atomique : un arrêt pendant l'écriture ne corrompt pas l'état
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self._state, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def hash_row(record: dict) -> str:
+    """Empreinte courte d'une ligne transformée (valeurs prêtes pour l'upsert)."""
+    raw = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RowSnapshot:
+    """
+    Empreintes des lignes envoyées lors du dernier chargement : clé naturelle → hash.
+
+    Un instantané par source (``utilisateurs`` reçoit deux sources : les clés
+    disparues de l'une ne doivent pas supprimer les lignes de l'autre). Fichier
+    ``.snapshots/<nom>.json`` à côté de l'état des sources ; ``force`` repart d'un
+    instantané vide (tout est renvoyé, puis l'instantané est reconstruit).
+    """
+
+    def __init__(self, name: str, force: bool = False, directory: Path | None = None):
+        self.name = name
+        self.path = Path(directory or STATE_FILE.parent / ".snapshots") / f"{name}.json"
+        self.rows: dict[str, str] = {}
+        if not force and self.path.exists():
+            try:
+                self.rows = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.rows = {}
+
+    def diff(self, records: list[dict], key: str) -> tuple[list[dict], dict[str, str], list[str], dict[str, int]]:
+        """
+        Compare les lignes à l'instantané.
+
+        Retourne (lignes à envoyer, empreintes courantes, clés disparues, compteurs
+        inserted / updated / unchanged). Une clé en double garde sa dernière ligne.
+        """
+        current: dict[str, str] = {}
+        latest: dict[str, dict] = {}
+        for record in records:
+            k = record.get(key)
+            if k is None:
+                continue
+            k = str(k)
+            current[k] = hash_row(record)
+            latest[k] = record
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        to_send = []
+        for k, h in current.items():
+            previous = self.rows.get(k)
+            if previous == h:
+                counts["unchanged"] += 1
+                continue
+            counts["inserted" if previous is None else "updated"] += 1
+            to_send.append(latest[k])
+        vanished = [k for k in self.rows if k not in current]
+        return to_send, current, vanished, counts
+
+    def save(self, rows: dict[str, str]) -> None:
+        self.rows = rows
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(rows, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
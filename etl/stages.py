@@ -0,0 +1,100 @@
+"""
+Exécution des étapes du pipeline ETL selon leurs dépendances.
+
+Chaque étape déclare les étapes dont elle dépend ; une étape démarre dès que
+toutes ses dépendances ont réussi, sur un pool de threads (``ETL_MAX_WORKERS``,
+défaut 4). Les étapes passent l'essentiel de leur temps en I/O (téléchargement,
+requêtes PostgREST), d'où des threads plutôt que des processus : le client
+Supabase et les DataFrames sont partagés sans sérialisation. La durée totale tend
+vers celle de la plus longue chaîne de dépendances.
+
+Une étape qui lève une exception ou retourne ``False`` est en échec ; les étapes
+qui en dépendent ne sont pas lancées (statut ``blocked``).
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger("etl")
+
+
+@dataclass
+class Stage:
+    """Étape nommée ; ``run`` retourne False en cas d'échec géré (erreur déjà rapportée)."""
+    name: str
+    run: Callable[[], bool | None]
+    depends_on: tuple[str, ...] = field(default_factory=tuple)
+
+
+def default_workers() -> int:
+    return max(1, int(os.getenv("ETL_MAX_WORKERS", "4")))
+
+
+def _check(stages: list[Stage]) -> None:
+    names = {s.name for s in stages}
+    for stage in stages:
+        unknown = set(stage.depends_on) - names
+        if unknown:
+            raise ValueError(f"Étape {stage.name} : dépendances inconnues {sorted(unknown)}")
+    # Détection de cycle : un tri topologique doit consommer toutes les étapes
+    remaining = {s.name: set(s.depends_on) for s in stages}
+    while remaining:
+        ready = [n for n, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cycle de dépendances entre {sorted(remaining)}")
+        for n in ready:
+            del remaining[n]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_stages(stages: list[Stage], max_workers: int | None = None) -> list[dict]:
+    """
+    Exécute les étapes et retourne leurs mesures, dans l'ordre de déclaration :
+    ``{"stage", "depends_on", "status", "start_offset_seconds", "duration_seconds"}``
+    (statut ``ok``, ``failed`` ou ``blocked``).
+    """
+    _check(stages)
+    max_workers = max_workers or default_workers()
+    origin = time.perf_counter()
+    timings: dict[str, dict] = {
+        s.name: {"stage": s.name, "depends_on": list(s.depends_on), "status": "pending"} for s in stages
+    }
+
+    def _timed(stage: Stage) -> bool:
+        start = time.perf_counter()
+        timings[stage.name]["start_offset_seconds"] = round(start - origin, 3)
+        try:
+            ok = stage.run() is not False
+        except Exception:
+            logger.exception("Étape %s interrompue", stage.name)
+            ok = False
+        timings[stage.name]["duration_seconds"] = round(time.perf_counter() - start, 3)
+        return ok
+
+    pending = list(stages)
+    running: dict[Future, Stage] = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="etl") as pool:
+        while pending or running:
+            for stage in list(pending):
+                statuses = [timings[d]["status"] for d in stage.depends_on]
+                if any(st in ("failed", "blocked") for st in statuses):
+                    timings[stage.name]["status"] = "blocked"
+                    logger.warning("Étape %s non lancée : dépendance en échec", stage.name)
+                    pending.remove(stage)
+                elif all(st == "ok" for st in statuses):
+                    timings[stage.name]["status"] = "running"
+                    running[pool.submit(_timed, stage)] = stage
+                    pending.remove(stage)
+            if not running:
+                continue  # étapes bloquées retirées au tour suivant
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                timings[stage.name]["status"] = "ok" if future.result() else "failed"
+
+    return [timings[s.name] for s in stages]
@@ -0,0 +1,17 @@
+-- Pagination par curseur (date, id) des listes journal / mesures / sessions
+-- Les listes filtrent par utilisateur et trient par (date DESC, id DESC) : l'index
+-- composite sert le filtre, le tri et la condition de curseur sans OFFSET.
+-- Il couvre aussi les recherches par id_utilisateur seul (préfixe) : les index
+-- mono-colonne correspondants deviennent redondants.
+
+CREATE INDEX IF NOT EXISTS idx_journal_utilisateur_date_id
+  ON public.journal_alimentaire (id_utilisateur, date_consommation DESC, id_journal DESC);
+DROP INDEX IF EXISTS public.idx_journal_utilisateur;
+
+CREATE INDEX IF NOT EXISTS idx_mesures_utilisateur_date_id
+  ON public.mesures_biometriques (id_utilisateur, date_mesure DESC, id_mesure DESC);
+DROP INDEX IF EXISTS public.idx_mesures_utilisateur;
+
+CREATE INDEX IF NOT EXISTS idx_sessions_utilisateur_date_id
+  ON public.sessions_sport (id_utilisateur, date_session DESC, id_session DESC);
+DROP INDEX IF EXISTS public.idx_sessions_utilisateur;
@@ -0,0 +1,70 @@
+-- Recherche insensible aux accents et tolérante aux fautes sur le nom des aliments / exercices
+-- ilike '%terme%' ne peut pas utiliser les index btree idx_aliments_nom / idx_exercices_nom
+-- (joker en tête) : index GIN trigrammes sur le nom normalisé (minuscules, sans accents).
+
+CREATE SCHEMA IF NOT EXISTS extensions;
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA extensions;
+
+-- unaccent() est STABLE (dictionnaire modifiable) : enveloppe IMMUTABLE utilisable dans un index,
+-- dictionnaire fixé explicitement pour ne pas dépendre du search_path.
+CREATE OR REPLACE FUNCTION public.nom_normalise(txt TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$
+  SELECT lower(extensions.unaccent('extensions.unaccent'::regdictionary, txt))
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_aliments_nom_trgm
+  ON public.aliments USING gin (public.nom_normalise(nom) extensions.gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS idx_exercices_nom_trgm
+  ON public.exercices USING gin (public.nom_normalise(nom) extensions.gin_trgm_ops);
+
+-- Recherche classée : sous-chaîne (LIKE, servie par l'index GIN) ou proximité trigramme (%),
+-- tri par similarité décroissante puis par nom.
+CREATE OR REPLACE FUNCTION public.rechercher_aliments(
+  terme TEXT,
+  p_limit INT DEFAULT 100,
+  p_offset INT DEFAULT 0
+)
+RETURNS SETOF public.aliments
+LANGUAGE sql STABLE
+SET search_path = public, extensions
+AS $$
+  WITH q AS (SELECT public.nom_normalise(terme) AS t)
+  SELECT a.*
+  FROM public.aliments a, q
+  WHERE public.nom_normalise(a.nom) LIKE '%' || q.t || '%'
+     OR public.nom_normalise(a.nom) % q.t
+  ORDER BY similarity(public.nom_normalise(a.nom), q.t) DESC, a.nom
+  LIMIT p_limit OFFSET p_offset
+$$;
+
+CREATE OR REPLACE FUNCTION public.rechercher_exercices(
+  terme TEXT,
+  p_type TEXT DEFAULT NULL,
+  p_groupe_musculaire TEXT DEFAULT NULL,
+  p_niveau TEXT DEFAULT NULL,
+  p_limit INT DEFAULT 100,
+  p_offset INT DEFAULT 0
+)
+RETURNS SETOF public.exercices
+LANGUAGE sql STABLE
+SET search_path = public, extensions
+AS $$
+  WITH q AS (SELECT public.nom_normalise(terme) AS t)
+  SELECT e.*
+  FROM public.exercices e, q
+  WHERE (public.nom_normalise(e.nom) LIKE '%' || q.t || '%'
+         OR public.nom_normalise(e.nom) % q.t)
+    AND (p_type IS NULL OR e.type = p_type)
+    AND (p_groupe_musculaire IS NULL OR e.groupe_musculaire = p_groupe_musculaire)
+    AND (p_niveau IS NULL OR e.niveau = p_niveau)
+  ORDER BY similarity(public.nom_normalise(e.nom), q.t) DESC, e.nom
+  LIMIT p_limit OFFSET p_offset
+$$;
+
+GRANT EXECUTE ON FUNCTION public.rechercher_aliments(TEXT, INT, INT) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.rechercher_exercices(TEXT, TEXT, TEXT, TEXT, INT, INT)
+  TO anon, authenticated, service_role;
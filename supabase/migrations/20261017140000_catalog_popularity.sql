@@ -0,0 +1,29 @@
+-- Popularité des aliments / exercices (autocomplétion /suggest) : nombre d'utilisations
+-- dans le journal et les sessions, limitée aux plus utilisés (les autres comptent 0).
+
+CREATE OR REPLACE FUNCTION public.popularite_aliments(p_limit INT DEFAULT 1000)
+RETURNS TABLE (id UUID, n BIGINT)
+LANGUAGE sql STABLE
+AS $$
+  SELECT id_aliment, count(*) AS n
+  FROM public.journal_alimentaire
+  WHERE id_aliment IS NOT NULL
+  GROUP BY id_aliment
+  ORDER BY n DESC
+  LIMIT p_limit
+$$;
+
+CREATE OR REPLACE FUNCTION public.popularite_exercices(p_limit INT DEFAULT 1000)
+RETURNS TABLE (id UUID, n BIGINT)
+LANGUAGE sql STABLE
+AS $$
+  SELECT id_exercice, count(*) AS n
+  FROM public.session_exercices
+  WHERE id_exercice IS NOT NULL
+  GROUP BY id_exercice
+  ORDER BY n DESC
+  LIMIT p_limit
+$$;
+
+GRANT EXECUTE ON FUNCTION public.popularite_aliments(INT) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.popularite_exercices(INT) TO anon, authenticated, service_role;
@@ -0,0 +1,50 @@
+-- Création d'une session sport avec ses exercices en un seul appel (POST /sessions) :
+-- une transaction, un aller-retour, et le même JSON que la sélection avec jointure
+-- « *, session_exercices(..., exercices(nom)) ».
+
+CREATE OR REPLACE FUNCTION public.creer_session_complete(p_session JSONB, p_exercices JSONB DEFAULT '[]')
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_session public.sessions_sport;
+BEGIN
+  INSERT INTO public.sessions_sport (id_utilisateur, duree, intensite, date_session)
+  VALUES (
+    (p_session->>'id_utilisateur')::UUID,
+    (p_session->>'duree')::INT,
+    p_session->>'intensite',
+    COALESCE((p_session->>'date_session')::TIMESTAMPTZ, NOW())
+  )
+  RETURNING * INTO v_session;
+
+  INSERT INTO public.session_exercices
+    (id_session, id_exercice, nombre_series, nombre_repetitions, poids, duree)
+  SELECT v_session.id_session, e.id_exercice, COALESCE(e.nombre_series, 1),
+         e.nombre_repetitions, e.poids, e.duree
+  FROM jsonb_to_recordset(COALESCE(p_exercices, '[]')) AS e(
+    id_exercice UUID, nombre_series INT, nombre_repetitions INT, poids NUMERIC, duree INT
+  );
+
+  RETURN to_jsonb(v_session) || jsonb_build_object(
+    'session_exercices',
+    COALESCE((
+      SELECT jsonb_agg(jsonb_build_object(
+               'id_exercice', se.id_exercice,
+               'nombre_series', se.nombre_series,
+               'nombre_repetitions', se.nombre_repetitions,
+               'poids', se.poids,
+               'duree', se.duree,
+               'exercices', jsonb_build_object('nom', x.nom)
+             ))
+      FROM public.session_exercices se
+      JOIN public.exercices x ON x.id_exercice = se.id_exercice
+      WHERE se.id_session = v_session.id_session
+    ), '[]'::JSONB)
+  );
+END;
+$$;
+
+-- Appelée par l'API avec la clé service (propriété vérifiée côté API)
+REVOKE EXECUTE ON FUNCTION public.creer_session_complete(JSONB, JSONB) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.creer_session_complete(JSONB, JSONB) TO service_role;
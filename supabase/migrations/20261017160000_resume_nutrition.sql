@@ -0,0 +1,41 @@
+-- Bilan nutritionnel par période (GET /journal/summary) : jointure journal × aliments
+-- et agrégation côté base. Les valeurs des aliments sont pour 100 g, quantite en grammes.
+-- p_utilisateur NULL : tous les utilisateurs (admin) ; bornes de dates incluses.
+
+CREATE OR REPLACE FUNCTION public.resume_nutrition(
+  p_utilisateur UUID,
+  p_granularite TEXT DEFAULT 'day',
+  p_debut DATE DEFAULT NULL,
+  p_fin DATE DEFAULT NULL
+)
+RETURNS TABLE (
+  periode DATE,
+  calories NUMERIC,
+  proteines NUMERIC,
+  glucides NUMERIC,
+  lipides NUMERIC,
+  fibres NUMERIC,
+  nb_entrees BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT date_trunc(p_granularite, j.date_consommation)::DATE AS periode,
+         round(sum(a.calories * j.quantite / 100), 2),
+         round(sum(a.proteines * j.quantite / 100), 2),
+         round(sum(a.glucides * j.quantite / 100), 2),
+         round(sum(a.lipides * j.quantite / 100), 2),
+         round(sum(a.fibres * j.quantite / 100), 2),
+         count(*)
+  FROM public.journal_alimentaire j
+  JOIN public.aliments a ON a.id_aliment = j.id_aliment
+  WHERE (p_utilisateur IS NULL OR j.id_utilisateur = p_utilisateur)
+    AND (p_debut IS NULL OR j.date_consommation >= p_debut)
+    AND (p_fin IS NULL OR j.date_consommation < p_fin + 1)
+    AND j.date_consommation IS NOT NULL
+  GROUP BY 1
+  ORDER BY 1
+$$;
+
+-- Appelée par l'API avec la clé service (propriété vérifiée côté API)
+REVOKE EXECUTE ON FUNCTION public.resume_nutrition(UUID, TEXT, DATE, DATE) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.resume_nutrition(UUID, TEXT, DATE, DATE) TO service_role;
@@ -0,0 +1,379 @@
+-- Cumuls journaliers par utilisateur (nutrition, entraînement, biométrie), tenus à jour
+-- par triggers : les lectures agrégées (GET /journal/summary, /stats) parcourent une
+-- ligne par jour au lieu de chaque saisie. Jour = date UTC.
+--
+-- Une écriture recalcule les seaux (utilisateur, jour) qu'elle touche à partir des
+-- lignes brutes de ce jour (index (id_utilisateur, date) de 20261017120000) : le
+-- résultat reste exact après un changement de valeurs d'un aliment ou une suppression
+-- en cascade. Triggers par instruction : un insert multi-lignes (POST /journal/bulk)
+-- recalcule chaque seau une seule fois.
+--
+-- Données existantes : scripts/backfill_rollups.py (fonction recalculer_cumuls).
+
+CREATE OR REPLACE FUNCTION public.jour_utc(ts TIMESTAMPTZ)
+RETURNS DATE
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT (ts AT TIME ZONE 'UTC')::DATE $$;
+
+-- ============================================
+-- Tables de cumuls
+-- ============================================
+CREATE TABLE IF NOT EXISTS public.user_daily_nutrition (
+    id_utilisateur UUID NOT NULL REFERENCES public.utilisateurs(id_utilisateur) ON DELETE CASCADE,
+    jour DATE NOT NULL,
+    calories DECIMAL(12,2) NOT NULL DEFAULT 0,
+    proteines DECIMAL(12,2) NOT NULL DEFAULT 0,
+    glucides DECIMAL(12,2) NOT NULL DEFAULT 0,
+    lipides DECIMAL(12,2) NOT NULL DEFAULT 0,
+    fibres DECIMAL(12,2) NOT NULL DEFAULT 0,
+    nb_entrees INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_utilisateur, jour)
+);
+
+CREATE TABLE IF NOT EXISTS public.user_daily_training (
+    id_utilisateur UUID NOT NULL REFERENCES public.utilisateurs(id_utilisateur) ON DELETE CASCADE,
+    jour DATE NOT NULL,
+    nb_sessions INTEGER NOT NULL DEFAULT 0,
+    duree_totale INTEGER NOT NULL DEFAULT 0, -- en minutes
+    PRIMARY KEY (id_utilisateur, jour)
+);
+
+CREATE TABLE IF NOT EXISTS public.user_daily_biometrics (
+    id_utilisateur UUID NOT NULL REFERENCES public.utilisateurs(id_utilisateur) ON DELETE CASCADE,
+    jour DATE NOT NULL,
+    nb_mesures INTEGER NOT NULL DEFAULT 0,
+    poids_moyen DECIMAL(5,2),
+    frequence_cardiaque_moyenne DECIMAL(6,2),
+    sommeil_moyen DECIMAL(4,2),
+    calories_brulees DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_utilisateur, jour)
+);
+
+-- Lectures tous utilisateurs (admin, activité récente de /stats)
+CREATE INDEX IF NOT EXISTS idx_user_daily_nutrition_jour ON public.user_daily_nutrition (jour);
+CREATE INDEX IF NOT EXISTS idx_user_daily_training_jour ON public.user_daily_training (jour);
+CREATE INDEX IF NOT EXISTS idx_user_daily_biometrics_jour ON public.user_daily_biometrics (jour);
+
+-- ============================================
+-- Recalcul d'un seau (utilisateur, jour)
+-- ============================================
+CREATE OR REPLACE FUNCTION public.cumul_nutrition_jour(p_utilisateur UUID, p_jour DATE)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_utilisateur IS NULL OR p_jour IS NULL THEN
+    RETURN;
+  END IF;
+  -- Deux transactions sur le même seau : la seconde attend et relit après le commit
+  PERFORM pg_advisory_xact_lock(hashtextextended('nutrition:' || p_utilisateur || ':' || p_jour, 0));
+  DELETE FROM public.user_daily_nutrition WHERE id_utilisateur = p_utilisateur AND jour = p_jour;
+  INSERT INTO public.user_daily_nutrition
+    (id_utilisateur, jour, calories, proteines, glucides, lipides, fibres, nb_entrees)
+  SELECT p_utilisateur, p_jour,
+         round(sum(a.calories * j.quantite / 100), 2),
+         round(sum(a.proteines * j.quantite / 100), 2),
+         round(sum(a.glucides * j.quantite / 100), 2),
+         round(sum(a.lipides * j.quantite / 100), 2),
+         round(sum(a.fibres * j.quantite / 100), 2),
+         count(*)
+  FROM public.journal_alimentaire j
+  JOIN public.aliments a ON a.id_aliment = j.id_aliment
+  WHERE j.id_utilisateur = p_utilisateur
+    AND j.date_consommation >= p_jour::TIMESTAMP AT TIME ZONE 'UTC'
+    AND j.date_consommation < (p_jour + 1)::TIMESTAMP AT TIME ZONE 'UTC'
+  HAVING count(*) > 0;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.cumul_training_jour(p_utilisateur UUID, p_jour DATE)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_utilisateur IS NULL OR p_jour IS NULL THEN
+    RETURN;
+  END IF;
+  PERFORM pg_advisory_xact_lock(hashtextextended('training:' || p_utilisateur || ':' || p_jour, 0));
+  DELETE FROM public.user_daily_training WHERE id_utilisateur = p_utilisateur AND jour = p_jour;
+  INSERT INTO public.user_daily_training (id_utilisateur, jour, nb_sessions, duree_totale)
+  SELECT p_utilisateur, p_jour, count(*), COALESCE(sum(s.duree), 0)
+  FROM public.sessions_sport s
+  WHERE s.id_utilisateur = p_utilisateur
+    AND s.date_session >= p_jour::TIMESTAMP AT TIME ZONE 'UTC'
+    AND s.date_session < (p_jour + 1)::TIMESTAMP AT TIME ZONE 'UTC'
+  HAVING count(*) > 0;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.cumul_biometrics_jour(p_utilisateur UUID, p_jour DATE)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_utilisateur IS NULL OR p_jour IS NULL THEN
+    RETURN;
+  END IF;
+  PERFORM pg_advisory_xact_lock(hashtextextended('biometrics:' || p_utilisateur || ':' || p_jour, 0));
+  DELETE FROM public.user_daily_biometrics WHERE id_utilisateur = p_utilisateur AND jour = p_jour;
+  INSERT INTO public.user_daily_biometrics
+    (id_utilisateur, jour, nb_mesures, poids_moyen, frequence_cardiaque_moyenne, sommeil_moyen, calories_brulees)
+  SELECT p_utilisateur, p_jour, count(*),
+         round(avg(m.poids), 2),
+         round(avg(m.frequence_cardiaque), 2),
+         round(avg(m.sommeil), 2),
+         COALESCE(sum(m.calories_brulees), 0)
+  FROM public.mesures_biometriques m
+  WHERE m.id_utilisateur = p_utilisateur
+    AND m.date_mesure >= p_jour::TIMESTAMP AT TIME ZONE 'UTC'
+    AND m.date_mesure < (p_jour + 1)::TIMESTAMP AT TIME ZONE 'UTC'
+  HAVING count(*) > 0;
+END;
+$$;
+
+-- ============================================
+-- Triggers (par instruction, tables de transition)
+-- ============================================
+CREATE OR REPLACE FUNCTION public.trg_cumul_nutrition()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM public.cumul_nutrition_jour(s.id_utilisateur, s.jour)
+    FROM (SELECT DISTINCT id_utilisateur, public.jour_utc(date_consommation) AS jour FROM nouvelles) s;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM public.cumul_nutrition_jour(s.id_utilisateur, s.jour)
+    FROM (SELECT DISTINCT id_utilisateur, public.jour_utc(date_consommation) AS jour FROM anciennes) s;
+  ELSE
+    PERFORM public.cumul_nutrition_jour(s.id_utilisateur, s.jour)
+    FROM (
+      SELECT id_utilisateur, public.jour_utc(date_consommation) AS jour FROM anciennes
+      UNION
+      SELECT id_utilisateur, public.jour_utc(date_consommation) FROM nouvelles
+    ) s;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.trg_cumul_training()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM public.cumul_training_jour(s.id_utilisateur, s.jour)
+    FROM (SELECT DISTINCT id_utilisateur, public.jour_utc(date_session) AS jour FROM nouvelles) s;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM public.cumul_training_jour(s.id_utilisateur, s.jour)
+    FROM (SELECT DISTINCT id_utilisateur, public.jour_utc(date_session) AS jour FROM anciennes) s;
+  ELSE
+    PERFORM public.cumul_training_jour(s.id_utilisateur, s.jour)
+    FROM (
+      SELECT id_utilisateur, public.jour_utc(date_session) AS jour FROM anciennes
+      UNION
+      SELECT id_utilisateur, public.jour_utc(date_session) FROM nouvelles
+    ) s;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.trg_cumul_biometrics()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM public.cumul_biometrics_jour(s.id_utilisateur, s.jour)
+    FROM (SELECT DISTINCT id_utilisateur, public.jour_utc(date_mesure) AS jour FROM nouvelles) s;
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM public.cumul_biometrics_jour(s.id_utilisateur, s.jour)
+    FROM (SELECT DISTINCT id_utilisateur, public.jour_utc(date_mesure) AS jour FROM anciennes) s;
+  ELSE
+    PERFORM public.cumul_biometrics_jour(s.id_utilisateur, s.jour)
+    FROM (
+      SELECT id_utilisateur, public.jour_utc(date_mesure) AS jour FROM anciennes
+      UNION
+      SELECT id_utilisateur, public.jour_utc(date_mesure) FROM nouvelles
+    ) s;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Valeurs nutritionnelles d'un aliment modifiées (ETL) : seaux des entrées qui l'utilisent
+CREATE OR REPLACE FUNCTION public.trg_cumul_nutrition_aliments()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM public.cumul_nutrition_jour(s.id_utilisateur, s.jour)
+  FROM (
+    SELECT DISTINCT j.id_utilisateur, public.jour_utc(j.date_consommation) AS jour
+    FROM nouvelles n
+    JOIN anciennes o ON o.id_aliment = n.id_aliment
+    JOIN public.journal_alimentaire j ON j.id_aliment = n.id_aliment
+    WHERE (n.calories, n.proteines, n.glucides, n.lipides, n.fibres)
+          IS DISTINCT FROM (o.calories, o.proteines, o.glucides, o.lipides, o.fibres)
+  ) s;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS cumul_nutrition_insert ON public.journal_alimentaire;
+DROP TRIGGER IF EXISTS cumul_nutrition_update ON public.journal_alimentaire;
+DROP TRIGGER IF EXISTS cumul_nutrition_delete ON public.journal_alimentaire;
+CREATE TRIGGER cumul_nutrition_insert AFTER INSERT ON public.journal_alimentaire
+    REFERENCING NEW TABLE AS nouvelles
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_nutrition();
+CREATE TRIGGER cumul_nutrition_update AFTER UPDATE ON public.journal_alimentaire
+    REFERENCING OLD TABLE AS anciennes NEW TABLE AS nouvelles
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_nutrition();
+CREATE TRIGGER cumul_nutrition_delete AFTER DELETE ON public.journal_alimentaire
+    REFERENCING OLD TABLE AS anciennes
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_nutrition();
+
+DROP TRIGGER IF EXISTS cumul_nutrition_aliments ON public.aliments;
+CREATE TRIGGER cumul_nutrition_aliments AFTER UPDATE ON public.aliments
+    REFERENCING OLD TABLE AS anciennes NEW TABLE AS nouvelles
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_nutrition_aliments();
+
+DROP TRIGGER IF EXISTS cumul_training_insert ON public.sessions_sport;
+DROP TRIGGER IF EXISTS cumul_training_update ON public.sessions_sport;
+DROP TRIGGER IF EXISTS cumul_training_delete ON public.sessions_sport;
+CREATE TRIGGER cumul_training_insert AFTER INSERT ON public.sessions_sport
+    REFERENCING NEW TABLE AS nouvelles
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_training();
+CREATE TRIGGER cumul_training_update AFTER UPDATE ON public.sessions_sport
+    REFERENCING OLD TABLE AS anciennes NEW TABLE AS nouvelles
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_training();
+CREATE TRIGGER cumul_training_delete AFTER DELETE ON public.sessions_sport
+    REFERENCING OLD TABLE AS anciennes
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_training();
+
+DROP TRIGGER IF EXISTS cumul_biometrics_insert ON public.mesures_biometriques;
+DROP TRIGGER IF EXISTS cumul_biometrics_update ON public.mesures_biometriques;
+DROP TRIGGER IF EXISTS cumul_biometrics_delete ON public.mesures_biometriques;
+CREATE TRIGGER cumul_biometrics_insert AFTER INSERT ON public.mesures_biometriques
+    REFERENCING NEW TABLE AS nouvelles
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_biometrics();
+CREATE TRIGGER cumul_biometrics_update AFTER UPDATE ON public.mesures_biometriques
+    REFERENCING OLD TABLE AS anciennes NEW TABLE AS nouvelles
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_biometrics();
+CREATE TRIGGER cumul_biometrics_delete AFTER DELETE ON public.mesures_biometriques
+    REFERENCING OLD TABLE AS anciennes
+    FOR EACH STATEMENT EXECUTE FUNCTION public.trg_cumul_biometrics();
+
+-- ============================================
+-- Recalcul en bloc d'une plage de jours (remplissage initial, réparation)
+-- ============================================
+CREATE OR REPLACE FUNCTION public.recalculer_cumuls(p_debut DATE, p_fin DATE)
+RETURNS TABLE (cumul TEXT, lignes BIGINT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_debut TIMESTAMPTZ := p_debut::TIMESTAMP AT TIME ZONE 'UTC';
+  v_fin TIMESTAMPTZ := (p_fin + 1)::TIMESTAMP AT TIME ZONE 'UTC';
+  v_lignes BIGINT;
+BEGIN
+  DELETE FROM public.user_daily_nutrition WHERE jour BETWEEN p_debut AND p_fin;
+  INSERT INTO public.user_daily_nutrition
+    (id_utilisateur, jour, calories, proteines, glucides, lipides, fibres, nb_entrees)
+  SELECT j.id_utilisateur, public.jour_utc(j.date_consommation),
+         round(sum(a.calories * j.quantite / 100), 2),
+         round(sum(a.proteines * j.quantite / 100), 2),
+         round(sum(a.glucides * j.quantite / 100), 2),
+         round(sum(a.lipides * j.quantite / 100), 2),
+         round(sum(a.fibres * j.quantite / 100), 2),
+         count(*)
+  FROM public.journal_alimentaire j
+  JOIN public.aliments a ON a.id_aliment = j.id_aliment
+  WHERE j.id_utilisateur IS NOT NULL
+    AND j.date_consommation >= v_debut AND j.date_consommation < v_fin
+  GROUP BY 1, 2
+  ON CONFLICT (id_utilisateur, jour) DO UPDATE SET
+    calories = EXCLUDED.calories, proteines = EXCLUDED.proteines, glucides = EXCLUDED.glucides,
+    lipides = EXCLUDED.lipides, fibres = EXCLUDED.fibres, nb_entrees = EXCLUDED.nb_entrees;
+  GET DIAGNOSTICS v_lignes = ROW_COUNT;
+  cumul := 'user_daily_nutrition'; lignes := v_lignes; RETURN NEXT;
+
+  DELETE FROM public.user_daily_training WHERE jour BETWEEN p_debut AND p_fin;
+  INSERT INTO public.user_daily_training (id_utilisateur, jour, nb_sessions, duree_totale)
+  SELECT s.id_utilisateur, public.jour_utc(s.date_session), count(*), COALESCE(sum(s.duree), 0)
+  FROM public.sessions_sport s
+  WHERE s.id_utilisateur IS NOT NULL
+    AND s.date_session >= v_debut AND s.date_session < v_fin
+  GROUP BY 1, 2
+  ON CONFLICT (id_utilisateur, jour) DO UPDATE SET
+    nb_sessions = EXCLUDED.nb_sessions, duree_totale = EXCLUDED.duree_totale;
+  GET DIAGNOSTICS v_lignes = ROW_COUNT;
+  cumul := 'user_daily_training'; lignes := v_lignes; RETURN NEXT;
+
+  DELETE FROM public.user_daily_biometrics WHERE jour BETWEEN p_debut AND p_fin;
+  INSERT INTO public.user_daily_biometrics
+    (id_utilisateur, jour, nb_mesures, poids_moyen, frequence_cardiaque_moyenne, sommeil_moyen, calories_brulees)
+  SELECT m.id_utilisateur, public.jour_utc(m.date_mesure), count(*),
+         round(avg(m.poids), 2), round(avg(m.frequence_cardiaque), 2), round(avg(m.sommeil), 2),
+         COALESCE(sum(m.calories_brulees), 0)
+  FROM public.mesures_biometriques m
+  WHERE m.id_utilisateur IS NOT NULL
+    AND m.date_mesure >= v_debut AND m.date_mesure < v_fin
+  GROUP BY 1, 2
+  ON CONFLICT (id_utilisateur, jour) DO UPDATE SET
+    nb_mesures = EXCLUDED.nb_mesures, poids_moyen = EXCLUDED.poids_moyen,
+    frequence_cardiaque_moyenne = EXCLUDED.frequence_cardiaque_moyenne,
+    sommeil_moyen = EXCLUDED.sommeil_moyen, calories_brulees = EXCLUDED.calories_brulees;
+  GET DIAGNOSTICS v_lignes = ROW_COUNT;
+  cumul := 'user_daily_biometrics'; lignes := v_lignes; RETURN NEXT;
+END;
+$$;
+
+-- ============================================
+-- Lectures sur les cumuls
+-- ============================================
+-- GET /journal/summary : même signature que 20261017160000, lit les cumuls journaliers
+CREATE OR REPLACE FUNCTION public.resume_nutrition(
+  p_utilisateur UUID,
+  p_granularite TEXT DEFAULT 'day',
+  p_debut DATE DEFAULT NULL,
+  p_fin DATE DEFAULT NULL
+)
+RETURNS TABLE (
+  periode DATE,
+  calories NUMERIC,
+  proteines NUMERIC,
+  glucides NUMERIC,
+  lipides NUMERIC,
+  fibres NUMERIC,
+  nb_entrees BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT date_trunc(p_granularite, c.jour)::DATE AS periode,
+         sum(c.calories), sum(c.proteines), sum(c.glucides), sum(c.lipides), sum(c.fibres),
+         sum(c.nb_entrees)::BIGINT
+  FROM public.user_daily_nutrition c
+  WHERE (p_utilisateur IS NULL OR c.id_utilisateur = p_utilisateur)
+    AND (p_debut IS NULL OR c.jour >= p_debut)
+    AND (p_fin IS NULL OR c.jour <= p_fin)
+  GROUP BY 1
+  ORDER BY 1
+$$;
+
+-- GET /stats : saisies depuis p_depuis (inclus), tous utilisateurs
+CREATE OR REPLACE FUNCTION public.activite_recente(p_depuis DATE)
+RETURNS TABLE (journal BIGINT, sessions BIGINT, mesures BIGINT)
+LANGUAGE sql STABLE
+AS $$
+  SELECT
+    (SELECT COALESCE(sum(nb_entrees), 0) FROM public.user_daily_nutrition WHERE jour >= p_depuis)::BIGINT,
+    (SELECT COALESCE(sum(nb_sessions), 0) FROM public.user_daily_training WHERE jour >= p_depuis)::BIGINT,
+    (SELECT COALESCE(sum(nb_mesures), 0) FROM public.user_daily_biometrics WHERE jour >= p_depuis)::BIGINT
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.recalculer_cumuls(DATE, DATE) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.recalculer_cumuls(DATE, DATE) TO service_role;
+REVOKE EXECUTE ON FUNCTION public.activite_recente(DATE) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.activite_recente(DATE) TO service_role;
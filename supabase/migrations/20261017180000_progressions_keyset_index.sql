@@ -0,0 +1,6 @@
+-- Export de l'historique (GET /export) : lecture keyset (date, id) DESC des
+-- progressions d'un utilisateur, comme journal / mesures / sessions (20261017120000).
+
+CREATE INDEX IF NOT EXISTS idx_progressions_utilisateur_date_id
+  ON public.progressions (id_utilisateur, date_progression DESC, id_progression DESC);
+DROP INDEX IF EXISTS public.idx_progressions_utilisateur;
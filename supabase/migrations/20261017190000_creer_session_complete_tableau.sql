@@ -0,0 +1,48 @@
+-- creer_session_complete (20261017150000), corrigée :
+--   - retourne un tableau d'un élément : PostgREST renvoie le JSONB tel quel et
+--     postgrest-py attend une liste dans APIResponse.data ;
+--   - exercices joints en LEFT JOIN, comme la lecture directe (pg_repository) ;
+--   - date_session insérée telle que reçue (NULL si omise), comme l'ancien insert PostgREST.
+
+CREATE OR REPLACE FUNCTION public.creer_session_complete(p_session JSONB, p_exercices JSONB DEFAULT '[]')
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_session public.sessions_sport;
+BEGIN
+  INSERT INTO public.sessions_sport (id_utilisateur, duree, intensite, date_session)
+  VALUES (
+    (p_session->>'id_utilisateur')::UUID,
+    (p_session->>'duree')::INT,
+    p_session->>'intensite',
+    (p_session->>'date_session')::TIMESTAMPTZ
+  )
+  RETURNING * INTO v_session;
+
+  INSERT INTO public.session_exercices
+    (id_session, id_exercice, nombre_series, nombre_repetitions, poids, duree)
+  SELECT v_session.id_session, e.id_exercice, COALESCE(e.nombre_series, 1),
+         e.nombre_repetitions, e.poids, e.duree
+  FROM jsonb_to_recordset(COALESCE(p_exercices, '[]')) AS e(
+    id_exercice UUID, nombre_series INT, nombre_repetitions INT, poids NUMERIC, duree INT
+  );
+
+  RETURN jsonb_build_array(to_jsonb(v_session) || jsonb_build_object(
+    'session_exercices',
+    COALESCE((
+      SELECT jsonb_agg(jsonb_build_object(
+               'id_exercice', se.id_exercice,
+               'nombre_series', se.nombre_series,
+               'nombre_repetitions', se.nombre_repetitions,
+               'poids', se.poids,
+               'duree', se.duree,
+               'exercices', jsonb_build_object('nom', x.nom)
+             ))
+      FROM public.session_exercices se
+      LEFT JOIN public.exercices x ON x.id_exercice = se.id_exercice
+      WHERE se.id_session = v_session.id_session
+    ), '[]'::JSONB)
+  ));
+END;
+$$;
@@ -0,0 +1,21 @@
+-- Pagination par curseur : les dates sont nullables (colonne omise par le client).
+-- Les listes trient désormais par (date DESC NULLS LAST, id DESC) : lignes sans date
+-- en fin de liste, curseur « null » (voir api/app/core/pagination.py). Les index
+-- composites (20261017120000, 20261017180000) sont recréés dans le même ordre
+-- (DESC seul place les NULL en tête et ne servirait plus le tri).
+
+DROP INDEX IF EXISTS public.idx_journal_utilisateur_date_id;
+CREATE INDEX IF NOT EXISTS idx_journal_utilisateur_date_id
+  ON public.journal_alimentaire (id_utilisateur, date_consommation DESC NULLS LAST, id_journal DESC);
+
+DROP INDEX IF EXISTS public.idx_mesures_utilisateur_date_id;
+CREATE INDEX IF NOT EXISTS idx_mesures_utilisateur_date_id
+  ON public.mesures_biometriques (id_utilisateur, date_mesure DESC NULLS LAST, id_mesure DESC);
+
+DROP INDEX IF EXISTS public.idx_sessions_utilisateur_date_id;
+CREATE INDEX IF NOT EXISTS idx_sessions_utilisateur_date_id
+  ON public.sessions_sport (id_utilisateur, date_session DESC NULLS LAST, id_session DESC);
+
+DROP INDEX IF EXISTS public.idx_progressions_utilisateur_date_id;
+CREATE INDEX IF NOT EXISTS idx_progressions_utilisateur_date_id
+  ON public.progressions (id_utilisateur, date_progression DESC NULLS LAST, id_progression DESC);
@@ -0,0 +1,42 @@
+-- Autocomplétion (/suggest) sans instantané mémoire : même correspondance que
+-- PrefixIndex (api/app/core/suggest.py) — nom normalisé (minuscules, sans accents)
+-- dont un mot commence par le préfixe. Les jokers LIKE du préfixe (%, _) sont
+-- échappés. Les LIKE sont servis par les index GIN trigrammes (20261017130000).
+-- Popularité à 0 : elle n'est calculée qu'au chargement de l'instantané.
+
+CREATE OR REPLACE FUNCTION public.suggerer_aliments(prefixe TEXT, p_limit INT DEFAULT 10)
+RETURNS TABLE (id UUID, nom TEXT, popularite INT)
+LANGUAGE sql STABLE
+SET search_path = public, extensions
+AS $$
+  WITH q AS (
+    SELECT replace(replace(replace(public.nom_normalise(btrim(prefixe)), '\', '\\'), '%', '\%'), '_', '\_') AS t
+  )
+  SELECT a.id_aliment, a.nom::TEXT, 0
+  FROM public.aliments a, q
+  WHERE q.t <> ''
+    AND (public.nom_normalise(a.nom) LIKE q.t || '%'
+         OR public.nom_normalise(a.nom) LIKE '% ' || q.t || '%')
+  ORDER BY a.nom
+  LIMIT p_limit
+$$;
+
+CREATE OR REPLACE FUNCTION public.suggerer_exercices(prefixe TEXT, p_limit INT DEFAULT 10)
+RETURNS TABLE (id UUID, nom TEXT, popularite INT)
+LANGUAGE sql STABLE
+SET search_path = public, extensions
+AS $$
+  WITH q AS (
+    SELECT replace(replace(replace(public.nom_normalise(btrim(prefixe)), '\', '\\'), '%', '\%'), '_', '\_') AS t
+  )
+  SELECT e.id_exercice, e.nom::TEXT, 0
+  FROM public.exercices e, q
+  WHERE q.t <> ''
+    AND (public.nom_normalise(e.nom) LIKE q.t || '%'
+         OR public.nom_normalise(e.nom) LIKE '% ' || q.t || '%')
+  ORDER BY e.nom
+  LIMIT p_limit
+$$;
+
+GRANT EXECUTE ON FUNCTION public.suggerer_aliments(TEXT, INT) TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.suggerer_exercices(TEXT, INT) TO anon, authenticated, service_role;
@@ -0,0 +1,95 @@
+-- Cumuls journaliers (20261017170000) : remplissage initial et lectures entraînement /
+-- biométrie.
+--
+-- resume_nutrition et activite_recente lisent les cumuls depuis 20261017170000 : les
+-- tables sont remplies ici, dans la même mise en production, à partir des lignes brutes
+-- existantes. scripts/backfill_rollups.py ne sert plus qu'à la réparation (plage de
+-- dates, un mois par transaction).
+
+-- ============================================
+-- Remplissage initial
+-- ============================================
+DO $$
+DECLARE
+  v_debut DATE;
+  v_fin DATE;
+BEGIN
+  SELECT min(jour), max(jour) INTO v_debut, v_fin
+  FROM (
+    SELECT public.jour_utc(min(date_consommation)) AS jour FROM public.journal_alimentaire
+    UNION ALL SELECT public.jour_utc(max(date_consommation)) FROM public.journal_alimentaire
+    UNION ALL SELECT public.jour_utc(min(date_session)) FROM public.sessions_sport
+    UNION ALL SELECT public.jour_utc(max(date_session)) FROM public.sessions_sport
+    UNION ALL SELECT public.jour_utc(min(date_mesure)) FROM public.mesures_biometriques
+    UNION ALL SELECT public.jour_utc(max(date_mesure)) FROM public.mesures_biometriques
+  ) bornes;
+
+  IF v_debut IS NOT NULL THEN
+    PERFORM public.recalculer_cumuls(v_debut, v_fin);
+  END IF;
+END;
+$$;
+
+-- ============================================
+-- Lectures sur les cumuls
+-- ============================================
+-- GET /sessions/summary : nombre et durée des sessions par période
+CREATE OR REPLACE FUNCTION public.resume_entrainement(
+  p_utilisateur UUID,
+  p_granularite TEXT DEFAULT 'day',
+  p_debut DATE DEFAULT NULL,
+  p_fin DATE DEFAULT NULL
+)
+RETURNS TABLE (
+  periode DATE,
+  nb_sessions BIGINT,
+  duree_totale BIGINT
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT date_trunc(p_granularite, c.jour)::DATE AS periode,
+         sum(c.nb_sessions)::BIGINT, sum(c.duree_totale)::BIGINT
+  FROM public.user_daily_training c
+  WHERE (p_utilisateur IS NULL OR c.id_utilisateur = p_utilisateur)
+    AND (p_debut IS NULL OR c.jour >= p_debut)
+    AND (p_fin IS NULL OR c.jour <= p_fin)
+  GROUP BY 1
+  ORDER BY 1
+$$;
+
+-- GET /mesures/summary : moyennes par période = moyenne des moyennes journalières
+-- (un jour à dix pesées compte autant qu'un jour à une seule)
+CREATE OR REPLACE FUNCTION public.resume_biometrie(
+  p_utilisateur UUID,
+  p_granularite TEXT DEFAULT 'day',
+  p_debut DATE DEFAULT NULL,
+  p_fin DATE DEFAULT NULL
+)
+RETURNS TABLE (
+  periode DATE,
+  nb_mesures BIGINT,
+  poids_moyen NUMERIC,
+  frequence_cardiaque_moyenne NUMERIC,
+  sommeil_moyen NUMERIC,
+  calories_brulees NUMERIC
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT date_trunc(p_granularite, c.jour)::DATE AS periode,
+         sum(c.nb_mesures)::BIGINT,
+         round(avg(c.poids_moyen), 2),
+         round(avg(c.frequence_cardiaque_moyenne), 2),
+         round(avg(c.sommeil_moyen), 2),
+         sum(c.calories_brulees)
+  FROM public.user_daily_biometrics c
+  WHERE (p_utilisateur IS NULL OR c.id_utilisateur = p_utilisateur)
+    AND (p_debut IS NULL OR c.jour >= p_debut)
+    AND (p_fin IS NULL OR c.jour <= p_fin)
+  GROUP BY 1
+  ORDER BY 1
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.resume_entrainement(UUID, TEXT, DATE, DATE) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.resume_entrainement(UUID, TEXT, DATE, DATE) TO service_role;
+REVOKE EXECUTE ON FUNCTION public.resume_biometrie(UUID, TEXT, DATE, DATE) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.resume_biometrie(UUID, TEXT, DATE, DATE) TO service_role;
@@ -0,0 +1,48 @@
+-- rechercher_aliments / rechercher_exercices (20261017130000) : le terme saisi était
+-- concaténé tel quel dans le motif LIKE, « _ » ou « % » y devenaient des jokers
+-- (« 100% » trouvait tout). Motif échappé comme dans suggerer_* (20261017210000) ;
+-- la similarité trigramme garde le terme normalisé brut.
+
+CREATE OR REPLACE FUNCTION public.rechercher_aliments(
+  terme TEXT,
+  p_limit INT DEFAULT 100,
+  p_offset INT DEFAULT 0
+)
+RETURNS SETOF public.aliments
+LANGUAGE sql STABLE
+SET search_path = public, extensions
+AS $$
+  WITH q AS (SELECT public.nom_normalise(terme) AS t),
+  m AS (SELECT q.t, replace(replace(replace(q.t, '\', '\\'), '%', '\%'), '_', '\_') AS motif FROM q)
+  SELECT a.*
+  FROM public.aliments a, m
+  WHERE public.nom_normalise(a.nom) LIKE '%' || m.motif || '%'
+     OR public.nom_normalise(a.nom) % m.t
+  ORDER BY similarity(public.nom_normalise(a.nom), m.t) DESC, a.nom
+  LIMIT p_limit OFFSET p_offset
+$$;
+
+CREATE OR REPLACE FUNCTION public.rechercher_exercices(
+  terme TEXT,
+  p_type TEXT DEFAULT NULL,
+  p_groupe_musculaire TEXT DEFAULT NULL,
+  p_niveau TEXT DEFAULT NULL,
+  p_limit INT DEFAULT 100,
+  p_offset INT DEFAULT 0
+)
+RETURNS SETOF public.exercices
+LANGUAGE sql STABLE
+SET search_path = public, extensions
+AS $$
+  WITH q AS (SELECT public.nom_normalise(terme) AS t),
+  m AS (SELECT q.t, replace(replace(replace(q.t, '\', '\\'), '%', '\%'), '_', '\_') AS motif FROM q)
+  SELECT e.*
+  FROM public.exercices e, m
+  WHERE (public.nom_normalise(e.nom) LIKE '%' || m.motif || '%'
+         OR public.nom_normalise(e.nom) % m.t)
+    AND (p_type IS NULL OR e.type = p_type)
+    AND (p_groupe_musculaire IS NULL OR e.groupe_musculaire = p_groupe_musculaire)
+    AND (p_niveau IS NULL OR e.niveau = p_niveau)
+  ORDER BY similarity(public.nom_normalise(e.nom), m.t) DESC, e.nom
+  LIMIT p_limit OFFSET p_offset
+$$;
@@ -5,7 +5,7 @@ Patche le client Supabase avant l'import de l'app pour ne pas nécessiter de vra
 
 import os
 import sys
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Ajouter le dossier api/ au path Python
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "api"))
@@ -19,17 +19,29 @@ os.environ.setdefault("JWT_SECRET", "super-secret-test-key-for-pytest-only-12345
 
 import pytest
 
+
+class AsyncQueryMock(MagicMock):
+    """MagicMock chaînable dont ``.execute()`` est awaitable (client PostgREST async)."""
+
+    def _get_child_mock(self, **kw):
+        if kw.get("name") == "execute":
+            return AsyncMock(**kw)
+        return AsyncQueryMock(**kw)
+
+
 # Mock du client Supabase avant tout import de l'app
 _mock_supabase = MagicMock()
-_mock_supabase_admin = MagicMock()
+_mock_supabase_admin = AsyncQueryMock()
 
 with patch("supabase.create_client", return_value=_mock_supabase):
     from fastapi.testclient import TestClient
     from app.main import app
     from app.api.v1 import deps as _deps
     import app.core.database as db
+    import app.core.user_profile as user_profile
     db.supabase = _mock_supabase
     db.supabase_admin = _mock_supabase_admin
+    user_profile.supabase_admin = _mock_supabase_admin
 
     async def _fake_require_admin():
         return {
@@ -56,7 +68,7 @@ def mock_db(monkeypatch):
     Utilise des MagicMock frais pour isoler chaque test.
     """
     mock_supa = MagicMock()
-    mock_admin = MagicMock()
+    mock_admin = AsyncQueryMock()
     monkeypatch.setattr("app.core.database.supabase", mock_supa)
     monkeypatch.setattr("app.core.database.supabase_admin", mock_admin)
     # Propager aux modules déjà importés
@@ -66,9 +78,13 @@ def mock_db(monkeypatch):
     import app.api.v1.endpoints.utilisateurs as u_mod
     import app.api.v1.endpoints.aliments as al_mod
     import app.api.v1.endpoints.exercices as ex_mod
+    import app.api.v1.endpoints.stats as st_mod
+    import app.api.v1.endpoints.export as exp_mod
     import app.api.v1.endpoints.auth as auth_mod
-    for mod in [j_mod, s_mod, m_mod, u_mod, al_mod, ex_mod]:
+    for mod in [j_mod, s_mod, m_mod, u_mod, al_mod, ex_mod, st_mod, exp_mod]:
         monkeypatch.setattr(mod, "supabase_admin", mock_admin)
+    from app.core.user_profile import profile_cache
+    profile_cache.clear()
     monkeypatch.setattr(auth_mod, "supabase", mock_supa)
     monkeypatch.setattr(auth_mod, "supabase_admin", mock_admin)
     return mock_supa, mock_admin
@@ -86,3 +102,12 @@ def auth_headers():
     payload = {"sub": "user-test-uuid-1234", "email": "test@example.com"}
     token = jose_jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def ops_headers(monkeypatch):
+    """Headers Bearer du scraper (METRICS_TOKEN) pour /metrics et /api/v1/health/*."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "metrics-test-token")
+    return {"Authorization": "Bearer metrics-test-token"}
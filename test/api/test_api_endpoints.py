@@ -3,10 +3,13 @@ Tests pytest pour les endpoints CRUD de l'API.
 Remplace l'ancien script de test manuel.
 """
 
+import io
+import json
 import pytest
 from unittest.mock import MagicMock
 from uuid import uuid4
 from datetime import datetime
+from postgrest.base_request_builder import APIResponse
 
 
 # ---------------------------------------------------------------------------
@@ -256,6 +259,112 @@ class TestJournal:
         assert response.status_code in (401, 403)
 
 
+@pytest.fixture
+def as_user():
+    from app.main import app
+    from app.api.v1 import deps
+
+    profile = {"id": "user", "email": "", "id_utilisateur": str(uuid4()), "app_role": "user"}
+
+    async def _user_profile():
+        return profile
+
+    app.dependency_overrides[deps.get_current_profile] = _user_profile
+    yield profile
+    app.dependency_overrides.pop(deps.get_current_profile, None)
+
+
+class TestJournalBulk:
+    def _payload(self, n):
+        return [{"id_utilisateur": str(uuid4()), "id_aliment": str(uuid4()), "quantite": 100.0 + i} for i in range(n)]
+
+    def test_single_insert_with_ownership(self, client, mock_db, as_user):
+        _, mock_admin = mock_db
+        payload = self._payload(3)
+        table = mock_admin.table.return_value
+        table.select.return_value.in_.return_value.execute.return_value = MagicMock(
+            data=[{"id_aliment": p["id_aliment"]} for p in payload]
+        )
+        created = [
+            {**TestJournal()._journal_entry(), "id_aliment": p["id_aliment"], "id_utilisateur": as_user["id_utilisateur"]}
+            for p in payload
+        ]
+        table.insert.return_value.execute.return_value = MagicMock(data=created)
+
+        response = client.post("/api/v1/journal/bulk", json=payload)
+        assert response.status_code == 201
+        assert len(response.json()) == 3
+        table.insert.assert_called_once()
+        inserted = table.insert.call_args[0][0]
+        assert {row["id_utilisateur"] for row in inserted} == {as_user["id_utilisateur"]}
+
+    def test_unknown_aliment_reported_per_item(self, client, mock_db, as_user):
+        _, mock_admin = mock_db
+        payload = self._payload(3)
+        table = mock_admin.table.return_value
+        table.select.return_value.in_.return_value.execute.return_value = MagicMock(
+            data=[{"id_aliment": payload[0]["id_aliment"]}, {"id_aliment": payload[2]["id_aliment"]}]
+        )
+
+        response = client.post("/api/v1/journal/bulk", json=payload)
+        assert response.status_code == 422
+        assert [e["loc"] for e in response.json()["detail"]] == [["body", 1, "id_aliment"]]
+        table.insert.assert_not_called()
+
+    def test_snapshot_miss_confirmed_in_database(self, client, mock_db, as_user):
+        from app.core.catalog import aliments_catalog
+        _, mock_admin = mock_db
+        payload = self._payload(2)
+        known = make_aliment()
+        known["id_aliment"] = payload[0]["id_aliment"]
+        table = mock_admin.table.return_value
+        # Instantané chargé sans le second aliment (créé depuis par l'ETL), présent en base
+        table.select.return_value.in_.return_value.execute.return_value = MagicMock(
+            data=[{"id_aliment": payload[1]["id_aliment"]}]
+        )
+        table.insert.return_value.execute.return_value = MagicMock(data=[
+            {**TestJournal()._journal_entry(), "id_aliment": p["id_aliment"]} for p in payload
+        ])
+        aliments_catalog._rows = [known]
+        aliments_catalog._by_id = {known["id_aliment"]: known}
+        try:
+            response = client.post("/api/v1/journal/bulk", json=payload)
+        finally:
+            aliments_catalog._rows = None
+            aliments_catalog._by_id = {}
+        assert response.status_code == 201
+        # Seul l'identifiant absent de l'instantané est vérifié en base
+        table.select.return_value.in_.assert_called_once_with("id_aliment", [payload[1]["id_aliment"]])
+
+    def test_schema_errors_and_size_limits(self, client, mock_db, as_user):
+        payload = self._payload(2)
+        payload[1]["quantite"] = 0
+        response = client.post("/api/v1/journal/bulk", json=payload)
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", 1, "quantite"]
+        assert client.post("/api/v1/journal/bulk", json=[]).status_code == 422
+
+
+class TestJournalSummary:
+    def test_summary_aggregated_in_database(self, client, mock_db, as_user):
+        _, mock_admin = mock_db
+        row = {"periode": "2026-10-12", "calories": 1850.5, "proteines": 92.0, "glucides": 210.25,
+               "lipides": 61.0, "fibres": 24.0, "nb_entrees": 9}
+        mock_admin.rpc.return_value.execute.return_value = MagicMock(data=[row])
+
+        response = client.get(f"/api/v1/journal/summary?granularity=week&date_debut=2026-10-01&utilisateur_id={uuid4()}")
+        assert response.status_code == 200
+        assert response.json() == [row]
+        name, args = mock_admin.rpc.call_args[0]
+        assert name == "resume_nutrition"
+        assert args == {"p_utilisateur": as_user["id_utilisateur"], "p_granularite": "week",
+                        "p_debut": "2026-10-01", "p_fin": None}
+        mock_admin.table.assert_not_called()
+
+    def test_invalid_granularity_422(self, client, mock_db, as_user):
+        assert client.get("/api/v1/journal/summary?granularity=year").status_code == 422
+
+
 # ---------------------------------------------------------------------------
 # Sessions (routes protégées)
 # ---------------------------------------------------------------------------
@@ -291,16 +400,41 @@ class TestSessions:
     def test_create_with_auth(self, client, mock_db, auth_headers):
         _, mock_admin = mock_db
         session = self._session()
-        mock_admin.table.return_value.insert.return_value.execute.return_value = MagicMock(data=[session])
         mock_admin.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(data=[session])
+        exercice = {"id_exercice": str(uuid4()), "nombre_series": 3, "nombre_repetitions": 10, "poids": 20.0, "duree": None}
+        # Forme réelle : la fonction retourne un tableau JSONB d'un élément
+        mock_admin.rpc.return_value.execute.return_value = APIResponse(
+            data=[{**session, "session_exercices": [{**exercice, "exercices": {"nom": "Squat"}}]}], count=None
+        )
 
         payload = {
             "id_utilisateur": str(uuid4()),
             "duree": 45,
             "intensite": "elevee",
+            "exercices": [{"id_exercice": exercice["id_exercice"], "nombre_series": 3, "nombre_repetitions": 10, "poids": 20.0}],
         }
         response = client.post("/api/v1/sessions", json=payload, headers=auth_headers)
         assert response.status_code == 201
+        assert response.json()["session_exercices"][0]["exercices"] == {"nom": "Squat"}
+        # Un seul appel : session et exercices dans la même transaction
+        mock_admin.rpc.assert_called_once()
+        name, args = mock_admin.rpc.call_args[0]
+        assert name == "creer_session_complete"
+        assert args["p_exercices"][0]["id_exercice"] == exercice["id_exercice"]
+        mock_admin.table.return_value.insert.assert_not_called()
+
+    def test_summary_reads_training_rollups(self, client, mock_db, as_user):
+        _, mock_admin = mock_db
+        row = {"periode": "2026-10-01", "nb_sessions": 12, "duree_totale": 540}
+        mock_admin.rpc.return_value.execute.return_value = MagicMock(data=[row])
+
+        response = client.get("/api/v1/sessions/summary?granularity=month")
+        assert response.status_code == 200
+        assert response.json() == [row]
+        name, args = mock_admin.rpc.call_args[0]
+        assert name == "resume_entrainement"
+        assert args["p_utilisateur"] == as_user["id_utilisateur"] and args["p_granularite"] == "month"
+        mock_admin.table.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
@@ -314,3 +448,320 @@ class TestMesures:
             "poids": 72.5,
         })
         assert response.status_code in (401, 403)
+
+
+class TestMesuresSeries:
+    def test_series_downsampled_to_points(self, client, mock_db, as_user):
+        from datetime import timedelta
+        _, mock_admin = mock_db
+        start = datetime(2026, 1, 1)
+        rows = [
+            {"date_mesure": (start + timedelta(hours=h)).isoformat() + "+00:00", "valeur": 70 + (h % 24) / 10}
+            for h in range(2500)
+        ]
+        rows[1234]["valeur"] = 95.0  # pic à conserver
+        chain = mock_admin.table.return_value.select.return_value.eq.return_value.not_.is_.return_value
+        chain.order.return_value.range.return_value.execute.side_effect = [
+            MagicMock(data=rows[:1000]), MagicMock(data=rows[1000:2000]), MagicMock(data=rows[2000:]),
+        ]
+
+        response = client.get("/api/v1/mesures/series?metric=poids&points=100")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] == 2500 and len(body["points"]) == 100
+        assert body["points"][0]["date"].startswith("2026-01-01T00:00")
+        assert max(p["valeur"] for p in body["points"]) == 95.0
+        mock_admin.table.return_value.select.assert_called_with("date_mesure,valeur:poids")
+        mock_admin.table.return_value.select.return_value.eq.assert_called_with("id_utilisateur", as_user["id_utilisateur"])
+
+    def test_unknown_metric_422(self, client, mock_db, as_user):
+        assert client.get("/api/v1/mesures/series?metric=id_utilisateur").status_code == 422
+
+
+class TestMesuresSummary:
+    def test_summary_reads_biometrics_rollups(self, client, mock_db, as_user):
+        _, mock_admin = mock_db
+        row = {"periode": "2026-10-12", "nb_mesures": 5, "poids_moyen": 72.4, "frequence_cardiaque_moyenne": None,
+               "sommeil_moyen": 7.5, "calories_brulees": 2100.0}
+        mock_admin.rpc.return_value.execute.return_value = MagicMock(data=[row])
+
+        response = client.get("/api/v1/mesures/summary?granularity=week&date_fin=2026-10-18")
+        assert response.status_code == 200
+        assert response.json() == [row]
+        name, args = mock_admin.rpc.call_args[0]
+        assert name == "resume_biometrie"
+        assert args == {"p_utilisateur": as_user["id_utilisateur"], "p_granularite": "week",
+                        "p_debut": None, "p_fin": "2026-10-18"}
+        mock_admin.table.assert_not_called()
+
+
+class TestExport:
+    def _rows(self, n):
+        return [TestJournal()._journal_entry() for _ in range(n)]
+
+    def test_ndjson_streams_keyset_batches(self, client, mock_db, as_user, monkeypatch):
+        import app.api.v1.endpoints.export as export_mod
+        monkeypatch.setattr(export_mod, "EXPORT_BATCH_SIZE", 2)
+        _, mock_admin = mock_db
+        rows = self._rows(3)
+        eq = mock_admin.table.return_value.select.return_value.eq
+        params = eq.return_value.params
+        eq.return_value.order.return_value.range.return_value.execute.return_value = MagicMock(data=rows[:2])
+        eq.return_value.order.return_value.limit.return_value.execute.return_value = MagicMock(data=rows[2:])
+        eq.return_value.is_.return_value.order.return_value.limit.return_value.execute.return_value = (
+            MagicMock(data=[])
+        )
+
+        response = client.get("/api/v1/export?tables=journal")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["id_journal"] for line in lines] == [r["id_journal"] for r in rows]
+        assert {line["table"] for line in lines} == {"journal"}
+        eq.assert_called_with("id_utilisateur", as_user["id_utilisateur"])
+        # Deuxième lot : curseur keyset sur la dernière ligne du premier
+        name, keyset = params.add.call_args[0]
+        assert name == "or" and rows[1]["id_journal"] in keyset
+
+    def test_csv_gzip(self, client, mock_db, as_user):
+        import gzip
+        _, mock_admin = mock_db
+        rows = self._rows(2)
+        chain = mock_admin.table.return_value.select.return_value.eq.return_value.order.return_value.range.return_value
+        chain.execute.return_value = MagicMock(data=rows)
+
+        response = client.get("/api/v1/export?format=csv&tables=journal&gzip=true")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/gzip"
+        assert response.headers["content-disposition"].endswith('.csv.gz"')
+        lines = gzip.decompress(response.content).decode().splitlines()
+        assert lines[0].startswith("id_journal,") and len(lines) == 3
+
+    def test_null_dated_row_at_batch_boundary(self, client, mock_db, as_user, monkeypatch):
+        import app.api.v1.endpoints.export as export_mod
+        monkeypatch.setattr(export_mod, "EXPORT_BATCH_SIZE", 2)
+        _, mock_admin = mock_db
+        rows = [{**row, "date_consommation": None} for row in self._rows(3)]
+        eq = mock_admin.table.return_value.select.return_value.eq
+        eq.return_value.order.return_value.range.return_value.execute.return_value = MagicMock(data=rows[:2])
+        # Lot suivant : lignes sans date restantes (filtre is.null + id)
+        after_null = eq.return_value.is_.return_value.lt.return_value
+        after_null.order.return_value.limit.return_value.execute.return_value = MagicMock(data=rows[2:])
+
+        response = client.get("/api/v1/export?tables=journal")
+        assert response.status_code == 200
+        assert [json.loads(line)["id_journal"] for line in response.text.splitlines()] == [
+            r["id_journal"] for r in rows
+        ]
+        eq.return_value.is_.return_value.lt.assert_called_once_with("id_journal", rows[1]["id_journal"])
+
+    def test_sessions_include_exercices(self, client, mock_db, as_user):
+        import csv
+        _, mock_admin = mock_db
+        session = TestSessions()._session()
+        session["session_exercices"] = [
+            {"id_exercice": str(uuid4()), "nombre_series": 3, "nombre_repetitions": 10,
+             "poids": 20.0, "duree": None, "exercices": {"nom": "Squat"}}
+        ]
+        select = mock_admin.table.return_value.select
+        select.return_value.eq.return_value.order.return_value.range.return_value.execute.return_value = (
+            MagicMock(data=[session])
+        )
+
+        response = client.get("/api/v1/export?format=csv&tables=sessions")
+        assert response.status_code == 200
+        assert "session_exercices(" in select.call_args[0][0]
+        row = next(csv.DictReader(io.StringIO(response.text)))
+        assert json.loads(row["session_exercices"])[0]["exercices"] == {"nom": "Squat"}
+
+    def test_invalid_tables_400(self, client, mock_db, as_user):
+        assert client.get("/api/v1/export?tables=utilisateurs").status_code == 400
+        assert client.get("/api/v1/export?format=csv&tables=journal,sessions").status_code == 400
+
+    def test_csv_without_tables_400(self, client, mock_db, as_user):
+        _, mock_admin = mock_db
+        response = client.get("/api/v1/export?format=csv")
+        assert response.status_code == 400
+        assert "tables" in response.json()["detail"]
+        mock_admin.table.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Lectures SQL directes (pool asyncpg, DIRECT_DB_READS)
+# ---------------------------------------------------------------------------
+
+class TestDirectDbReads:
+    @pytest.fixture
+    def pg_enabled(self, monkeypatch):
+        from app.core.pg import pg_pool
+        monkeypatch.setattr(pg_pool, "_pool", MagicMock())
+        return pg_pool
+
+    def test_aliments_list_uses_pool(self, client, mock_db, auth_headers, pg_enabled, monkeypatch):
+        _, mock_admin = mock_db
+        calls = []
+
+        async def fake_list_catalog(table, filters, search, skip, limit):
+            calls.append((table, search, skip, limit))
+            return [make_aliment()]
+
+        monkeypatch.setattr("app.core.pg_repository.list_catalog", fake_list_catalog)
+        response = client.get("/api/v1/aliments?search=pou&limit=5", headers=auth_headers)
+        assert response.status_code == 200
+        assert calls == [("aliments", "pou", 0, 5)]
+        mock_admin.table.assert_not_called()
+
+    def test_exercice_get_not_found_via_pool(self, client, mock_db, auth_headers, pg_enabled, monkeypatch):
+        async def fake_get_row(table, id_col, row_id):
+            return None
+
+        monkeypatch.setattr("app.core.pg_repository.get_row", fake_get_row)
+        response = client.get(f"/api/v1/exercices/{uuid4()}", headers=auth_headers)
+        assert response.status_code == 404
+
+    def test_health_db_reports_pool_metrics(self, client, ops_headers):
+        response = client.get("/api/v1/health/db", headers=ops_headers)
+        assert response.status_code == 200
+        pool = response.json()["pool"]
+        assert {"size", "acquire_wait", "query_latency"} <= set(pool)
+
+
+# ---------------------------------------------------------------------------
+# Pagination par curseur (journal, mesures, sessions)
+# ---------------------------------------------------------------------------
+
+class TestKeysetPagination:
+    @pytest.fixture
+    def as_admin(self):
+        from app.main import app
+        from app.api.v1 import deps
+
+        async def _admin_profile():
+            return {"id": "admin", "email": "", "id_utilisateur": str(uuid4()), "app_role": "admin"}
+
+        app.dependency_overrides[deps.get_current_profile] = _admin_profile
+        yield
+        app.dependency_overrides.pop(deps.get_current_profile, None)
+
+    def _journal_entry(self):
+        return TestJournal()._journal_entry()
+
+    def test_cursor_roundtrip(self):
+        from app.core.pagination import decode_cursor, encode_cursor
+        row_id = str(uuid4())
+        cursor = encode_cursor(datetime(2026, 1, 2, 3, 4, 5), row_id)
+        assert decode_cursor(cursor) == ("2026-01-02T03:04:05", row_id)
+
+    def test_invalid_cursor_400(self, client, mock_db, as_admin):
+        response = client.get("/api/v1/journal?cursor=pas-un-curseur")
+        assert response.status_code == 400
+
+    def test_full_page_returns_next_cursor(self, client, mock_db, as_admin):
+        from app.core.pagination import decode_cursor
+        _, mock_admin = mock_db
+        rows = [self._journal_entry(), self._journal_entry()]
+        select = mock_admin.table.return_value.select.return_value
+        select.order.return_value.range.return_value.execute.return_value = MagicMock(data=rows)
+
+        response = client.get("/api/v1/journal?limit=2")
+        assert response.status_code == 200
+        assert decode_cursor(response.headers["X-Next-Cursor"]) == (
+            rows[-1]["date_consommation"], rows[-1]["id_journal"]
+        )
+        select.order.assert_called_once_with("date_consommation.desc.nullslast,id_journal", desc=True)
+
+    def test_null_dated_row_at_page_boundary(self, client, mock_db, as_admin):
+        from app.core.pagination import decode_cursor
+        _, mock_admin = mock_db
+        rows = [self._journal_entry(), {**self._journal_entry(), "date_consommation": None}]
+        select = mock_admin.table.return_value.select.return_value
+        select.order.return_value.range.return_value.execute.return_value = MagicMock(data=rows)
+
+        response = client.get("/api/v1/journal?limit=2")
+        cursor = response.headers["X-Next-Cursor"]
+        assert decode_cursor(cursor) == (None, rows[-1]["id_journal"])
+
+        # Page suivante : lignes sans date restantes, id inférieur
+        filtered = select.is_.return_value.lt.return_value
+        filtered.order.return_value.limit.return_value.execute.return_value = MagicMock(data=[])
+        response = client.get(f"/api/v1/journal?cursor={cursor}&limit=2")
+        assert response.status_code == 200
+        select.is_.assert_called_once_with("date_consommation", "null")
+        select.is_.return_value.lt.assert_called_once_with("id_journal", rows[-1]["id_journal"])
+
+    def test_cursor_uses_keyset_filter(self, client, mock_db, as_admin):
+        from app.core.pagination import encode_cursor
+        _, mock_admin = mock_db
+        select = mock_admin.table.return_value.select.return_value
+        select.order.return_value.limit.return_value.execute.return_value = MagicMock(
+            data=[self._journal_entry() for _ in range(10)]
+        )
+        params = select.params
+        cursor = encode_cursor("2026-01-02T03:04:05+00:00", uuid4())
+
+        response = client.get(f"/api/v1/journal?cursor={cursor}&limit=10")
+        assert response.status_code == 200
+        key, value = params.add.call_args[0]
+        # Borne de l'index seule (pas de « OR date IS NULL ») : page pleine, lignes sans date non lues
+        assert key == "or" and value.startswith('(date_consommation.lt."2026-01-02T03:04:05+00:00"')
+        assert "is.null" not in value
+        select.is_.assert_not_called()
+        select.order.return_value.range.assert_not_called()
+
+    def test_short_dated_page_completed_with_null_dated_rows(self, client, mock_db, as_admin):
+        from app.core.pagination import encode_cursor
+        _, mock_admin = mock_db
+        dated = {**self._journal_entry(), "date_consommation": "2026-01-01T00:00:00+00:00"}
+        undated = {**self._journal_entry(), "date_consommation": None}
+        select = mock_admin.table.return_value.select.return_value
+        select.order.return_value.limit.return_value.execute.return_value = MagicMock(data=[dated])
+        nulls = select.is_.return_value.order.return_value.limit
+        nulls.return_value.execute.return_value = MagicMock(data=[undated])
+        cursor = encode_cursor("2026-01-02T03:04:05+00:00", uuid4())
+
+        response = client.get(f"/api/v1/journal?cursor={cursor}&limit=3")
+        assert [r["id_journal"] for r in response.json()] == [dated["id_journal"], undated["id_journal"]]
+        select.is_.assert_called_once_with("date_consommation", "null")
+        select.is_.return_value.order.assert_called_once_with("id_journal", desc=True)
+        nulls.assert_called_once_with(2)
+
+        # Filtre de dates : aucune ligne sans date possible, pas de seconde requête
+        select.is_.reset_mock()
+        response = client.get(f"/api/v1/journal?cursor={cursor}&limit=3&date_debut=2025-01-01")
+        select.is_.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Statistiques (admin)
+# ---------------------------------------------------------------------------
+
+class TestStats:
+    @pytest.fixture(autouse=True)
+    def _clear(self):
+        from app.api.v1.endpoints.stats import stats_cache
+        stats_cache.clear()
+        yield
+        stats_cache.clear()
+
+    def test_counts_from_postgrest_header(self, client, mock_db):
+        _, mock_admin = mock_db
+        select = mock_admin.table.return_value.select
+        for chain in (select.return_value, select.return_value.eq.return_value):
+            chain.limit.return_value.execute.return_value = MagicMock(data=[{}], count=7)
+        mock_admin.rpc.return_value.execute.return_value = MagicMock(
+            data=[{"journal": 12, "sessions": 3, "mesures": 0}]
+        )
+
+        response = client.get("/api/v1/stats")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["counts"]["journal"] == 7
+        assert body["abonnements"]["premium"] == 7
+        assert body["activite_7j"] == {"mesures": 0, "journal": 12, "sessions": 3}
+        assert select.call_args.kwargs["count"].value == "estimated"
+        # Activité récente : un appel sur les cumuls journaliers
+        assert mock_admin.rpc.call_args[0][0] == "activite_recente"
+
+        calls = mock_admin.table.call_count
+        assert client.get("/api/v1/stats").status_code == 200
+        assert mock_admin.table.call_count == calls
@@ -147,8 +147,7 @@ class TestGetMe:
 class TestPatchMe:
     @patch("app.api.v1.endpoints.auth.fetch_app_profile")
     @patch("app.api.v1.endpoints.auth.apply_admin_bootstrap")
-    @patch("app.api.v1.endpoints.auth.supabase_admin")
-    def test_patch_me_success(self, mock_admin, mock_bootstrap, mock_fetch, client, auth_headers):
+    def test_patch_me_success(self, mock_bootstrap, mock_fetch, client, mock_db, auth_headers):
         prof1 = {
             "id_utilisateur": "u-1",
             "email": "test@example.com",
@@ -184,3 +183,49 @@ class TestPatchMe:
             json={"prenom": "X"},
         )
         assert r.status_code == 404
+
+
+# ---------------------------------------------------------------------------
+# Cache des tokens vérifiés (app.core.security.verify_token)
+# ---------------------------------------------------------------------------
+
+class TestVerifyTokenCache:
+    @pytest.fixture(autouse=True)
+    def _clear(self):
+        from app.core.security import token_cache
+        token_cache.clear()
+        yield
+        token_cache.clear()
+
+    def _token(self, **claims):
+        from jose import jwt as jose_jwt
+        from app.core.config import settings
+        return jose_jwt.encode(
+            {"sub": "user-cache", **claims}, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
+        )
+
+    async def test_second_call_hits_cache(self):
+        import time
+        from app.core import security
+        token = self._token(exp=int(time.time()) + 600)
+        hits = security.token_cache.hits
+        with patch.object(security, "_decode_token", wraps=security._decode_token) as decode:
+            assert (await security.verify_token(token))["sub"] == "user-cache"
+            assert (await security.verify_token(token))["sub"] == "user-cache"
+        assert decode.await_count == 1
+        assert security.token_cache.hits == hits + 1
+
+    async def test_entry_expires_at_token_exp(self):
+        import time
+        from app.core import security
+        exp = int(time.time()) + 30
+        await security.verify_token(self._token(exp=exp))
+        (expires_at, _), = security.token_cache._data.values()
+        assert expires_at <= time.monotonic() + 30
+
+    async def test_invalid_token_not_cached(self):
+        from fastapi import HTTPException
+        from app.core import security
+        with pytest.raises(HTTPException):
+            await security.verify_token("invalid.token.here")
+        assert len(security.token_cache) == 0
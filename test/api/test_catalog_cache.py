@@ -0,0 +1,208 @@
+"""
+Tests de l'instantané mémoire des catalogues (app.core.catalog).
+"""
+
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.core.cache import MISSING
+from app.core.catalog import CatalogCache, exercices_catalog
+from app.core.suggest import PrefixIndex
+
+
+def _exercice(nom, **extra):
+    return {
+        "id_exercice": str(uuid4()),
+        "nom": nom,
+        "type": "force",
+        "groupe_musculaire": "jambes",
+        "niveau": "debutant",
+        "created_at": "2026-01-01T00:00:00",
+        "updated_at": "2026-01-01T00:00:00",
+        **extra,
+    }
+
+
+@pytest.fixture
+def loaded_exercices():
+    rows = [
+        _exercice("Course", type="cardio", groupe_musculaire=None),
+        _exercice("Fente"),
+        _exercice("Squat", niveau="avance"),
+    ]
+    exercices_catalog._rows = rows
+    exercices_catalog._by_id = {r["id_exercice"]: r for r in rows}
+    exercices_catalog.suggest_index = PrefixIndex(rows, "id_exercice", {rows[1]["id_exercice"]: 3})
+    yield rows
+    exercices_catalog._rows = None
+    exercices_catalog._by_id = {}
+    exercices_catalog.suggest_index = None
+
+
+class TestCatalogCache:
+    def test_list_filters_like_sql(self, loaded_exercices):
+        assert [r["nom"] for r in exercices_catalog.list({"type": "force"}, None, 0, 10)] == ["Fente", "Squat"]
+        assert [r["nom"] for r in exercices_catalog.list({"niveau": None}, "QUA", 0, 10)] == ["Squat"]
+        assert [r["nom"] for r in exercices_catalog.list({}, None, 1, 1)] == ["Fente"]
+
+    def test_not_loaded_is_miss(self):
+        cache = CatalogCache("aliments", "id_aliment", "popularite_aliments")
+        assert cache.list({}, None, 0, 10) is None
+        assert cache.get(uuid4()) is MISSING
+        assert cache.stats()["misses"] == 2
+
+    async def test_load_pages_through_postgrest(self, mock_db):
+        _, mock_admin = mock_db
+        cache = CatalogCache("aliments", "id_aliment", "popularite_aliments")
+        page = [{"id_aliment": str(i), "nom": f"a{i:04d}", "updated_at": "t"} for i in range(1000)]
+        select = mock_admin.table.return_value.select
+        select.return_value.order.return_value.limit.return_value.execute.return_value = MagicMock(
+            data=[{"updated_at": "t"}], count=1001
+        )
+        select.return_value.order.return_value.range.return_value.execute.side_effect = [
+            MagicMock(data=page),
+            MagicMock(data=[{"id_aliment": "x", "nom": "z", "updated_at": "t"}]),
+        ]
+        await cache.load()
+        assert cache.stats()["rows"] == 1001
+        assert cache.get("x")["nom"] == "z"
+        assert not await cache.refresh_if_changed()
+
+    async def test_invalidate_during_load_discards_result(self, mock_db):
+        cache = CatalogCache("aliments", "id_aliment", "popularite_aliments")
+
+        async def _version():
+            cache.invalidate()
+            return ("t", 0)
+
+        async def _rows():
+            return []
+
+        cache._fetch_version = _version
+        cache._fetch_rows = _rows
+        cache._background_load = _rows
+        await cache.load()
+        assert not cache.loaded
+
+
+class TestPrefixIndex:
+    def test_word_prefix_ignores_accents_and_case(self):
+        rows = [_exercice("Développé couché"), _exercice("Pompe"), _exercice("Curl haltères")]
+        index = PrefixIndex(rows, "id_exercice", {})
+        assert [s["nom"] for s in index.search("DEVE", 5)] == ["Développé couché"]
+        assert [s["nom"] for s in index.search("couc", 5)] == ["Développé couché"]
+        assert [s["nom"] for s in index.search("halteres", 5)] == ["Curl haltères"]
+        assert index.search("ompe", 5) == []
+        assert index.search("  ", 5) == []
+
+    def test_ranked_by_popularity_then_name(self):
+        rows = [_exercice("Pompe"), _exercice("Pompe diamant"), _exercice("Pompe inclinée")]
+        popular = rows[2]["id_exercice"]
+        index = PrefixIndex(rows, "id_exercice", {popular: 12})
+        results = index.search("pom", 2)
+        assert [s["nom"] for s in results] == ["Pompe inclinée", "Pompe"]
+        assert results[0] == {"id": popular, "nom": "Pompe inclinée", "popularite": 12}
+
+    async def test_load_builds_index_without_popularity(self, mock_db):
+        cache = CatalogCache("exercices", "id_exercice", "popularite_exercices")
+        rows = [_exercice("Squat")]
+
+        async def _version():
+            return ("t", 1)
+
+        async def _rows():
+            return rows
+
+        async def _popularity():
+            raise RuntimeError("fonction absente")
+
+        cache._fetch_version, cache._fetch_rows, cache._fetch_popularity = _version, _rows, _popularity
+        await cache.load()
+        assert [s["nom"] for s in cache.suggest("sq", 5)] == ["Squat"]
+        cache.invalidate()
+        assert cache.suggest("sq", 5) is None
+
+
+class TestCatalogEndpoints:
+    def test_list_served_from_snapshot(self, client, mock_db, auth_headers, loaded_exercices):
+        _, mock_admin = mock_db
+        response = client.get("/api/v1/exercices?niveau=avance", headers=auth_headers)
+        assert response.status_code == 200
+        assert [r["nom"] for r in response.json()] == ["Squat"]
+        mock_admin.table.assert_not_called()
+
+    def test_get_unknown_id_404_from_snapshot(self, client, mock_db, auth_headers, loaded_exercices):
+        response = client.get(f"/api/v1/exercices/{uuid4()}", headers=auth_headers)
+        assert response.status_code == 404
+
+    def test_write_invalidates_snapshot(self, client, mock_db, auth_headers, loaded_exercices):
+        _, mock_admin = mock_db
+        row = loaded_exercices[1]
+        mock_admin.table.return_value.delete.return_value.eq.return_value.execute.return_value = MagicMock(data=[row])
+        response = client.delete(f"/api/v1/exercices/{row['id_exercice']}", headers=auth_headers)
+        assert response.status_code == 204
+        assert exercices_catalog._by_id.get(row["id_exercice"]) is None
+
+    def test_trigram_search_uses_rpc(self, client, mock_db, auth_headers, loaded_exercices):
+        _, mock_admin = mock_db
+        mock_admin.rpc.return_value.execute.return_value = MagicMock(data=[loaded_exercices[2]])
+        response = client.get("/api/v1/exercices?search=squa&search_mode=trigram&niveau=avance", headers=auth_headers)
+        assert response.status_code == 200
+        assert [r["nom"] for r in response.json()] == ["Squat"]
+        name, args = mock_admin.rpc.call_args[0]
+        assert name == "rechercher_exercices"
+        assert args["terme"] == "squa" and args["p_niveau"] == "avance" and args["p_limit"] == 100
+
+
+    def test_suggest_served_from_index(self, client, mock_db, auth_headers, loaded_exercices):
+        _, mock_admin = mock_db
+        response = client.get("/api/v1/exercices/suggest?q=f", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == [
+            {"id": loaded_exercices[1]["id_exercice"], "nom": "Fente", "popularite": 3}
+        ]
+        assert "ETag" in response.headers
+        mock_admin.table.assert_not_called()
+
+    def test_suggest_falls_back_to_prefix_function(self, client, mock_db, auth_headers):
+        _, mock_admin = mock_db
+        row = _exercice("Développé couché")
+        mock_admin.rpc.return_value.execute.return_value = MagicMock(
+            data=[{"id": row["id_exercice"], "nom": row["nom"], "popularite": 0}]
+        )
+        response = client.get("/api/v1/exercices/suggest?q=couche&limit=5", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == [{"id": row["id_exercice"], "nom": "Développé couché", "popularite": 0}]
+        # Normalisation et début de mot côté SQL, comme PrefixIndex
+        mock_admin.rpc.assert_called_with("suggerer_exercices", {"prefixe": "couche", "p_limit": 5})
+        mock_admin.table.assert_not_called()
+        assert client.get("/api/v1/exercices/suggest?q=", headers=auth_headers).status_code == 422
+
+
+class TestConditionalResponses:
+    def test_catalog_etag_and_304(self, client, mock_db, auth_headers, loaded_exercices):
+        first = client.get("/api/v1/exercices", headers=auth_headers)
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+        assert "max-age=" in first.headers["Cache-Control"]
+
+        again = client.get("/api/v1/exercices", headers={**auth_headers, "If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["ETag"] == etag
+
+        other = client.get("/api/v1/exercices?niveau=avance", headers={**auth_headers, "If-None-Match": etag})
+        assert other.status_code == 200
+
+    def test_body_etag_when_not_cached(self, client, mock_db, auth_headers):
+        _, mock_admin = mock_db
+        row = _exercice("Pompe")
+        mock_admin.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(data=[row])
+        url = f"/api/v1/exercices/{row['id_exercice']}"
+        etag = client.get(url, headers=auth_headers).headers["ETag"]
+        assert client.get(url, headers={**auth_headers, "If-None-Match": f"W/{etag}"}).status_code == 304
+
+        row["niveau"] = "avance"
+        assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 200
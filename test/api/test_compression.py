@@ -0,0 +1,104 @@
+"""
+Tests du middleware de compression des réponses (app.core.compression).
+"""
+
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, CompressionStats, negotiate
+
+BIG = b'{"nom":"' + b"pomme " * 500 + b'"}'
+
+
+@pytest.fixture
+def stats():
+    return CompressionStats()
+
+
+@pytest.fixture
+def client(stats):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, encodings=("gzip",), stats=stats)
+
+    @app.get("/big")
+    async def big():
+        return Response(BIG, media_type="application/json", headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"ok":true}', media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(20):
+                yield b'{"ligne":%d,"texte":"%s"}\n' % (i, b"x" * 200)
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.get("/archive")
+    async def archive():
+        return Response(gzip.compress(BIG), media_type="application/gzip")
+
+    @app.get("/not-modified")
+    async def not_modified():
+        return Response(status_code=304, headers={"ETag": '"abc"'})
+
+    return TestClient(app)
+
+
+def _get(client, path, accept="gzip"):
+    # stream=True : corps brut, sans décompression automatique par httpx
+    with client.stream("GET", path, headers={"Accept-Encoding": accept}) as r:
+        return r, b"".join(r.iter_raw())
+
+
+class TestNegotiate:
+    def test_server_preference_and_q_values(self):
+        assert negotiate("gzip, br", ("br", "gzip")) == "br"
+        assert negotiate("gzip;q=1, br;q=0.5", ("br", "gzip")) == "gzip"
+        assert negotiate("br;q=0, *", ("br", "gzip")) == "gzip"
+        assert negotiate("identity", ("br", "gzip")) is None
+        assert negotiate("", ("gzip",)) is None
+
+
+class TestCompressionMiddleware:
+    def test_large_response_is_gzipped_with_weak_etag(self, client, stats):
+        r, raw = _get(client, "/big")
+        assert r.headers["content-encoding"] == "gzip"
+        assert r.headers["vary"] == "Accept-Encoding"
+        assert r.headers["etag"] == 'W/"abc"'
+        assert int(r.headers["content-length"]) == len(raw)
+        assert gzip.decompress(raw) == BIG
+        (entry,) = stats.stats()
+        assert entry["route"] == "/big" and entry["bytes_in"] == len(BIG) and entry["bytes_out"] == len(raw)
+
+    def test_small_response_untouched(self, client, stats):
+        r, raw = _get(client, "/small")
+        assert "content-encoding" not in r.headers
+        assert raw == b'{"ok":true}'
+        assert stats.stats() == []
+
+    def test_no_accept_encoding(self, client):
+        r, raw = _get(client, "/big", accept="identity")
+        assert "content-encoding" not in r.headers
+        assert raw == BIG
+
+    def test_stream_compressed_chunk_by_chunk(self, client, stats):
+        r, raw = _get(client, "/stream")
+        assert r.headers["content-encoding"] == "gzip"
+        assert "content-length" not in r.headers
+        lines = zlib.decompress(raw, wbits=31).splitlines()
+        assert len(lines) == 20
+        assert stats.stats()[0]["route"] == "/stream"
+
+    def test_already_compressed_and_304_passthrough(self, client):
+        r, raw = _get(client, "/archive")
+        assert "content-encoding" not in r.headers
+        assert gzip.decompress(raw) == BIG
+        r, raw = _get(client, "/not-modified")
+        assert r.status_code == 304 and "content-encoding" not in r.headers
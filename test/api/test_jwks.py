@@ -0,0 +1,70 @@
+"""
+Tests du jeu de clés JWKS (app.core.jwks) : single-flight, stale-while-revalidate.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import jwks
+from app.core.jwks import JwksStore, JwksUnavailable
+
+KEY_A = {"kid": "a", "kty": "EC"}
+KEY_B = {"kid": "b", "kty": "EC"}
+
+
+class _FakeStore(JwksStore):
+    """Remplace l'appel HTTP par une réponse scriptée (lente si ``delay``)."""
+
+    def __init__(self, responses, delay=0.0):
+        super().__init__("http://auth.test/jwks.json")
+        self.responses = list(responses)
+        self.delay = delay
+
+    async def _fetch(self):
+        await asyncio.sleep(self.delay)
+        resp = self.responses.pop(0)
+        if isinstance(resp, Exception):
+            raise resp
+        return resp
+
+
+async def test_unknown_kid_single_flight():
+    store = _FakeStore([{"keys": [KEY_A, KEY_B]}], delay=0.05)
+    store.set_keys({"keys": [KEY_A]})
+    store._fetched_at -= jwks.JWKS_MIN_REFETCH_SEC + 1
+    keys = await asyncio.gather(*(store.get_key("b") for _ in range(20)))
+    assert keys == [KEY_B] * 20
+    assert store.fetches == 1
+
+
+async def test_unknown_kid_rate_limited():
+    store = _FakeStore([])
+    store.set_keys({"keys": [KEY_A]})
+    assert await store.get_key("inconnu") is None
+    assert store.fetches == 0
+
+
+async def test_stale_keys_served_while_refreshing():
+    store = _FakeStore([httpx.ConnectError("down")], delay=0.05)
+    store.set_keys({"keys": [KEY_A]})
+    store._fetched_at -= jwks.JWKS_TTL_SEC + 1
+    assert await store.get_key("a") == KEY_A
+    await asyncio.sleep(0.1)
+    assert store.failures == 1
+    assert await store.get_key("a") == KEY_A
+
+
+async def test_never_loaded_raises():
+    store = _FakeStore([httpx.ConnectError("down")])
+    with pytest.raises(JwksUnavailable):
+        await store.get_key("a")
+
+
+async def test_start_survives_failure():
+    store = _FakeStore([httpx.ConnectError("down")])
+    await store.start()
+    assert not store.loaded
+    assert store.stats()["failures"] == 1
+    await store.stop()
@@ -0,0 +1,65 @@
+"""
+Tests des métriques Prometheus (app.core.metrics, GET /metrics).
+"""
+
+import httpx
+
+from app.core import metrics
+from app.core.metrics import Histogram, instrument_httpx
+
+
+class TestHistogram:
+    def test_render_cumulative_buckets(self):
+        h = Histogram("t_seconds", "test", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            h.observe(("/a",), value)
+        lines = list(h.render())
+        assert 't_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 't_seconds_bucket{route="/a",le="1.0"} 3' in lines
+        assert 't_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 't_seconds_count{route="/a"} 4' in lines
+        assert 't_seconds_sum{route="/a"} 4.05' in lines
+
+
+class TestMetricsEndpoint:
+    def test_route_template_and_status(self, client, ops_headers):
+        client.get("/health")
+        client.get("/api/v1/aliments/pas-un-uuid")
+        r = client.get("/metrics", headers=ops_headers)
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = r.text
+        assert 'http_request_duration_seconds_count{route="/health",method="GET",status="200"}' in body
+        # chemin déclaré, pas l'URL réelle
+        assert 'route="/api/v1/aliments/{aliment_id}"' in body
+        assert "pas-un-uuid" not in body
+        assert 'http_requests_in_flight{method="GET"} 1' in body  # la requête /metrics elle-même
+
+    def test_internal_stats_require_token_or_admin(self, client, auth_headers, ops_headers):
+        for path in ("/metrics", "/api/v1/health/db", "/api/v1/health/caches", "/api/v1/health/compression"):
+            assert client.get(path).status_code == 401
+            assert client.get(path, headers={"Authorization": "Bearer mauvais-jeton"}).status_code == 401
+            assert client.get(path, headers=ops_headers).status_code == 200
+        # Compte authentifié non admin : refusé
+        from unittest.mock import AsyncMock, patch
+        with patch("app.api.v1.deps.get_app_profile", AsyncMock(return_value={"app_role": "user"})):
+            assert client.get("/metrics", headers=auth_headers).status_code == 403
+        # Vivacité : publique, sans détail
+        assert client.get("/health").json() == {"status": "healthy"}
+        assert client.get("/api/v1/health").status_code == 200
+
+
+async def test_postgrest_calls_timed_by_table_and_operation():
+    def handler(request):
+        return httpx.Response(200, json=[])
+
+    session = httpx.AsyncClient(base_url="http://pg/rest/v1", transport=httpx.MockTransport(handler))
+    instrument_httpx(session)
+    await session.get("/journal_alimentaire", params={"select": "*"})
+    await session.post("/aliments", json={}, headers={"Prefer": "resolution=merge-duplicates"})
+    await session.post("/rpc/resume_nutrition", json={})
+    await session.aclose()
+    body = metrics.render()
+    assert 'postgrest_request_duration_seconds_count{table="journal_alimentaire",operation="select"}' in body
+    assert 'postgrest_request_duration_seconds_count{table="aliments",operation="upsert"}' in body
+    assert 'postgrest_request_duration_seconds_count{table="resume_nutrition",operation="rpc"}' in body
@@ -0,0 +1,102 @@
+"""
+Tests du cache des profils (app.core.cache / app.core.user_profile).
+"""
+
+import time
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.core import user_profile
+from app.core.cache import MISSING, TTLCache
+
+
+class TestTTLCache:
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_expiry(self, monkeypatch):
+        cache = TTLCache(maxsize=10, ttl=5)
+        cache.set("a", 1)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+        assert cache.get("a") is MISSING
+        assert len(cache) == 0
+
+    def test_stats(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", None)
+        assert cache.get("a") is None
+        cache.get("b")
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+
+class TestProfileCache:
+    @pytest.fixture(autouse=True)
+    def _clear(self):
+        user_profile.profile_cache.clear()
+        yield
+        user_profile.profile_cache.clear()
+
+    @pytest.fixture
+    def fetch(self, monkeypatch):
+        mock = AsyncMock()
+        monkeypatch.setattr(user_profile, "fetch_app_profile", mock)
+        monkeypatch.setattr(user_profile, "get_admin_email_set", lambda: [])
+        return mock
+
+    async def test_profile_fetched_once(self, fetch):
+        fetch.return_value = {"id_utilisateur": "u-1", "app_role": "user"}
+        for _ in range(3):
+            prof = await user_profile.get_app_profile("sub-1", "a@b.com")
+            assert prof["id_utilisateur"] == "u-1"
+        assert fetch.await_count == 1
+
+    async def test_missing_profile_cached(self, fetch):
+        fetch.return_value = None
+        assert await user_profile.get_app_profile("sub-2", "") is None
+        assert await user_profile.get_app_profile("sub-2", "") is None
+        assert fetch.await_count == 1
+        user_profile.invalidate_missing_profiles()
+        await user_profile.get_app_profile("sub-2", "")
+        assert fetch.await_count == 2
+
+    async def test_invalidate_utilisateur(self, fetch):
+        fetch.return_value = {"id_utilisateur": "u-3", "app_role": "admin"}
+        await user_profile.get_app_profile("sub-3", "")
+        user_profile.invalidate_utilisateur("u-3")
+        await user_profile.get_app_profile("sub-3", "")
+        assert fetch.await_count == 2
+
+
+class TestProfileCacheInvalidationEndpoints:
+    def test_admin_update_invalidates(self, client, mock_db):
+        _, mock_admin = mock_db
+        uid = str(uuid4())
+        user_profile.profile_cache.set("sub-x", {"id_utilisateur": uid, "app_role": "admin"})
+        mock_admin.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock(data=[{
+            "id_utilisateur": uid,
+            "email": "a@b.com",
+            "app_role": "user",
+            "type_abonnement": "freemium",
+            "created_at": "2026-01-01T00:00:00",
+            "updated_at": "2026-01-01T00:00:00",
+        }])
+
+        response = client.put(f"/api/v1/utilisateurs/{uid}", json={"app_role": "user"})
+        assert response.status_code == 200
+        assert user_profile.profile_cache.get("sub-x") is MISSING
+
+    def test_health_caches(self, client, ops_headers):
+        response = client.get("/api/v1/health/caches", headers=ops_headers)
+        assert response.status_code == 200
+        assert "hit_ratio" in response.json()["profiles"]
@@ -5,7 +5,7 @@ Configuration pytest partagée — fixtures pour les tests unitaires et d'intég
 import sys
 import os
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "etl"))
@@ -13,11 +13,20 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "etl"))
 
 # --------------- Fixtures API (FastAPI TestClient) ---------------
 
+class AsyncQueryMock(MagicMock):
+    """MagicMock chaînable dont ``.execute()`` est awaitable (client PostgREST async)."""
+
+    def _get_child_mock(self, **kw):
+        if kw.get("name") == "execute":
+            return AsyncMock(**kw)
+        return AsyncQueryMock(**kw)
+
+
 @pytest.fixture(scope="session")
 def _mock_supabase():
     """Mock Supabase globalement avant tout import de l'app."""
     mock_client = MagicMock()
-    mock_admin = MagicMock()
+    mock_admin = AsyncQueryMock()
 
     with patch.dict(os.environ, {
         "SUPABASE_URL": "http://localhost:54321",
@@ -72,6 +81,8 @@ def supabase_mock(_mock_supabase, monkeypatch):
     monkeypatch.setattr(dbc, "supabase_admin", _mock_supabase)
     for m in (u_mod, a_mod, e_mod, j_mod, s_mod, m_mod):
         monkeypatch.setattr(m, "supabase_admin", _mock_supabase)
+    from app.core.user_profile import profile_cache
+    profile_cache.clear()
     return _mock_supabase
 
 
@@ -0,0 +1,153 @@
+"""
+Tests unitaires pour le module ETL load (upsert différentiel).
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "etl"))
+
+from batching import AdaptiveBatcher, estimate_row_bytes
+from load import SupabaseLoader
+from source_state import RowSnapshot
+
+
+def _loader():
+    return SupabaseLoader(concurrency=1, client=MagicMock())
+
+
+def _sent(loader):
+    upsert = loader.client.table.return_value.upsert
+    return [r["nom"] for call in upsert.call_args_list for r in call.args[0]]
+
+
+class TestUpsertChanged:
+    def test_second_run_sends_only_changes(self, tmp_path):
+        loader = _loader()
+        df = pd.DataFrame({"nom": ["Pomme", "Poire", "Kiwi"], "calories": [52.0, 57.0, 61.0]})
+        counts = loader.upsert_changed(df, "aliments", "nom", RowSnapshot("aliments", directory=tmp_path))
+        assert counts["sent"] == 3 and counts["inserted"] == 3
+
+        loader = _loader()
+        df.loc[1, "calories"] = 58.0
+        counts = loader.upsert_changed(df, "aliments", "nom", RowSnapshot("aliments", directory=tmp_path))
+        assert _sent(loader) == ["Poire"]
+        assert counts == {"inserted": 0, "updated": 1, "unchanged": 2, "deleted": 0, "failed": 0, "sent": 1}
+
+    def test_vanished_keys_deleted_only_on_request(self, tmp_path):
+        df = pd.DataFrame({"nom": ["Pomme", "Poire"], "calories": [52.0, 57.0]})
+        _loader().upsert_changed(df, "aliments", "nom", RowSnapshot("aliments", directory=tmp_path))
+
+        loader = _loader()
+        counts = loader.upsert_changed(df.iloc[:1], "aliments", "nom", RowSnapshot("aliments", directory=tmp_path))
+        assert counts["deleted"] == 0 and counts["sent"] == 0
+        loader.client.table.return_value.delete.assert_not_called()
+
+        loader = _loader()
+        counts = loader.upsert_changed(
+            df.iloc[:1], "aliments", "nom", RowSnapshot("aliments", directory=tmp_path), delete_missing=True
+        )
+        assert counts["deleted"] == 1
+        loader.client.table.return_value.delete.return_value.in_.assert_called_once_with("nom", ["Poire"])
+
+    def test_failed_rows_are_retried_next_run(self, tmp_path):
+        loader = _loader()
+        loader.client.table.return_value.upsert.return_value.execute.side_effect = Exception("boom")
+        df = pd.DataFrame({"nom": ["Pomme"], "calories": [52.0]})
+        counts = loader.upsert_changed(df, "aliments", "nom", RowSnapshot("aliments", directory=tmp_path))
+        assert counts["failed"] == 1
+
+        loader = _loader()
+        loader.upsert_changed(df, "aliments", "nom", RowSnapshot("aliments", directory=tmp_path))
+        assert _sent(loader) == ["Pomme"]
+
+
+class TestConcurrentBatches:
+    def test_in_flight_bounded_and_results_in_order(self):
+        import threading
+        import time
+
+        loader = _loader()
+        loader.concurrency = 3
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def send(n, batch):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01 * (n % 3))  # terminaisons dans le désordre
+            with lock:
+                active[0] -= 1
+            return n
+
+        batches = [[{"n": i}] for i in range(10)]
+        assert loader._run_batches(batches, send, "aliments") == list(range(10))
+        assert peak[0] == 3
+
+    def test_concurrent_upsert_sends_every_row(self):
+        loader = _loader()
+        loader.concurrency = 4
+        df = pd.DataFrame({"nom": [f"A{i}" for i in range(450)], "calories": 1.0})
+        assert loader.upsert_dataframe(df, "aliments", on_conflict="nom")
+        assert sorted(_sent(loader)) == sorted(df["nom"])
+
+    def test_failed_insert_batch_fails_load(self):
+        loader = _loader()
+        loader.concurrency = 2
+        loader._batchers[("mesures_biometriques", "insert")] = AdaptiveBatcher(max_rows=1000)
+        loader.client.table.return_value.insert.return_value.execute.side_effect = [None, Exception("boom"), None]
+        df = pd.DataFrame({"nom": [f"A{i}" for i in range(2500)]})
+        assert loader.load_dataframe(df, "mesures_biometriques") is False
+        assert loader.batch_log[0]["batches"] == 3
+
+
+class TestAdaptiveBatcher:
+    def test_batch_rows_follow_row_width(self):
+        narrow = [{"nom": f"A{i}", "calories": 1.0} for i in range(100)]
+        wide = [{"nom": f"A{i}", "instructions": "x" * 2000} for i in range(100)]
+        batcher = AdaptiveBatcher(target_bytes=64 * 1024, max_rows=5000)
+        assert batcher.rows_for(estimate_row_bytes(narrow)) > 20 * batcher.rows_for(estimate_row_bytes(wide))
+        assert batcher.rows_for(10 ** 9) == 1  # ligne plus grosse que le budget : une par lot
+
+    def test_aimd_grows_on_fast_batches_and_halves_on_slow_or_failed(self):
+        batcher = AdaptiveBatcher(target_bytes=8000, target_seconds=1.0)
+        batcher.observe(0.1, ok=True)
+        assert batcher.budget == 9000
+        batcher.observe(2.0, ok=True)
+        assert batcher.budget == 4500
+        batcher.observe(0.1, ok=False)
+        assert batcher.budget == 2250
+        for _ in range(100):
+            batcher.observe(0.1, ok=True)
+        assert batcher.budget == 32000  # plafond : 4 × la cible
+        assert (batcher.increases, batcher.decreases) == (101, 2)
+
+    def test_batches_resize_between_sends(self):
+        batcher = AdaptiveBatcher(target_bytes=1000, max_rows=100)
+        sizes = []
+        records = [{"n": i} for i in range(50)]
+        for batch in batcher.batches(records, 100.0, sizes):
+            batcher.observe(0.0, ok=True)
+        assert sizes[:2] == [10, 11] and sum(sizes) == 50
+
+    def test_failed_upsert_batch_shrinks_next_batches(self):
+        loader = _loader()
+        loader._batchers[("aliments", "upsert")] = AdaptiveBatcher(target_bytes=4096)
+        calls = []
+
+        def execute():
+            calls.append(1)
+            if len(calls) == 1:
+                raise Exception("payload too large")
+
+        loader.client.table.return_value.upsert.return_value.execute.side_effect = execute
+        df = pd.DataFrame({"nom": [f"A{i}" for i in range(500)], "calories": 1.0})
+        assert loader.upsert_dataframe(df, "aliments", on_conflict="nom")
+        entry = loader.batch_log[0]
+        assert entry["table"] == "aliments" and entry["operation"] == "upsert"
+        assert entry["decreases"] == 1 and entry["max_rows"] == entry["first_rows"]
+        assert entry["min_rows"] < entry["first_rows"]
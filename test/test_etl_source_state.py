@@ -0,0 +1,95 @@
+"""
+Tests unitaires de l'état des sources ETL (chargement incrémental).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "etl"))
+
+from source_state import RowSnapshot, SourceStateStore, hash_file, hash_records, hash_row
+
+
+class TestHashes:
+    def test_hash_file_changes_with_content(self, tmp_path):
+        csv = tmp_path / "a.csv"
+        csv.write_text("nom,calories\nPomme,52\n")
+        first = hash_file(str(csv))
+        assert hash_file(str(csv)) == first
+        csv.write_text("nom,calories\nPomme,53\n")
+        assert hash_file(str(csv)) != first
+
+    def test_hash_records_ignores_key_order(self):
+        assert hash_records([{"a": 1, "b": 2}]) == hash_records([{"b": 2, "a": 1}])
+        assert hash_records([{"a": 1}]) != hash_records([{"a": 2}])
+
+
+class TestSourceStateStore:
+    def test_unchanged_after_record_and_persisted(self, tmp_path):
+        path = tmp_path / "state.json"
+        store = SourceStateStore(path)
+        assert not store.is_unchanged("aliments", "h1")
+        store.record("aliments", "h1", 120)
+
+        reloaded = SourceStateStore(path)
+        assert reloaded.is_unchanged("aliments", "h1")
+        assert not reloaded.is_unchanged("aliments", "h2")
+        assert reloaded.get("aliments")["rows"] == 120
+
+    def test_force_ignores_state(self, tmp_path):
+        path = tmp_path / "state.json"
+        SourceStateStore(path).record("aliments", "h1", 1)
+        assert not SourceStateStore(path, force=True).is_unchanged("aliments", "h1")
+
+    def test_transform_change_invalidates(self, tmp_path):
+        path = tmp_path / "state.json"
+        store = SourceStateStore(path)
+        store.record("aliments", "h1", 1)
+        store._code = "autre version de transform.py"
+        assert not store.is_unchanged("aliments", "h1")
+
+    def test_corrupted_state_reloads_everything(self, tmp_path):
+        path = tmp_path / "state.json"
+        path.write_text("{pas du json")
+        assert not SourceStateStore(path).is_unchanged("aliments", "h1")
+
+
+class TestReportSkipped:
+    def test_skipped_sources_count_as_success(self, tmp_path, monkeypatch):
+        import scheduler
+
+        monkeypatch.setattr(scheduler, "REPORTS_DIR", tmp_path)
+        state = SourceStateStore(tmp_path / "state.json")
+        state.record("gym_members", "h", 973)
+        report = scheduler.ExecutionReport()
+
+        assert scheduler._skip_if_unchanged(state, report, "gym_members", "h",
+                                            ("utilisateurs_gym", "mesures_biometriques"))
+        assert not scheduler._skip_if_unchanged(state, report, "aliments", "h", ("aliments",))
+        payload = report.save()
+        assert payload["status"] == "success"
+        assert [s["status"] for s in payload["sources"]] == ["skipped (unchanged)"] * 2
+        assert payload["sources"][1]["rows_source"] == 973
+
+
+class TestRowSnapshot:
+    def test_diff_reports_only_new_and_modified_rows(self, tmp_path):
+        snap = RowSnapshot("aliments", directory=tmp_path)
+        rows = [{"nom": "Pomme", "calories": 52}, {"nom": "Poire", "calories": 57}]
+        to_send, current, vanished, counts = snap.diff(rows, "nom")
+        assert len(to_send) == 2 and counts["inserted"] == 2
+        snap.save(current)
+
+        reloaded = RowSnapshot("aliments", directory=tmp_path)
+        rows = [{"nom": "Pomme", "calories": 53}, {"nom": "Kiwi", "calories": 61}]
+        to_send, _, vanished, counts = reloaded.diff(rows, "nom")
+        assert [r["nom"] for r in to_send] == ["Pomme", "Kiwi"]
+        assert counts == {"inserted": 1, "updated": 1, "unchanged": 0}
+        assert vanished == ["Poire"]
+
+    def test_force_starts_from_empty_snapshot(self, tmp_path):
+        snap = RowSnapshot("aliments", directory=tmp_path)
+        snap.save({"Pomme": hash_row({"nom": "Pomme"})})
+        forced = RowSnapshot("aliments", force=True, directory=tmp_path)
+        to_send, *_ = forced.diff([{"nom": "Pomme"}], "nom")
+        assert len(to_send) == 1
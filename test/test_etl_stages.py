@@ -0,0 +1,72 @@
+"""
+Tests unitaires de l'exécution des étapes ETL (stages.py).
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "etl"))
+
+from stages import Stage, run_stages
+
+
+def _sleep(seconds, log=None, name=None, result=True):
+    def run():
+        time.sleep(seconds)
+        if log is not None:
+            log.append(name)
+        return result
+    return run
+
+
+class TestRunStages:
+    def test_independent_stages_overlap(self):
+        stages = [Stage(f"s{i}", _sleep(0.2)) for i in range(4)]
+        start = time.perf_counter()
+        timings = run_stages(stages, max_workers=4)
+        assert time.perf_counter() - start < 0.6  # séquentiel : 0.8 s
+        assert [t["status"] for t in timings] == ["ok"] * 4
+        assert all(t["duration_seconds"] >= 0.2 for t in timings)
+
+    def test_dependency_runs_after_parent(self):
+        log = []
+        timings = run_stages([
+            Stage("mesures", _sleep(0, log, "mesures"), depends_on=("utilisateurs",)),
+            Stage("utilisateurs", _sleep(0.1, log, "utilisateurs")),
+        ], max_workers=2)
+        assert log == ["utilisateurs", "mesures"]
+        assert timings[0]["start_offset_seconds"] >= timings[1]["duration_seconds"]
+
+    def test_failed_stage_blocks_dependents(self):
+        def boom():
+            raise RuntimeError("source indisponible")
+
+        timings = run_stages([
+            Stage("a", boom),
+            Stage("b", _sleep(0), depends_on=("a",)),
+            Stage("c", _sleep(0, result=False)),
+        ], max_workers=2)
+        assert [t["status"] for t in timings] == ["failed", "blocked", "failed"]
+
+    def test_single_worker_is_sequential(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def run():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+        run_stages([Stage(f"s{i}", run) for i in range(3)], max_workers=1)
+        assert peak[0] == 1
+
+    def test_cycle_rejected(self):
+        with pytest.raises(ValueError):
+            run_stages([Stage("a", _sleep(0), ("b",)), Stage("b", _sleep(0), ("a",))])
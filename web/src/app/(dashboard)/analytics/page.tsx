@@ -2,7 +2,7 @@
 
 import { useEffect, useState } from "react";
 import { useAuth } from "@/contexts/auth-context";
-import { fetchAll } from "@/lib/fetch-all";
+import { apiFetch } from "@/lib/api";
 import { PageHeader, Card, SkeletonTable } from "@/components/ui";
 import {
   IconShield, IconUsers, IconLeaf, IconDumbbell,
@@ -18,6 +18,14 @@ type Counts = {
   sessions: number;
 };
 
+type Stats = {
+  counts: Counts;
+  abonnements: Record<string, number>;
+  activite_7j: Record<string, number>;
+  count_method: string;
+  generated_at: string;
+};
+
 const METRICS = [
   { key: "utilisateurs" as keyof Counts, label: "Utilisateurs", icon: <IconUsers size={18} />, color: "text-blue-400", bg: "bg-blue-500/10" },
   { key: "aliments" as keyof Counts, label: "Aliments", icon: <IconLeaf size={18} />, color: "text-emerald-400", bg: "bg-emerald-500/10" },
@@ -64,7 +72,8 @@ function BarChart({ counts }: { counts: Counts }) {
 
 export default function AnalyticsPage() {
   const { token, profile } = useAuth();
-  const [counts, setCounts] = useState<Counts | null>(null);
+  const [stats, setStats] = useState<Stats | null>(null);
+  const counts = stats?.counts ?? null;
   const [err, setErr] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
 
@@ -73,16 +82,10 @@ export default function AnalyticsPage() {
     let cancelled = false;
     (async () => {
       try {
-        const [u, a, e, m, j, s] = await Promise.all([
-          fetchAll<unknown>("/utilisateurs", token),
-          fetchAll<unknown>("/aliments", token),
-          fetchAll<unknown>("/exercices", token),
-          fetchAll<unknown>("/mesures", token),
-          fetchAll<unknown>("/journal", token),
-          fetchAll<unknown>("/sessions", token),
-        ]);
+        // Compteurs calculés côté serveur (un seul appel, quelques Ko)
+        const data = await apiFetch<Stats>("/stats", { token });
         if (!cancelled) {
-          setCounts({ utilisateurs: u.length, aliments: a.length, exercices: e.length, mesures: m.length, journal: j.length, sessions: s.length });
+          setStats(data);
           setLoading(false);
         }
       } catch (e) {
@@ -166,6 +169,25 @@ export default function AnalyticsPage() {
               </div>
             </Card>
           )}
+
+          {stats && (
+            <Card>
+              <h2 className="text-sm font-semibold text-white mb-4">Abonnements et activité (7 derniers jours)</h2>
+              <div className="grid grid-cols-2 sm:grid-cols-4 gap-4">
+                {[
+                  ...Object.entries(stats.abonnements).map(([k, v]) => ({ label: `Abonnés ${k}`, value: v })),
+                  { label: "Entrées journal (7 j)", value: stats.activite_7j.journal ?? 0 },
+                  { label: "Sessions (7 j)", value: stats.activite_7j.sessions ?? 0 },
+                  { label: "Mesures (7 j)", value: stats.activite_7j.mesures ?? 0 },
+                ].map((s) => (
+                  <div key={s.label} className="bg-slate-800/50 rounded-lg p-3">
+                    <p className="text-xs text-slate-500">{s.label}</p>
+                    <p className="mt-1 text-lg font-semibold text-white">{s.value.toLocaleString("fr-FR")}</p>
+                  </div>
+                ))}
+              </div>
+            </Card>
+          )}
         </>
       )}
     </div>